@@ -0,0 +1,11 @@
+"""Leitura das variáveis de ambiente de configuração"""
+
+import os
+
+VERDADEIROS = ("1", "true", "yes", "on")
+
+def verdadeiro(valor: str) -> bool:
+    return valor.strip().lower() in VERDADEIROS
+
+def env_bool(nome: str, padrao: str) -> bool:
+    return verdadeiro(os.getenv(nome, padrao))
@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 import logging
-from . import crud, schemas, database
+from . import crud, schemas, database, pagination, cache, bulk_import, export, busca, versoes, respostas, projecao
 
 logger = logging.getLogger(__name__)
 
@@ -11,11 +13,11 @@ router = APIRouter()
 @router.post("/produtores/", response_model=schemas.Produtor, status_code=status.HTTP_201_CREATED)
 def create_produtor(produtor: schemas.ProdutorCreate, db: Session = Depends(database.get_db)):
     """Criar um novo produtor rural"""
-    logger.info(f"Recebida requisição para criar produtor: {produtor.nome}")
+    logger.info("Recebida requisição para criar produtor: %s", produtor.nome)
     
     db_produtor = crud.get_produtor_by_cpf_cnpj(db, cpf_cnpj=produtor.cpf_cnpj)
     if db_produtor:
-        logger.warning(f"Tentativa de criar produtor com CPF/CNPJ já existente: {produtor.cpf_cnpj}")
+        logger.warning("Tentativa de criar produtor com CPF/CNPJ já existente: %s", produtor.cpf_cnpj)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="CPF/CNPJ já cadastrado"
@@ -23,33 +25,139 @@ def create_produtor(produtor: schemas.ProdutorCreate, db: Session = Depends(data
     
     return crud.create_produtor(db=db, produtor=produtor)
 
-@router.get("/produtores/", response_model=List[schemas.Produtor])
-def read_produtores(skip: int = 0, limit: int = 100, db: Session = Depends(database.get_db)):
-    """Listar todos os produtores rurais"""
-    logger.info(f"Recebida requisição para listar produtores - skip: {skip}, limit: {limit}")
-    produtores = crud.get_produtores(db, skip=skip, limit=limit)
-    return produtores
+@router.post("/produtores/importar", response_model=schemas.ResultadoImportacao)
+async def importar_produtores(request: Request, formato: Optional[str] = None, db: Session = Depends(database.get_db)):
+    """Importar produtores em massa a partir de CSV ou NDJSON
 
-@router.get("/produtores/{produtor_id}", response_model=schemas.Produtor)
-def read_produtor(produtor_id: int, db: Session = Depends(database.get_db)):
+    O corpo é lido em streaming e gravado em lotes; linhas inválidas são
+    reportadas individualmente sem abortar o restante do arquivo. Só a
+    leitura do corpo roda no event loop: a interpretação, a validação e a
+    gravação de cada chunk vão para o pool de threads.
+    """
+    try:
+        formato = bulk_import.detectar_formato(request.headers.get("content-type"), formato)
+    except bulk_import.ErroFormato as exc:
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail=str(exc))
+    logger.info("Recebida requisição de importação em massa - formato: %s", formato)
+
+    importador = bulk_import.Importador(db)
+    leitor = bulk_import.Leitor(formato)
+    try:
+        async for chunk in request.stream():
+            await run_in_threadpool(importador.processar, leitor.alimentar(chunk))
+        await run_in_threadpool(importador.processar, leitor.finalizar())
+    except (bulk_import.ErroFormato, UnicodeDecodeError) as exc:
+        # Erros que impedem a leitura do restante do arquivo (cabeçalho, codificação);
+        # lotes já gravados permanecem
+        logger.warning("Importação interrompida: %s", exc)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    await run_in_threadpool(importador.gravar_lote)
+
+    resultado = importador.resultado()
+    logger.info("Importação concluída - importados: %s, erros: %s", resultado['importados'], resultado['total_erros'])
+    return resultado
+
+def resolver_cursor(cursor: Optional[str]) -> Optional[int]:
+    if cursor is None:
+        return None
+    try:
+        return pagination.decode_cursor(cursor)
+    except pagination.CursorInvalido:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor inválido"
+        )
+
+def verificar_etag(request: Request, response: Response, valor: str):
+    """Responde 304 se o If-None-Match do cliente já tem essa versão; senão anota o ETag"""
+    cabecalhos = {"ETag": valor, "Cache-Control": "no-cache"}
+    if versoes.corresponde(request.headers.get("if-none-match"), valor):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=cabecalhos)
+    response.headers.update(cabecalhos)
+
+def condicional(prefixo: str):
+    """Dependência de GET condicional pela versão dos dados (versoes.py).
+
+    Roda antes da rota: com o ETag igual ao do cliente, a requisição termina
+    em 304 sem carregar nem serializar o grafo.
+    """
+    def dependencia(request: Request, response: Response, db: Session = Depends(database.get_read_db)):
+        verificar_etag(request, response, versoes.etag(prefixo, versoes.atual(db), versoes.recurso(request)))
+    return dependencia
+
+def validar_filtros(filtros: schemas.FiltroFazendas) -> schemas.FiltroFazendas:
+    if filtros.area_min is not None and filtros.area_max is not None and filtros.area_min > filtros.area_max:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="area_min não pode ser maior que area_max"
+        )
+    return filtros
+
+def projetar(schema):
+    """Dependência dos parâmetros fields= e expand= (projecao.py)"""
+    def dependencia(
+        fields: Optional[str] = Query(None, description="Campos da resposta, ex.: id,nome ou fazendas.nome"),
+        expand: Optional[str] = Query(None, description="Relações incluídas, ex.: fazendas,fazendas.culturas"),
+    ) -> Optional[projecao.Projecao]:
+        try:
+            return projecao.ler(schema, fields, expand)
+        except projecao.ProjecaoInvalida as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    return dependencia
+
+@router.get("/produtores/", response_model=List[schemas.Produtor], dependencies=[Depends(condicional("produtores"))])
+def read_produtores(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    filtros: schemas.FiltroFazendas = Depends(),
+    selecao: Optional[projecao.Projecao] = Depends(projetar(schemas.Produtor)),
+    db: Session = Depends(database.get_read_db)
+):
+    """Listar todos os produtores rurais
+
+    Aceita paginação por skip/limit ou por cursor; o cursor da próxima página
+    é devolvido no cabeçalho X-Next-Cursor. Com filtros (estado, cidade,
+    cultura, safra, area_min, area_max), retorna os produtores que têm ao
+    menos uma fazenda que atende a todos eles. fields e expand limitam os
+    campos e as relações da resposta.
+    """
+    logger.info("Recebida requisição para listar produtores - skip: %s, limit: %s, cursor: %s", skip, limit, cursor)
+    produtores = crud.get_produtores(
+        db, skip=skip, limit=limit, after_id=resolver_cursor(cursor), filtros=validar_filtros(filtros),
+        projecao=selecao
+    )
+    proximo = pagination.next_cursor(produtores, limit)
+    if proximo:
+        response.headers["X-Next-Cursor"] = proximo
+    return respostas.responder(schemas.Produtor, produtores, response, selecao)
+
+@router.get("/produtores/{produtor_id}", response_model=schemas.Produtor, dependencies=[Depends(condicional("produtor"))])
+def read_produtor(
+    produtor_id: int,
+    response: Response,
+    selecao: Optional[projecao.Projecao] = Depends(projetar(schemas.Produtor)),
+    db: Session = Depends(database.get_read_db)
+):
     """Buscar um produtor específico por ID"""
-    logger.info(f"Recebida requisição para buscar produtor ID: {produtor_id}")
-    db_produtor = crud.get_produtor(db, produtor_id=produtor_id)
+    logger.info("Recebida requisição para buscar produtor ID: %s", produtor_id)
+    db_produtor = crud.get_produtor(db, produtor_id=produtor_id, projecao=selecao)
     if db_produtor is None:
-        logger.warning(f"Produtor não encontrado. ID: {produtor_id}")
+        logger.warning("Produtor não encontrado. ID: %s", produtor_id)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Produtor não encontrado"
         )
-    return db_produtor
+    return respostas.responder(schemas.Produtor, db_produtor, response, selecao)
 
 @router.put("/produtores/{produtor_id}", response_model=schemas.Produtor)
 def update_produtor(produtor_id: int, produtor: schemas.ProdutorCreate, db: Session = Depends(database.get_db)):
     """Atualizar um produtor existente"""
-    logger.info(f"Recebida requisição para atualizar produtor ID: {produtor_id}")
+    logger.info("Recebida requisição para atualizar produtor ID: %s", produtor_id)
     db_produtor = crud.update_produtor(db, produtor_id=produtor_id, produtor=produtor)
     if db_produtor is None:
-        logger.warning(f"Produtor não encontrado para atualização. ID: {produtor_id}")
+        logger.warning("Produtor não encontrado para atualização. ID: %s", produtor_id)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Produtor não encontrado"
@@ -59,10 +167,10 @@ def update_produtor(produtor_id: int, produtor: schemas.ProdutorCreate, db: Sess
 @router.delete("/produtores/{produtor_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_produtor(produtor_id: int, db: Session = Depends(database.get_db)):
     """Deletar um produtor"""
-    logger.info(f"Recebida requisição para deletar produtor ID: {produtor_id}")
+    logger.info("Recebida requisição para deletar produtor ID: %s", produtor_id)
     success = crud.delete_produtor(db, produtor_id=produtor_id)
     if not success:
-        logger.warning(f"Produtor não encontrado para deleção. ID: {produtor_id}")
+        logger.warning("Produtor não encontrado para deleção. ID: %s", produtor_id)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Produtor não encontrado"
@@ -71,11 +179,10 @@ def delete_produtor(produtor_id: int, db: Session = Depends(database.get_db)):
 @router.post("/produtores/{produtor_id}/fazendas/", response_model=schemas.Fazenda, status_code=status.HTTP_201_CREATED)
 def create_fazenda(produtor_id: int, fazenda: schemas.FazendaCreate, db: Session = Depends(database.get_db)):
     """Criar uma nova fazenda para um produtor"""
-    logger.info(f"Recebida requisição para criar fazenda para produtor ID: {produtor_id}")
+    logger.info("Recebida requisição para criar fazenda para produtor ID: %s", produtor_id)
     
-    db_produtor = crud.get_produtor(db, produtor_id=produtor_id)
-    if not db_produtor:
-        logger.warning(f"Produtor não encontrado para criar fazenda. ID: {produtor_id}")
+    if not crud.produtor_existe(db, produtor_id=produtor_id):
+        logger.warning("Produtor não encontrado para criar fazenda. ID: %s", produtor_id)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Produtor não encontrado"
@@ -83,49 +190,76 @@ def create_fazenda(produtor_id: int, fazenda: schemas.FazendaCreate, db: Session
     
     return crud.create_fazenda(db=db, fazenda=fazenda, produtor_id=produtor_id)
 
-@router.get("/produtores/{produtor_id}/fazendas/", response_model=List[schemas.Fazenda])
-def read_fazendas_by_produtor(produtor_id: int, db: Session = Depends(database.get_db)):
+@router.get("/produtores/{produtor_id}/fazendas/", response_model=List[schemas.Fazenda], dependencies=[Depends(condicional("fazendas-produtor"))])
+def read_fazendas_by_produtor(
+    produtor_id: int,
+    response: Response,
+    selecao: Optional[projecao.Projecao] = Depends(projetar(schemas.Fazenda)),
+    db: Session = Depends(database.get_read_db)
+):
     """Listar todas as fazendas de um produtor"""
-    logger.info(f"Recebida requisição para listar fazendas do produtor ID: {produtor_id}")
+    logger.info("Recebida requisição para listar fazendas do produtor ID: %s", produtor_id)
     
-    db_produtor = crud.get_produtor(db, produtor_id=produtor_id)
-    if not db_produtor:
-        logger.warning(f"Produtor não encontrado. ID: {produtor_id}")
+    if not crud.produtor_existe(db, produtor_id=produtor_id):
+        logger.warning("Produtor não encontrado. ID: %s", produtor_id)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Produtor não encontrado"
         )
     
-    fazendas = crud.get_fazendas_by_produtor(db, produtor_id=produtor_id)
-    return fazendas
-
-@router.get("/fazendas/", response_model=List[schemas.Fazenda])
-def read_fazendas(skip: int = 0, limit: int = 100, db: Session = Depends(database.get_db)):
-    """Listar todas as fazendas"""
-    logger.info(f"Recebida requisição para listar fazendas - skip: {skip}, limit: {limit}")
-    fazendas = crud.get_fazendas(db, skip=skip, limit=limit)
-    return fazendas
-
-@router.get("/fazendas/{fazenda_id}", response_model=schemas.Fazenda)
-def read_fazenda(fazenda_id: int, db: Session = Depends(database.get_db)):
+    fazendas = crud.get_fazendas_by_produtor(db, produtor_id=produtor_id, projecao=selecao)
+    return respostas.responder(schemas.Fazenda, fazendas, response, selecao)
+
+@router.get("/fazendas/", response_model=List[schemas.Fazenda], dependencies=[Depends(condicional("fazendas"))])
+def read_fazendas(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    filtros: schemas.FiltroFazendas = Depends(),
+    selecao: Optional[projecao.Projecao] = Depends(projetar(schemas.Fazenda)),
+    db: Session = Depends(database.get_read_db)
+):
+    """Listar todas as fazendas
+
+    Aceita paginação por skip/limit ou por cursor (cabeçalho X-Next-Cursor)
+    e filtros por estado, cidade, cultura, safra, area_min e area_max.
+    """
+    logger.info("Recebida requisição para listar fazendas - skip: %s, limit: %s, cursor: %s", skip, limit, cursor)
+    fazendas = crud.get_fazendas(
+        db, skip=skip, limit=limit, after_id=resolver_cursor(cursor), filtros=validar_filtros(filtros),
+        projecao=selecao
+    )
+    proximo = pagination.next_cursor(fazendas, limit)
+    if proximo:
+        response.headers["X-Next-Cursor"] = proximo
+    return respostas.responder(schemas.Fazenda, fazendas, response, selecao)
+
+@router.get("/fazendas/{fazenda_id}", response_model=schemas.Fazenda, dependencies=[Depends(condicional("fazenda"))])
+def read_fazenda(
+    fazenda_id: int,
+    response: Response,
+    selecao: Optional[projecao.Projecao] = Depends(projetar(schemas.Fazenda)),
+    db: Session = Depends(database.get_read_db)
+):
     """Buscar uma fazenda específica por ID"""
-    logger.info(f"Recebida requisição para buscar fazenda ID: {fazenda_id}")
-    db_fazenda = crud.get_fazenda(db, fazenda_id=fazenda_id)
+    logger.info("Recebida requisição para buscar fazenda ID: %s", fazenda_id)
+    db_fazenda = crud.get_fazenda(db, fazenda_id=fazenda_id, projecao=selecao)
     if db_fazenda is None:
-        logger.warning(f"Fazenda não encontrada. ID: {fazenda_id}")
+        logger.warning("Fazenda não encontrada. ID: %s", fazenda_id)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Fazenda não encontrada"
         )
-    return db_fazenda
+    return respostas.responder(schemas.Fazenda, db_fazenda, response, selecao)
 
 @router.put("/fazendas/{fazenda_id}", response_model=schemas.Fazenda)
 def update_fazenda(fazenda_id: int, fazenda: schemas.FazendaUpdate, db: Session = Depends(database.get_db)):
     """Atualizar uma fazenda existente"""
-    logger.info(f"Recebida requisição para atualizar fazenda ID: {fazenda_id}")
+    logger.info("Recebida requisição para atualizar fazenda ID: %s", fazenda_id)
     db_fazenda = crud.update_fazenda(db, fazenda_id=fazenda_id, fazenda=fazenda)
     if db_fazenda is None:
-        logger.warning(f"Fazenda não encontrada para atualização. ID: {fazenda_id}")
+        logger.warning("Fazenda não encontrada para atualização. ID: %s", fazenda_id)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Fazenda não encontrada"
@@ -135,10 +269,10 @@ def update_fazenda(fazenda_id: int, fazenda: schemas.FazendaUpdate, db: Session
 @router.delete("/fazendas/{fazenda_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_fazenda(fazenda_id: int, db: Session = Depends(database.get_db)):
     """Deletar uma fazenda"""
-    logger.info(f"Recebida requisição para deletar fazenda ID: {fazenda_id}")
+    logger.info("Recebida requisição para deletar fazenda ID: %s", fazenda_id)
     success = crud.delete_fazenda(db, fazenda_id=fazenda_id)
     if not success:
-        logger.warning(f"Fazenda não encontrada para deleção. ID: {fazenda_id}")
+        logger.warning("Fazenda não encontrada para deleção. ID: %s", fazenda_id)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Fazenda não encontrada"
@@ -148,11 +282,10 @@ def delete_fazenda(fazenda_id: int, db: Session = Depends(database.get_db)):
 @router.post("/fazendas/{fazenda_id}/culturas/", response_model=schemas.Cultura, status_code=status.HTTP_201_CREATED)
 def create_cultura(fazenda_id: int, cultura: schemas.CulturaCreate, db: Session = Depends(database.get_db)):
     """Criar uma nova cultura para uma fazenda"""
-    logger.info(f"Recebida requisição para criar cultura para fazenda ID: {fazenda_id}")
+    logger.info("Recebida requisição para criar cultura para fazenda ID: %s", fazenda_id)
     
-    db_fazenda = crud.get_fazenda(db, fazenda_id=fazenda_id)
-    if not db_fazenda:
-        logger.warning(f"Fazenda não encontrada para criar cultura. ID: {fazenda_id}")
+    if not crud.fazenda_existe(db, fazenda_id=fazenda_id):
+        logger.warning("Fazenda não encontrada para criar cultura. ID: %s", fazenda_id)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Fazenda não encontrada"
@@ -160,36 +293,121 @@ def create_cultura(fazenda_id: int, cultura: schemas.CulturaCreate, db: Session
     
     return crud.create_cultura(db=db, cultura=cultura, fazenda_id=fazenda_id)
 
-@router.get("/fazendas/{fazenda_id}/culturas/", response_model=List[schemas.Cultura])
-def read_culturas_by_fazenda(fazenda_id: int, db: Session = Depends(database.get_db)):
+@router.get("/fazendas/{fazenda_id}/culturas/", response_model=List[schemas.Cultura], dependencies=[Depends(condicional("culturas"))])
+def read_culturas_by_fazenda(fazenda_id: int, response: Response, db: Session = Depends(database.get_read_db)):
     """Listar todas as culturas de uma fazenda"""
-    logger.info(f"Recebida requisição para listar culturas da fazenda ID: {fazenda_id}")
+    logger.info("Recebida requisição para listar culturas da fazenda ID: %s", fazenda_id)
     
-    db_fazenda = crud.get_fazenda(db, fazenda_id=fazenda_id)
-    if not db_fazenda:
-        logger.warning(f"Fazenda não encontrada. ID: {fazenda_id}")
+    if not crud.fazenda_existe(db, fazenda_id=fazenda_id):
+        logger.warning("Fazenda não encontrada. ID: %s", fazenda_id)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Fazenda não encontrada"
         )
     
     culturas = crud.get_culturas_by_fazenda(db, fazenda_id=fazenda_id)
-    return culturas
+    return respostas.responder(schemas.Cultura, culturas, response)
 
 @router.delete("/culturas/{cultura_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_cultura(cultura_id: int, db: Session = Depends(database.get_db)):
     """Deletar uma cultura"""
-    logger.info(f"Recebida requisição para deletar cultura ID: {cultura_id}")
+    logger.info("Recebida requisição para deletar cultura ID: %s", cultura_id)
     success = crud.delete_cultura(db, cultura_id=cultura_id)
     if not success:
-        logger.warning(f"Cultura não encontrada para deleção. ID: {cultura_id}")
+        logger.warning("Cultura não encontrada para deleção. ID: %s", cultura_id)
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Cultura não encontrada"
         )
 
+def resolver_cursor_busca(cursor: Optional[str]):
+    if cursor is None:
+        return None
+    try:
+        apos = pagination.decode_cursor_relevancia(cursor)
+    except pagination.CursorInvalido:
+        apos = None
+    if apos is None or apos[1] not in busca.TIPOS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor inválido"
+        )
+    return apos
+
+@router.get("/busca/", response_model=List[schemas.ResultadoBusca])
+def buscar(
+    response: Response,
+    q: str = Query(..., min_length=3, max_length=100),
+    tipo: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: Session = Depends(database.get_read_db)
+):
+    """Buscar produtores por nome e fazendas por nome ou cidade
+
+    Ignora acentos e caixa e aceita trechos e erros de digitação. Os
+    resultados vêm do mais para o menos relevante; o cursor da próxima página
+    é devolvido no cabeçalho X-Next-Cursor.
+    """
+    logger.info("Recebida requisição de busca - tipo: %s, limit: %s", tipo, limit)
+    if tipo is not None and tipo not in busca.TIPOS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Tipo inválido. Use: {', '.join(busca.TIPOS)}"
+        )
+    tipos = (tipo,) if tipo else busca.TIPOS
+    resultados = busca.buscar(db, q, tipos=tipos, limit=limit, apos=resolver_cursor_busca(cursor))
+    if len(resultados) == limit:
+        ultimo = resultados[-1]
+        response.headers["X-Next-Cursor"] = pagination.encode_cursor_relevancia(
+            ultimo["relevancia"], ultimo["tipo"], ultimo["id"]
+        )
+    return resultados
+
+@router.get("/export/{entidade}")
+def export_entidade(entidade: str, formato: str = export.FORMATO_NDJSON, db: Session = Depends(database.get_read_db)):
+    """Exportar produtores, fazendas ou culturas em NDJSON ou CSV
+
+    A resposta é enviada em streaming a partir de um cursor do servidor.
+    """
+    logger.info("Recebida requisição para exportar %s - formato: %s", entidade, formato)
+    if entidade not in export.TABELAS:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Entidade não encontrada"
+        )
+    if formato not in export.MEDIA_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Formato deve ser ndjson ou csv"
+        )
+    return StreamingResponse(
+        export.iter_export(db, entidade, formato),
+        media_type=export.MEDIA_TYPES[formato],
+        headers={"Content-Disposition": f'attachment; filename="{entidade}.{formato}"'}
+    )
+
 @router.get("/dashboard/", response_model=schemas.DashboardStats)
-def get_dashboard_stats(db: Session = Depends(database.get_db)):
-    """Obter estatísticas do dashboard"""
+def get_dashboard_stats(
+    request: Request,
+    response: Response,
+    db: Session = Depends(database.get_read_db),
+    primario: Session = Depends(database.get_db)
+):
+    """Obter estatísticas do dashboard
+
+    O ETag vem do conteúdo: um cache hit responde 304 sem consultar o banco.
+    Depois de uma escrita, o cache é recalculado no primário.
+    """
     logger.info("Recebida requisição para obter estatísticas do dashboard")
-    return crud.get_dashboard_stats(db) 
\ No newline at end of file
+    stats = cache.dashboard_cache.get(
+        lambda: crud.get_dashboard_stats(db),
+        loader_primario=lambda: crud.get_dashboard_stats(primario),
+    )
+    verificar_etag(request, response, versoes.etag_conteudo("dashboard", stats))
+    return stats
+
+@router.get("/dashboard/cache/", response_model=schemas.DashboardCacheStats)
+def get_dashboard_cache_stats():
+    """Obter contadores do cache do dashboard (hits, misses e geração)"""
+    return cache.dashboard_cache.stats() 
\ No newline at end of file
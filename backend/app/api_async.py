@@ -0,0 +1,250 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+import logging
+from . import crud_async, schemas, database, pagination, versoes, respostas, projecao
+from .api import projetar, resolver_cursor, validar_filtros, verificar_etag
+
+logger = logging.getLogger(__name__)
+
+# Registrado antes de api.router quando DB_ASYNC=true: as rotas abaixo atendem
+# os mesmos caminhos com async def; as demais (importação, exportação) seguem
+# no router síncrono
+router = APIRouter(generate_unique_id_function=lambda route: f"{route.name}_async")
+
+def condicional(prefixo: str):
+    """Versão assíncrona de api.condicional"""
+    async def dependencia(request: Request, response: Response, db: AsyncSession = Depends(database.get_async_read_db)):
+        verificar_etag(request, response, versoes.etag(prefixo, await crud_async.versao_dados(db), versoes.recurso(request)))
+    return dependencia
+
+@router.post("/produtores/", response_model=schemas.Produtor, status_code=status.HTTP_201_CREATED)
+async def create_produtor(produtor: schemas.ProdutorCreate, db: AsyncSession = Depends(database.get_async_db)):
+    """Criar um novo produtor rural"""
+    logger.info("Recebida requisição para criar produtor: %s", produtor.nome)
+
+    db_produtor = await crud_async.get_produtor_by_cpf_cnpj(db, cpf_cnpj=produtor.cpf_cnpj)
+    if db_produtor:
+        logger.warning("Tentativa de criar produtor com CPF/CNPJ já existente: %s", produtor.cpf_cnpj)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="CPF/CNPJ já cadastrado"
+        )
+
+    return await crud_async.create_produtor(db=db, produtor=produtor)
+
+@router.get("/produtores/", response_model=List[schemas.Produtor], dependencies=[Depends(condicional("produtores"))])
+async def read_produtores(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    filtros: schemas.FiltroFazendas = Depends(),
+    selecao: Optional[projecao.Projecao] = Depends(projetar(schemas.Produtor)),
+    db: AsyncSession = Depends(database.get_async_read_db)
+):
+    """Listar todos os produtores rurais"""
+    logger.info("Recebida requisição para listar produtores - skip: %s, limit: %s, cursor: %s", skip, limit, cursor)
+    produtores = await crud_async.get_produtores(
+        db, skip=skip, limit=limit, after_id=resolver_cursor(cursor), filtros=validar_filtros(filtros),
+        projecao=selecao
+    )
+    proximo = pagination.next_cursor(produtores, limit)
+    if proximo:
+        response.headers["X-Next-Cursor"] = proximo
+    return respostas.responder(schemas.Produtor, produtores, response, selecao)
+
+@router.get("/produtores/{produtor_id}", response_model=schemas.Produtor, dependencies=[Depends(condicional("produtor"))])
+async def read_produtor(
+    produtor_id: int,
+    response: Response,
+    selecao: Optional[projecao.Projecao] = Depends(projetar(schemas.Produtor)),
+    db: AsyncSession = Depends(database.get_async_read_db)
+):
+    """Buscar um produtor específico por ID"""
+    logger.info("Recebida requisição para buscar produtor ID: %s", produtor_id)
+    db_produtor = await crud_async.get_produtor(db, produtor_id=produtor_id, projecao=selecao)
+    if db_produtor is None:
+        logger.warning("Produtor não encontrado. ID: %s", produtor_id)
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Produtor não encontrado"
+        )
+    return respostas.responder(schemas.Produtor, db_produtor, response, selecao)
+
+@router.put("/produtores/{produtor_id}", response_model=schemas.Produtor)
+async def update_produtor(produtor_id: int, produtor: schemas.ProdutorCreate, db: AsyncSession = Depends(database.get_async_db)):
+    """Atualizar um produtor existente"""
+    logger.info("Recebida requisição para atualizar produtor ID: %s", produtor_id)
+    db_produtor = await crud_async.update_produtor(db, produtor_id=produtor_id, produtor=produtor)
+    if db_produtor is None:
+        logger.warning("Produtor não encontrado para atualização. ID: %s", produtor_id)
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Produtor não encontrado"
+        )
+    return db_produtor
+
+@router.delete("/produtores/{produtor_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_produtor(produtor_id: int, db: AsyncSession = Depends(database.get_async_db)):
+    """Deletar um produtor"""
+    logger.info("Recebida requisição para deletar produtor ID: %s", produtor_id)
+    success = await crud_async.delete_produtor(db, produtor_id=produtor_id)
+    if not success:
+        logger.warning("Produtor não encontrado para deleção. ID: %s", produtor_id)
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Produtor não encontrado"
+        )
+
+@router.post("/produtores/{produtor_id}/fazendas/", response_model=schemas.Fazenda, status_code=status.HTTP_201_CREATED)
+async def create_fazenda(produtor_id: int, fazenda: schemas.FazendaCreate, db: AsyncSession = Depends(database.get_async_db)):
+    """Criar uma nova fazenda para um produtor"""
+    logger.info("Recebida requisição para criar fazenda para produtor ID: %s", produtor_id)
+
+    if not await crud_async.produtor_existe(db, produtor_id=produtor_id):
+        logger.warning("Produtor não encontrado para criar fazenda. ID: %s", produtor_id)
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Produtor não encontrado"
+        )
+
+    return await crud_async.create_fazenda(db=db, fazenda=fazenda, produtor_id=produtor_id)
+
+@router.get("/produtores/{produtor_id}/fazendas/", response_model=List[schemas.Fazenda], dependencies=[Depends(condicional("fazendas-produtor"))])
+async def read_fazendas_by_produtor(
+    produtor_id: int,
+    response: Response,
+    selecao: Optional[projecao.Projecao] = Depends(projetar(schemas.Fazenda)),
+    db: AsyncSession = Depends(database.get_async_read_db)
+):
+    """Listar todas as fazendas de um produtor"""
+    logger.info("Recebida requisição para listar fazendas do produtor ID: %s", produtor_id)
+
+    if not await crud_async.produtor_existe(db, produtor_id=produtor_id):
+        logger.warning("Produtor não encontrado. ID: %s", produtor_id)
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Produtor não encontrado"
+        )
+
+    fazendas = await crud_async.get_fazendas_by_produtor(db, produtor_id=produtor_id, projecao=selecao)
+    return respostas.responder(schemas.Fazenda, fazendas, response, selecao)
+
+@router.get("/fazendas/", response_model=List[schemas.Fazenda], dependencies=[Depends(condicional("fazendas"))])
+async def read_fazendas(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    filtros: schemas.FiltroFazendas = Depends(),
+    selecao: Optional[projecao.Projecao] = Depends(projetar(schemas.Fazenda)),
+    db: AsyncSession = Depends(database.get_async_read_db)
+):
+    """Listar todas as fazendas"""
+    logger.info("Recebida requisição para listar fazendas - skip: %s, limit: %s, cursor: %s", skip, limit, cursor)
+    fazendas = await crud_async.get_fazendas(
+        db, skip=skip, limit=limit, after_id=resolver_cursor(cursor), filtros=validar_filtros(filtros),
+        projecao=selecao
+    )
+    proximo = pagination.next_cursor(fazendas, limit)
+    if proximo:
+        response.headers["X-Next-Cursor"] = proximo
+    return respostas.responder(schemas.Fazenda, fazendas, response, selecao)
+
+@router.get("/fazendas/{fazenda_id}", response_model=schemas.Fazenda, dependencies=[Depends(condicional("fazenda"))])
+async def read_fazenda(
+    fazenda_id: int,
+    response: Response,
+    selecao: Optional[projecao.Projecao] = Depends(projetar(schemas.Fazenda)),
+    db: AsyncSession = Depends(database.get_async_read_db)
+):
+    """Buscar uma fazenda específica por ID"""
+    logger.info("Recebida requisição para buscar fazenda ID: %s", fazenda_id)
+    db_fazenda = await crud_async.get_fazenda(db, fazenda_id=fazenda_id, projecao=selecao)
+    if db_fazenda is None:
+        logger.warning("Fazenda não encontrada. ID: %s", fazenda_id)
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Fazenda não encontrada"
+        )
+    return respostas.responder(schemas.Fazenda, db_fazenda, response, selecao)
+
+@router.put("/fazendas/{fazenda_id}", response_model=schemas.Fazenda)
+async def update_fazenda(fazenda_id: int, fazenda: schemas.FazendaUpdate, db: AsyncSession = Depends(database.get_async_db)):
+    """Atualizar uma fazenda existente"""
+    logger.info("Recebida requisição para atualizar fazenda ID: %s", fazenda_id)
+    db_fazenda = await crud_async.update_fazenda(db, fazenda_id=fazenda_id, fazenda=fazenda)
+    if db_fazenda is None:
+        logger.warning("Fazenda não encontrada para atualização. ID: %s", fazenda_id)
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Fazenda não encontrada"
+        )
+    return db_fazenda
+
+@router.delete("/fazendas/{fazenda_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_fazenda(fazenda_id: int, db: AsyncSession = Depends(database.get_async_db)):
+    """Deletar uma fazenda"""
+    logger.info("Recebida requisição para deletar fazenda ID: %s", fazenda_id)
+    success = await crud_async.delete_fazenda(db, fazenda_id=fazenda_id)
+    if not success:
+        logger.warning("Fazenda não encontrada para deleção. ID: %s", fazenda_id)
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Fazenda não encontrada"
+        )
+
+@router.post("/fazendas/{fazenda_id}/culturas/", response_model=schemas.Cultura, status_code=status.HTTP_201_CREATED)
+async def create_cultura(fazenda_id: int, cultura: schemas.CulturaCreate, db: AsyncSession = Depends(database.get_async_db)):
+    """Criar uma nova cultura para uma fazenda"""
+    logger.info("Recebida requisição para criar cultura para fazenda ID: %s", fazenda_id)
+
+    if not await crud_async.fazenda_existe(db, fazenda_id=fazenda_id):
+        logger.warning("Fazenda não encontrada para criar cultura. ID: %s", fazenda_id)
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Fazenda não encontrada"
+        )
+
+    return await crud_async.create_cultura(db=db, cultura=cultura, fazenda_id=fazenda_id)
+
+@router.get("/fazendas/{fazenda_id}/culturas/", response_model=List[schemas.Cultura], dependencies=[Depends(condicional("culturas"))])
+async def read_culturas_by_fazenda(fazenda_id: int, response: Response, db: AsyncSession = Depends(database.get_async_read_db)):
+    """Listar todas as culturas de uma fazenda"""
+    logger.info("Recebida requisição para listar culturas da fazenda ID: %s", fazenda_id)
+
+    if not await crud_async.fazenda_existe(db, fazenda_id=fazenda_id):
+        logger.warning("Fazenda não encontrada. ID: %s", fazenda_id)
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Fazenda não encontrada"
+        )
+
+    culturas = await crud_async.get_culturas_by_fazenda(db, fazenda_id=fazenda_id)
+    return respostas.responder(schemas.Cultura, culturas, response)
+
+@router.delete("/culturas/{cultura_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_cultura(cultura_id: int, db: AsyncSession = Depends(database.get_async_db)):
+    """Deletar uma cultura"""
+    logger.info("Recebida requisição para deletar cultura ID: %s", cultura_id)
+    success = await crud_async.delete_cultura(db, cultura_id=cultura_id)
+    if not success:
+        logger.warning("Cultura não encontrada para deleção. ID: %s", cultura_id)
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Cultura não encontrada"
+        )
+
+@router.get("/dashboard/", response_model=schemas.DashboardStats)
+async def get_dashboard_stats(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(database.get_async_read_db),
+    primario: AsyncSession = Depends(database.get_async_db)
+):
+    """Obter estatísticas do dashboard"""
+    logger.info("Recebida requisição para obter estatísticas do dashboard")
+    stats = await crud_async.get_dashboard_stats_cached(db, primario)
+    verificar_etag(request, response, versoes.etag_conteudo("dashboard", stats))
+    return stats
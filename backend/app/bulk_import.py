@@ -0,0 +1,284 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from pydantic import ValidationError
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import codecs
+import csv
+import json
+import logging
+from . import models, schemas, crud, rollup, cache
+
+logger = logging.getLogger(__name__)
+
+# Quantidade de produtores acumulados antes de cada gravação em lote
+TAMANHO_LOTE = 1000
+# Limite de erros detalhados na resposta; o total continua sendo contado
+MAX_ERROS_DETALHADOS = 1000
+
+FORMATO_CSV = "csv"
+FORMATO_NDJSON = "ndjson"
+
+class ErroFormato(ValueError):
+    pass
+
+def detectar_formato(content_type: Optional[str], formato: Optional[str]) -> str:
+    if formato:
+        formato = formato.lower()
+        if formato in (FORMATO_CSV, FORMATO_NDJSON):
+            return formato
+        raise ErroFormato(f"Formato não suportado: {formato}")
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if content_type in ("text/csv", "application/csv"):
+        return FORMATO_CSV
+    if content_type in ("application/x-ndjson", "application/ndjson", "application/jsonl", "application/json-lines"):
+        return FORMATO_NDJSON
+    raise ErroFormato("Informe o formato (csv ou ndjson) pelo Content-Type ou pelo parâmetro formato")
+
+def _float_ou_texto(valor: str):
+    try:
+        return float(valor)
+    except ValueError:
+        return valor
+
+class AgrupadorCSV:
+    """Monta produtores aninhados a partir de linhas CSV achatadas.
+
+    Colunas: cpf_cnpj, nome, fazenda_nome, fazenda_cidade, fazenda_estado,
+    area_total, area_agricultavel, area_vegetacao, cultura_nome, cultura_safra.
+    Linhas consecutivas com o mesmo cpf_cnpj formam um produtor; dentro dele,
+    linhas consecutivas com a mesma fazenda formam uma fazenda e cada linha
+    pode trazer uma cultura. Campos com quebra de linha não são suportados.
+    """
+
+    def __init__(self):
+        self.colunas: Optional[List[str]] = None
+        self._linha_inicial = 0
+        self._atual: Optional[Dict[str, Any]] = None
+        self._chave_fazenda = None
+
+    def adicionar(self, numero: int, linha: str) -> Iterator[Tuple[int, Any]]:
+        valores = next(csv.reader([linha]))
+        if self.colunas is None:
+            self.colunas = [c.strip() for c in valores]
+            faltando = [c for c in ("cpf_cnpj", "nome") if c not in self.colunas]
+            if faltando:
+                raise ErroFormato(f"Cabeçalho CSV sem as colunas: {', '.join(faltando)}")
+            return
+        if len(valores) != len(self.colunas):
+            yield numero, ErroFormato(f"Esperadas {len(self.colunas)} colunas, encontradas {len(valores)}")
+            return
+        campos = {c: v.strip() for c, v in zip(self.colunas, valores)}
+
+        if self._atual is None or campos["cpf_cnpj"] != self._atual["cpf_cnpj"]:
+            if self._atual is not None:
+                yield self._linha_inicial, self._atual
+            self._linha_inicial = numero
+            self._atual = {"cpf_cnpj": campos["cpf_cnpj"], "nome": campos["nome"], "fazendas": []}
+            self._chave_fazenda = None
+
+        if campos.get("fazenda_nome"):
+            chave = (campos["fazenda_nome"], campos.get("fazenda_cidade"), campos.get("fazenda_estado"))
+            if chave != self._chave_fazenda:
+                self._atual["fazendas"].append({
+                    "nome": campos["fazenda_nome"],
+                    "cidade": campos.get("fazenda_cidade", ""),
+                    "estado": campos.get("fazenda_estado", ""),
+                    "area_total": _float_ou_texto(campos.get("area_total", "")),
+                    "area_agricultavel": _float_ou_texto(campos.get("area_agricultavel", "")),
+                    "area_vegetacao": _float_ou_texto(campos.get("area_vegetacao", "")),
+                    "culturas": [],
+                })
+                self._chave_fazenda = chave
+            if campos.get("cultura_nome"):
+                self._atual["fazendas"][-1]["culturas"].append({
+                    "nome": campos["cultura_nome"],
+                    "safra": campos.get("cultura_safra", ""),
+                })
+
+    def finalizar(self) -> Iterator[Tuple[int, Any]]:
+        if self._atual is not None:
+            yield self._linha_inicial, self._atual
+            self._atual = None
+
+class Leitor:
+    """Produz (número da linha, registro) para cada produtor à medida que o corpo chega.
+
+    O corpo é decodificado e quebrado em linhas chunk a chunk, sem ser
+    carregado inteiro em memória. Linhas que não puderam ser interpretadas
+    chegam como exceção no lugar do registro, para virarem erro daquela linha
+    sem interromper o arquivo. É síncrono: a rota o consome em uma thread do
+    pool, junto com a validação e a gravação dos lotes.
+    """
+
+    def __init__(self, formato: str):
+        self._decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self._resto = ""
+        self._numero = 0
+        self._agrupador = AgrupadorCSV() if formato == FORMATO_CSV else None
+
+    def alimentar(self, chunk: bytes) -> Iterator[Tuple[int, Any]]:
+        linhas = (self._resto + self._decoder.decode(chunk)).split("\n")
+        self._resto = linhas.pop()
+        for linha in linhas:
+            yield from self._registros(linha.rstrip("\r"))
+
+    def finalizar(self) -> Iterator[Tuple[int, Any]]:
+        resto = self._resto + self._decoder.decode(b"", final=True)
+        self._resto = ""
+        if resto:
+            yield from self._registros(resto.rstrip("\r"))
+        if self._agrupador is not None:
+            yield from self._agrupador.finalizar()
+
+    def _registros(self, linha: str) -> Iterator[Tuple[int, Any]]:
+        self._numero += 1
+        numero = self._numero
+        if not linha.strip():
+            return
+        if self._agrupador is not None:
+            try:
+                yield from self._agrupador.adicionar(numero, linha)
+            except csv.Error as exc:
+                yield numero, exc
+            return
+        try:
+            yield numero, json.loads(linha)
+        except json.JSONDecodeError as exc:
+            yield numero, ErroFormato(f"JSON inválido: {exc.msg}")
+
+def _mensagem_validacao(exc: ValidationError) -> str:
+    partes = []
+    for erro in exc.errors():
+        local = ".".join(str(p) for p in erro["loc"])
+        partes.append(f"{local}: {erro['msg']}" if local else erro["msg"])
+    return "; ".join(partes)
+
+class Importador:
+    """Valida produtores e os grava em lotes com INSERT multi-linha"""
+
+    def __init__(self, db: Session, tamanho_lote: int = TAMANHO_LOTE):
+        self.db = db
+        self.tamanho_lote = tamanho_lote
+        self.importados = 0
+        self.total_erros = 0
+        self.erros: List[Dict[str, Any]] = []
+        self._lote: List[Tuple[int, schemas.ProdutorCreate]] = []
+        self._cpfs_lote = set()
+
+    @property
+    def lote_cheio(self) -> bool:
+        return len(self._lote) >= self.tamanho_lote
+
+    def _registrar_erro(self, linha: int, mensagem: str):
+        self.total_erros += 1
+        if len(self.erros) < MAX_ERROS_DETALHADOS:
+            self.erros.append({"linha": linha, "erro": mensagem})
+
+    def adicionar(self, linha: int, registro: Any):
+        if isinstance(registro, Exception):
+            self._registrar_erro(linha, str(registro))
+            return
+        try:
+            produtor = schemas.ProdutorCreate.model_validate(registro)
+        except ValidationError as exc:
+            self._registrar_erro(linha, _mensagem_validacao(exc))
+            return
+        if produtor.cpf_cnpj in self._cpfs_lote:
+            self._registrar_erro(linha, "CPF/CNPJ duplicado no arquivo")
+            return
+        self._cpfs_lote.add(produtor.cpf_cnpj)
+        self._lote.append((linha, produtor))
+
+    def processar(self, registros: Iterable[Tuple[int, Any]]):
+        """Valida os registros e grava cada lote que encher"""
+        for linha, registro in registros:
+            self.adicionar(linha, registro)
+            if self.lote_cheio:
+                self.gravar_lote()
+
+    def _existentes(self, cpfs: List[str]) -> set:
+        return {
+            cpf for (cpf,) in self.db.query(models.Produtor.cpf_cnpj)
+            .filter(models.Produtor.cpf_cnpj.in_(cpfs))
+        }
+
+    def _inserir(self, produtores: List[schemas.ProdutorCreate]) -> Tuple[int, int]:
+        """Insere produtores, fazendas e culturas e soma o rollup, sem commit.
+
+        Retorna a quantidade de fazendas e de culturas inseridas.
+        """
+        db = self.db
+        produtor_ids = db.scalars(
+            insert(models.Produtor).returning(models.Produtor.id, sort_by_parameter_order=True),
+            [{"cpf_cnpj": p.cpf_cnpj, "nome": p.nome} for p in produtores]
+        ).all()
+
+        fazendas = [
+            (produtor_id, fazenda)
+            for produtor_id, produtor in zip(produtor_ids, produtores)
+            for fazenda in produtor.fazendas or []
+        ]
+        crud.inserir_fazendas_em_lote(db, fazendas)
+        culturas = [c.nome for _, f in fazendas for c in f.culturas or []]
+
+        rollup.registrar_fazendas(db, [f for _, f in fazendas])
+        rollup.registrar_culturas(db, culturas)
+        return len(fazendas), len(culturas)
+
+    def _gravar_linha_a_linha(self, validos: List[Tuple[int, schemas.ProdutorCreate]]):
+        """Grava cada linha na própria transação; só as que falharem viram erro"""
+        db = self.db
+        for linha, produtor in validos:
+            try:
+                self._inserir([produtor])
+                db.commit()
+            except IntegrityError:
+                # A única restrição única é o CPF/CNPJ: gravado por outra
+                # requisição depois da consulta aos existentes
+                db.rollback()
+                self._registrar_erro(linha, "CPF/CNPJ já cadastrado")
+            except Exception as exc:
+                db.rollback()
+                logger.error("Falha ao gravar a linha %s da importação: %s", linha, exc)
+                self._registrar_erro(linha, "Falha ao gravar no banco de dados")
+            else:
+                self.importados += 1
+        cache.dashboard_cache.invalidate()
+
+    def gravar_lote(self):
+        if not self._lote:
+            return
+        lote, self._lote = self._lote, []
+        self._cpfs_lote = set()
+        db = self.db
+
+        existentes = self._existentes([p.cpf_cnpj for _, p in lote])
+        validos = []
+        for linha, produtor in lote:
+            if produtor.cpf_cnpj in existentes:
+                self._registrar_erro(linha, "CPF/CNPJ já cadastrado")
+            else:
+                validos.append((linha, produtor))
+        if not validos:
+            return
+
+        try:
+            fazendas, culturas = self._inserir([p for _, p in validos])
+            db.commit()
+        except Exception as exc:
+            db.rollback()
+            logger.warning("Falha ao gravar lote de importação, gravando linha a linha: %s", exc)
+            self._gravar_linha_a_linha(validos)
+            return
+
+        cache.dashboard_cache.invalidate()
+        self.importados += len(validos)
+        logger.info("Lote de importação gravado: %s produtores, %s fazendas, %s culturas", len(validos), fazendas, culturas)
+
+    def resultado(self) -> Dict[str, Any]:
+        return {
+            "importados": self.importados,
+            "total_erros": self.total_erros,
+            "erros": sorted(self.erros, key=lambda e: e["linha"]),
+        }
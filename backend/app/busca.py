@@ -0,0 +1,150 @@
+"""Busca textual de produtores (nome) e fazendas (nome e cidade).
+
+A comparação ignora acentos e caixa e aceita trechos e pequenos erros de
+digitação. No PostgreSQL usa pg_trgm: o termo casa por LIKE '%termo%' ou pelo
+operador <% (word_similarity acima de pg_trgm.word_similarity_threshold), os
+dois atendidos pelos índices GIN de trigramas da migração 0003, e a relevância
+é word_similarity. Nos demais bancos (SQLite em desenvolvimento e testes) as
+funções f_unaccent e word_similarity são registradas em Python em cada conexão
+e a busca percorre a tabela.
+
+Bancos criados por create_all (DB_AUTO_CREATE=true, sem migrações) recebem as
+extensões, f_unaccent e os índices no evento after_create do metadata, com o
+mesmo SQL da migração 0003.
+"""
+
+from sqlalchemy import DDL, Float, cast, event, func, literal, literal_column, or_, and_, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from typing import Any, Dict, List, Optional, Tuple
+import re
+import sqlite3
+import unicodedata
+from . import models
+
+TIPO_PRODUTOR = "produtor"
+TIPO_FAZENDA = "fazenda"
+# Ordem de desempate entre tipos com a mesma relevância
+TIPOS = (TIPO_PRODUTOR, TIPO_FAZENDA)
+
+# Mesmo padrão de pg_trgm.word_similarity_threshold, usado fora do PostgreSQL
+LIMIAR_SIMILARIDADE = 0.6
+
+_PALAVRA = re.compile(r"\w+")
+
+def sem_acentos(texto: Optional[str]) -> Optional[str]:
+    """Minúsculas sem acentos, como f_unaccent(lower(texto)) no PostgreSQL"""
+    if texto is None:
+        return None
+    decomposto = unicodedata.normalize("NFKD", texto.lower())
+    return "".join(c for c in decomposto if not unicodedata.combining(c))
+
+def trigramas(texto: str) -> set:
+    """Trigramas por palavra no formato do pg_trgm ("  p", " pa", ..., "ra ")"""
+    resultado = set()
+    for palavra in _PALAVRA.findall(texto.lower()):
+        palavra = f"  {palavra} "
+        resultado.update(palavra[i:i + 3] for i in range(len(palavra) - 2))
+    return resultado
+
+def similaridade_palavra(termo: Optional[str], texto: Optional[str]) -> float:
+    """Aproximação de word_similarity: fração dos trigramas do termo presentes no texto"""
+    if termo is None or texto is None:
+        return 0.0
+    do_termo = trigramas(termo)
+    if not do_termo:
+        return 0.0
+    return len(do_termo & trigramas(texto)) / len(do_termo)
+
+@event.listens_for(Engine, "connect")
+def registrar_funcoes_sqlite(dbapi_connection, connection_record):
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.create_function("f_unaccent", 1, sem_acentos, deterministic=True)
+        dbapi_connection.create_function("word_similarity", 2, similaridade_palavra, deterministic=True)
+
+# Mesmo SQL da migração 0003; as tabelas acabaram de ser criadas, então os
+# índices não precisam de CONCURRENTLY
+DDL_BUSCA = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    "CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text "
+    "LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT "
+    "AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$",
+    "CREATE INDEX IF NOT EXISTS ix_produtores_nome_trgm "
+    "ON produtores USING gin (f_unaccent(lower(nome)) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_fazendas_busca_trgm "
+    "ON fazendas USING gin (f_unaccent(lower(nome || ' ' || cidade)) gin_trgm_ops)",
+]
+
+for _comando in DDL_BUSCA:
+    event.listen(models.Base.metadata, "after_create", DDL(_comando).execute_if(dialect="postgresql"))
+
+def _documento_produtor():
+    return func.f_unaccent(func.lower(models.Produtor.nome))
+
+def _documento_fazenda():
+    # Mesma expressão do índice ix_fazendas_busca_trgm; o separador vai literal
+    # no SQL para o planejador reconhecer o índice
+    return func.f_unaccent(func.lower(
+        models.Fazenda.nome.op("||")(literal_column("' '")).op("||")(models.Fazenda.cidade)
+    ))
+
+def _escapar_like(termo: str) -> str:
+    return termo.replace("/", "//").replace("%", "/%").replace("_", "/_")
+
+def _consulta(db: Session, tipo: str, termo: str, apos: Optional[Tuple[float, str, int]], limit: int):
+    if tipo == TIPO_PRODUTOR:
+        tabela, documento = models.Produtor, _documento_produtor()
+        colunas = (models.Produtor.id, models.Produtor.nome)
+    else:
+        tabela, documento = models.Fazenda, _documento_fazenda()
+        colunas = (
+            models.Fazenda.id, models.Fazenda.nome, models.Fazenda.cidade,
+            models.Fazenda.estado, models.Fazenda.produtor_id,
+        )
+
+    # word_similarity devolve real; em double precision o valor volta exato no
+    # cursor e a comparação da página seguinte não perde empates
+    relevancia = cast(func.word_similarity(literal(termo), documento), Float)
+    if db.get_bind().dialect.name == "postgresql":
+        parecido = literal(termo).op("<%")(documento)
+    else:
+        parecido = relevancia >= LIMIAR_SIMILARIDADE
+    stmt = (
+        select(*colunas, relevancia.label("relevancia"))
+        .where(or_(documento.like(f"%{_escapar_like(termo)}%", escape="/"), parecido))
+        .order_by(relevancia.desc(), tabela.id)
+        .limit(limit)
+    )
+
+    if apos is not None:
+        ultima, ultimo_tipo, ultimo_id = apos
+        ordem, ordem_cursor = TIPOS.index(tipo), TIPOS.index(ultimo_tipo)
+        if ordem > ordem_cursor:
+            stmt = stmt.where(relevancia <= ultima)
+        elif ordem < ordem_cursor:
+            stmt = stmt.where(relevancia < ultima)
+        else:
+            stmt = stmt.where(or_(relevancia < ultima, and_(relevancia == ultima, tabela.id > ultimo_id)))
+
+    return [dict(linha._mapping, tipo=tipo) for linha in db.execute(stmt)]
+
+def buscar(
+    db: Session,
+    termo: str,
+    tipos: Tuple[str, ...] = TIPOS,
+    limit: int = 20,
+    apos: Optional[Tuple[float, str, int]] = None,
+) -> List[Dict[str, Any]]:
+    """Resultados ordenados por relevância decrescente, depois por tipo e ID.
+
+    `apos` é a chave (relevância, tipo, id) do último resultado da página
+    anterior. Cada tipo é consultado com o próprio índice e as listas são
+    intercaladas aqui.
+    """
+    termo = sem_acentos(termo).strip()
+    resultados = []
+    for tipo in tipos:
+        resultados.extend(_consulta(db, tipo, termo, apos, limit))
+    resultados.sort(key=lambda r: (-r["relevancia"], TIPOS.index(r["tipo"]), r["id"]))
+    return resultados[:limit]
@@ -0,0 +1,103 @@
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+
+class DashboardCache:
+    """Cache em memória com TTL para as estatísticas do dashboard.
+
+    Cada escrita em crud.py chama invalidate(), que incrementa a geração; um
+    valor calculado em uma geração anterior nunca é servido. Com stale > 0,
+    quando o TTL expira apenas uma requisição recalcula o valor enquanto as
+    concorrentes recebem a versão anterior por até `stale` segundos.
+
+    Com réplicas de leitura, o primeiro cálculo depois de uma escrita usa
+    `loader_primario`: uma réplica ainda sem a escrita guardaria o valor antigo
+    na geração nova por todo o TTL.
+    """
+
+    def __init__(self, ttl: float, stale: float = 0.0):
+        self.ttl = ttl
+        self.stale = stale
+        self._lock = threading.Lock()
+        self._geracao = 0
+        self._valor: Any = None
+        self._geracao_valor: Optional[int] = None
+        self._criado_em = 0.0
+        self._recalculando = False
+        self._escrita_pendente = False
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def invalidate(self):
+        with self._lock:
+            self._geracao += 1
+            self._escrita_pendente = True
+
+    def clear(self):
+        with self._lock:
+            self._geracao += 1
+            self._valor = None
+            self._geracao_valor = None
+            self._recalculando = False
+            self._escrita_pendente = False
+            self.hits = 0
+            self.stale_hits = 0
+            self.misses = 0
+
+    def get(self, loader: Callable[[], Any], loader_primario: Optional[Callable[[], Any]] = None) -> Any:
+        if self.ttl <= 0:
+            with self._lock:
+                self.misses += 1
+            return loader()
+
+        with self._lock:
+            geracao = self._geracao
+            if self._geracao_valor == geracao:
+                idade = time.monotonic() - self._criado_em
+                if idade < self.ttl:
+                    self.hits += 1
+                    return self._valor
+                if idade < self.ttl + self.stale and self._recalculando:
+                    self.stale_hits += 1
+                    return self._valor
+                self._recalculando = True
+            self.misses += 1
+            if self._escrita_pendente and loader_primario is not None:
+                loader = loader_primario
+
+        try:
+            valor = loader()
+        except Exception:
+            with self._lock:
+                self._recalculando = False
+            raise
+
+        with self._lock:
+            # Se houve escrita durante o cálculo, o valor já nasce obsoleto
+            if geracao == self._geracao:
+                self._valor = valor
+                self._geracao_valor = geracao
+                self._criado_em = time.monotonic()
+                self._escrita_pendente = False
+            self._recalculando = False
+        return valor
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "ttl": self.ttl,
+                "stale": self.stale,
+                "geracao": self._geracao,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+            }
+
+
+dashboard_cache = DashboardCache(
+    ttl=float(os.getenv("DASHBOARD_CACHE_TTL", "5")),
+    stale=float(os.getenv("DASHBOARD_CACHE_STALE", "0")),
+)
@@ -1,284 +1,371 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from . import models, schemas
-from typing import List, Dict, Any
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import delete, exists, insert, update
+from . import models, schemas, rollup, cache
+from .projecao import Projecao
+from typing import List, Dict, Any, Optional, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
-def get_produtor(db: Session, produtor_id: int):
-    logger.info(f"Buscando produtor com ID: {produtor_id}")
-    return db.query(models.Produtor).filter(models.Produtor.id == produtor_id).first()
+# Carrega o grafo Produtor -> Fazenda -> Cultura com uma consulta por nível,
+# independente da quantidade de linhas retornadas (evita N+1 na serialização)
+PRODUTOR_GRAFO = selectinload(models.Produtor.fazendas).selectinload(models.Fazenda.culturas)
+FAZENDA_GRAFO = selectinload(models.Fazenda.culturas)
+
+def consulta_leitura(db: Session, modelo, grafo, projecao: Optional[Projecao] = None):
+    """Consulta base das leituras: o grafo completo, ou só o que a projeção pede.
+
+    Sem relações expandidas, seleciona só as colunas (linhas, não objetos do ORM).
+    """
+    if projecao is None:
+        return db.query(modelo).options(grafo)
+    if projecao.plana:
+        return db.query(*projecao.colunas())
+    return db.query(modelo).options(*projecao.opcoes())
+
+def get_produtor(db: Session, produtor_id: int, projecao: Optional[Projecao] = None):
+    logger.debug("Buscando produtor com ID: %s", produtor_id)
+    return (
+        consulta_leitura(db, models.Produtor, PRODUTOR_GRAFO, projecao)
+        .filter(models.Produtor.id == produtor_id)
+        .first()
+    )
+
+def produtor_existe(db: Session, produtor_id: int) -> bool:
+    return db.query(models.Produtor.id).filter(models.Produtor.id == produtor_id).first() is not None
 
 def get_produtor_by_cpf_cnpj(db: Session, cpf_cnpj: str):
-    logger.info(f"Buscando produtor por CPF/CNPJ: {cpf_cnpj}")
+    logger.debug("Buscando produtor por CPF/CNPJ: %s", cpf_cnpj)
     return db.query(models.Produtor).filter(models.Produtor.cpf_cnpj == cpf_cnpj).first()
 
-def get_produtores(db: Session, skip: int = 0, limit: int = 100):
-    logger.info(f"Buscando produtores com skip: {skip}, limit: {limit}")
-    return db.query(models.Produtor).offset(skip).limit(limit).all()
+def condicoes_fazenda(filtros: Optional[schemas.FiltroFazendas]) -> list:
+    """Condições SQL sobre models.Fazenda para os filtros informados"""
+    if filtros is None:
+        return []
+    condicoes = []
+    if filtros.estado is not None:
+        # estado é gravado em maiúsculas (schemas.FazendaBase, migração 0006)
+        condicoes.append(models.Fazenda.estado == filtros.estado.strip().upper())
+    if filtros.cidade is not None:
+        condicoes.append(models.Fazenda.cidade == filtros.cidade)
+    if filtros.area_min is not None:
+        condicoes.append(models.Fazenda.area_total >= filtros.area_min)
+    if filtros.area_max is not None:
+        condicoes.append(models.Fazenda.area_total <= filtros.area_max)
+    if filtros.cultura is not None or filtros.safra is not None:
+        # Semi-join: a fazenda aparece uma vez, mesmo com várias culturas que casam
+        cultura = [models.Cultura.fazenda_id == models.Fazenda.id]
+        if filtros.cultura is not None:
+            cultura.append(models.Cultura.nome == filtros.cultura)
+        if filtros.safra is not None:
+            cultura.append(models.Cultura.safra == filtros.safra)
+        condicoes.append(exists().where(*cultura))
+    return condicoes
+
+def get_produtores(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    after_id: Optional[int] = None,
+    filtros: Optional[schemas.FiltroFazendas] = None,
+    projecao: Optional[Projecao] = None,
+):
+    """Produtores com ao menos uma fazenda que atende a todos os filtros.
+
+    As fazendas de cada produtor retornado vêm completas, não só as que casaram.
+    """
+    logger.debug("Buscando produtores com skip: %s, limit: %s, after_id: %s, filtros: %s", skip, limit, after_id, filtros)
+    query = consulta_leitura(db, models.Produtor, PRODUTOR_GRAFO, projecao).order_by(models.Produtor.id)
+    condicoes = condicoes_fazenda(filtros)
+    if condicoes:
+        query = query.filter(exists().where(models.Fazenda.produtor_id == models.Produtor.id, *condicoes))
+    if after_id is not None:
+        # Paginação por cursor: busca direto pela chave primária, sem descartar linhas
+        query = query.filter(models.Produtor.id > after_id)
+    else:
+        query = query.offset(skip)
+    return query.limit(limit).all()
+
+CAMPOS_FAZENDA = ("nome", "cidade", "estado", "area_total", "area_agricultavel", "area_vegetacao")
+CAMPOS_CULTURA = ("nome", "safra")
+
+def inserir_fazendas_em_lote(db: Session, fazendas: List[Tuple[int, schemas.FazendaCreate]]) -> List[int]:
+    """Insere fazendas (produtor_id, payload) e suas culturas com INSERT multi-linha.
+
+    Não faz commit; retorna os IDs das fazendas na mesma ordem da entrada.
+    """
+    if not fazendas:
+        return []
+    fazenda_ids = db.scalars(
+        insert(models.Fazenda).returning(models.Fazenda.id, sort_by_parameter_order=True),
+        [
+            {**{campo: getattr(f, campo) for campo in CAMPOS_FAZENDA}, "produtor_id": produtor_id}
+            for produtor_id, f in fazendas
+        ]
+    ).all()
+    culturas = [
+        {"nome": c.nome, "safra": c.safra, "fazenda_id": fazenda_id}
+        for fazenda_id, (_, f) in zip(fazenda_ids, fazendas)
+        for c in f.culturas or []
+    ]
+    if culturas:
+        db.execute(insert(models.Cultura), culturas)
+    return fazenda_ids
 
 def create_produtor(db: Session, produtor: schemas.ProdutorCreate):
-    logger.info(f"Criando novo produtor: {produtor.nome}")
+    logger.debug("Criando novo produtor: %s", produtor.nome)
+    fazendas_payload = produtor.fazendas or []
     db_produtor = models.Produtor(
         cpf_cnpj=produtor.cpf_cnpj,
         nome=produtor.nome
     )
-    db.add(db_produtor)
-    db.commit()
-    db.refresh(db_produtor)
-
-    if produtor.fazendas:
-        for fazenda_data in produtor.fazendas:
-            db_fazenda = models.Fazenda(
-                nome=fazenda_data.nome,
-                cidade=fazenda_data.cidade,
-                estado=fazenda_data.estado,
-                area_total=fazenda_data.area_total,
-                area_agricultavel=fazenda_data.area_agricultavel,
-                area_vegetacao=fazenda_data.area_vegetacao,
-                produtor_id=db_produtor.id
-            )
-            db.add(db_fazenda)
-            db.commit()
-            db.refresh(db_fazenda)
-
-            if fazenda_data.culturas:
-                for cultura_data in fazenda_data.culturas:
-                    db_cultura = models.Cultura(
-                        nome=cultura_data.nome,
-                        safra=cultura_data.safra,
-                        fazenda_id=db_fazenda.id
-                    )
-                    db.add(db_cultura)
-                db.commit()
-                db.refresh(db_fazenda)
+    try:
+        db.add(db_produtor)
+        # O flush atribui o ID do produtor; fazendas e culturas seguem em lote
+        db.flush()
+        inserir_fazendas_em_lote(db, [(db_produtor.id, f) for f in fazendas_payload])
+        rollup.registrar_fazendas(db, fazendas_payload)
+        rollup.registrar_culturas(db, [c.nome for f in fazendas_payload for c in f.culturas or []])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
 
-    logger.info(f"Produtor criado com sucesso. ID: {db_produtor.id}")
-    return db_produtor
+    cache.dashboard_cache.invalidate()
+    logger.debug("Produtor criado com sucesso. ID: %s", db_produtor.id)
+    return get_produtor(db, db_produtor.id)
+
+def _alterados(db_obj, dados, campos) -> bool:
+    return any(getattr(db_obj, campo) != getattr(dados, campo) for campo in campos)
 
 def update_produtor(db: Session, produtor_id: int, produtor: schemas.ProdutorCreate):
-    logger.info(f"Atualizando produtor com ID: {produtor_id}")
+    logger.debug("Atualizando produtor com ID: %s", produtor_id)
     db_produtor = get_produtor(db, produtor_id)
     if not db_produtor:
         return None
 
-    # Atualiza nome
-    db_produtor.nome = produtor.nome
-    db.commit()
-    db.refresh(db_produtor)
-
-    # Sincroniza fazendas
-    fazendas_payload = produtor.fazendas or []
-    fazendas_ids_payload = [f.id for f in fazendas_payload if hasattr(f, 'id') and f.id]
+    # Calcula o diff completo entre o grafo atual e o payload antes de escrever
     fazendas_db = {f.id: f for f in db_produtor.fazendas}
+    fazendas_payload = produtor.fazendas or []
+    ids_mantidos = {f.id for f in fazendas_payload if f.id in fazendas_db}
 
-    # Remove fazendas que não estão mais no payload
-    for fazenda in db_produtor.fazendas[:]:
-        if fazenda.id not in fazendas_ids_payload:
-            db.delete(fazenda)
-    db.commit()
+    fazendas_remover = [f.id for f in db_produtor.fazendas if f.id not in ids_mantidos]
+    culturas_remover = [c.id for f in db_produtor.fazendas if f.id not in ids_mantidos for c in f.culturas]
+    fazendas_atualizar = []
+    fazendas_criar = []
+    culturas_atualizar = []
+    culturas_criar = []  # culturas novas em fazendas existentes
 
-    # Atualiza ou cria fazendas
     for fazenda_data in fazendas_payload:
-        if hasattr(fazenda_data, 'id') and fazenda_data.id in fazendas_db:
-            # Atualiza fazenda existente
+        culturas_payload = fazenda_data.culturas or []
+        if fazenda_data.id in ids_mantidos:
             fazenda = fazendas_db[fazenda_data.id]
-            fazenda.nome = fazenda_data.nome
-            fazenda.cidade = fazenda_data.cidade
-            fazenda.estado = fazenda_data.estado
-            fazenda.area_total = fazenda_data.area_total
-            fazenda.area_agricultavel = fazenda_data.area_agricultavel
-            fazenda.area_vegetacao = fazenda_data.area_vegetacao
-            db.commit()
-            db.refresh(fazenda)
+            if _alterados(fazenda, fazenda_data, CAMPOS_FAZENDA):
+                fazendas_atualizar.append(
+                    {"id": fazenda.id, **{campo: getattr(fazenda_data, campo) for campo in CAMPOS_FAZENDA}}
+                )
+            culturas_db = {c.id: c for c in fazenda.culturas}
+            culturas_mantidas = {c.id for c in culturas_payload if c.id in culturas_db}
+            culturas_remover.extend(c.id for c in fazenda.culturas if c.id not in culturas_mantidas)
+            for cultura_data in culturas_payload:
+                if cultura_data.id in culturas_mantidas:
+                    if _alterados(culturas_db[cultura_data.id], cultura_data, CAMPOS_CULTURA):
+                        culturas_atualizar.append(
+                            {"id": cultura_data.id, "nome": cultura_data.nome, "safra": cultura_data.safra}
+                        )
+                else:
+                    culturas_criar.append(
+                        {"nome": cultura_data.nome, "safra": cultura_data.safra, "fazenda_id": fazenda.id}
+                    )
         else:
-            # Cria nova fazenda
-            fazenda = models.Fazenda(
-                nome=fazenda_data.nome,
-                cidade=fazenda_data.cidade,
-                estado=fazenda_data.estado,
-                area_total=fazenda_data.area_total,
-                area_agricultavel=fazenda_data.area_agricultavel,
-                area_vegetacao=fazenda_data.area_vegetacao,
-                produtor_id=db_produtor.id
+            fazendas_criar.append((produtor_id, fazenda_data))
+
+    # Grafo anterior para o rollup, lido antes que os updates em lote
+    # sincronizem os objetos da sessão
+    fazendas_anteriores = [
+        {campo: getattr(f, campo) for campo in ("estado",) + rollup.AREAS} for f in db_produtor.fazendas
+    ]
+    culturas_anteriores = [c.nome for f in db_produtor.fazendas for c in f.culturas]
+
+    try:
+        if db_produtor.nome != produtor.nome:
+            db.execute(
+                update(models.Produtor)
+                .where(models.Produtor.id == produtor_id)
+                .values(nome=produtor.nome)
             )
-            db.add(fazenda)
-            db.commit()
-            db.refresh(fazenda)
-        # Sincroniza culturas da fazenda
-        culturas_payload = getattr(fazenda_data, 'culturas', [])
-        culturas_ids_payload = [c.id for c in culturas_payload if hasattr(c, 'id') and c.id]
-        culturas_db = {c.id: c for c in fazenda.culturas}
-        # Remove culturas que não estão mais no payload
-        for cultura in fazenda.culturas[:]:
-            if cultura.id not in culturas_ids_payload:
-                db.delete(cultura)
-        db.commit()
-        # Atualiza ou cria culturas
-        for cultura_data in culturas_payload:
-            if hasattr(cultura_data, 'id') and cultura_data.id in culturas_db:
-                cultura = culturas_db[cultura_data.id]
-                cultura.nome = cultura_data.nome
-                cultura.safra = cultura_data.safra
-                db.commit()
-                db.refresh(cultura)
-            else:
-                cultura = models.Cultura(
-                    nome=cultura_data.nome,
-                    safra=cultura_data.safra,
-                    fazenda_id=fazenda.id
-                )
-                db.add(cultura)
+        if culturas_remover:
+            db.execute(delete(models.Cultura).where(models.Cultura.id.in_(culturas_remover)))
+        if fazendas_remover:
+            db.execute(delete(models.Fazenda).where(models.Fazenda.id.in_(fazendas_remover)))
+        if fazendas_atualizar:
+            db.execute(update(models.Fazenda), fazendas_atualizar)
+        if culturas_atualizar:
+            db.execute(update(models.Cultura), culturas_atualizar)
+
+        inserir_fazendas_em_lote(db, fazendas_criar)
+        if culturas_criar:
+            db.execute(insert(models.Cultura), culturas_criar)
+        # Rollup por último: troca o grafo antigo pelo novo em um upsert por chave
+        rollup.substituir_fazendas(db, fazendas_anteriores, fazendas_payload)
+        rollup.substituir_culturas(
+            db, culturas_anteriores, [c.nome for f in fazendas_payload for c in f.culturas or []]
+        )
         db.commit()
-        db.refresh(fazenda)
+    except Exception:
+        db.rollback()
+        raise
 
-    db.refresh(db_produtor)
-    logger.info(f"Produtor atualizado com sucesso. ID: {produtor_id}")
-    return db_produtor
+    cache.dashboard_cache.invalidate()
+    logger.debug(
+        "Produtor atualizado com sucesso. ID: %s - fazendas: %s criadas, %s atualizadas, %s removidas",
+        produtor_id, len(fazendas_criar), len(fazendas_atualizar), len(fazendas_remover)
+    )
+    return get_produtor(db, produtor_id)
 
 def delete_produtor(db: Session, produtor_id: int):
-    logger.info(f"Deletando produtor com ID: {produtor_id}")
+    logger.debug("Deletando produtor com ID: %s", produtor_id)
     db_produtor = get_produtor(db, produtor_id)
     if not db_produtor:
         return False
     
+    fazendas = list(db_produtor.fazendas)
+    culturas = [c.nome for f in fazendas for c in f.culturas]
     db.delete(db_produtor)
+    db.flush()
+    rollup.registrar_fazendas(db, fazendas, sinal=-1)
+    rollup.registrar_culturas(db, culturas, sinal=-1)
     db.commit()
-    logger.info(f"Produtor deletado com sucesso. ID: {produtor_id}")
+    cache.dashboard_cache.invalidate()
+    logger.debug("Produtor deletado com sucesso. ID: %s", produtor_id)
     return True
 
-def get_fazenda(db: Session, fazenda_id: int):
-    logger.info(f"Buscando fazenda com ID: {fazenda_id}")
-    return db.query(models.Fazenda).filter(models.Fazenda.id == fazenda_id).first()
+def get_fazenda(db: Session, fazenda_id: int, projecao: Optional[Projecao] = None):
+    logger.debug("Buscando fazenda com ID: %s", fazenda_id)
+    return (
+        consulta_leitura(db, models.Fazenda, FAZENDA_GRAFO, projecao)
+        .filter(models.Fazenda.id == fazenda_id)
+        .first()
+    )
+
+def fazenda_existe(db: Session, fazenda_id: int) -> bool:
+    return db.query(models.Fazenda.id).filter(models.Fazenda.id == fazenda_id).first() is not None
 
-def get_fazendas_by_produtor(db: Session, produtor_id: int):
-    logger.info(f"Buscando fazendas do produtor ID: {produtor_id}")
-    return db.query(models.Fazenda).filter(models.Fazenda.produtor_id == produtor_id).all()
+def get_fazendas_by_produtor(db: Session, produtor_id: int, projecao: Optional[Projecao] = None):
+    logger.debug("Buscando fazendas do produtor ID: %s", produtor_id)
+    return (
+        consulta_leitura(db, models.Fazenda, FAZENDA_GRAFO, projecao)
+        .filter(models.Fazenda.produtor_id == produtor_id)
+        .all()
+    )
 
-def get_fazendas(db: Session, skip: int = 0, limit: int = 100):
-    logger.info(f"Buscando fazendas com skip: {skip}, limit: {limit}")
-    return db.query(models.Fazenda).offset(skip).limit(limit).all()
+def get_fazendas(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    after_id: Optional[int] = None,
+    filtros: Optional[schemas.FiltroFazendas] = None,
+    projecao: Optional[Projecao] = None,
+):
+    logger.debug("Buscando fazendas com skip: %s, limit: %s, after_id: %s, filtros: %s", skip, limit, after_id, filtros)
+    query = consulta_leitura(db, models.Fazenda, FAZENDA_GRAFO, projecao).order_by(models.Fazenda.id)
+    query = query.filter(*condicoes_fazenda(filtros))
+    if after_id is not None:
+        query = query.filter(models.Fazenda.id > after_id)
+    else:
+        query = query.offset(skip)
+    return query.limit(limit).all()
 
 def create_fazenda(db: Session, fazenda: schemas.FazendaCreate, produtor_id: int):
-    logger.info(f"Criando nova fazenda para produtor ID: {produtor_id}")
-    db_fazenda = models.Fazenda(
-        nome=fazenda.nome,
-        cidade=fazenda.cidade,
-        estado=fazenda.estado,
-        area_total=fazenda.area_total,
-        area_agricultavel=fazenda.area_agricultavel,
-        area_vegetacao=fazenda.area_vegetacao,
-        produtor_id=produtor_id
-    )
-    db.add(db_fazenda)
-    db.commit()
-    db.refresh(db_fazenda)
-    
-    if fazenda.culturas:
-        for cultura_data in fazenda.culturas:
-            db_cultura = models.Cultura(
-                nome=cultura_data.nome,
-                safra=cultura_data.safra,
-                fazenda_id=db_fazenda.id
-            )
-            db.add(db_cultura)
+    logger.debug("Criando nova fazenda para produtor ID: %s", produtor_id)
+    try:
+        fazenda_id, = inserir_fazendas_em_lote(db, [(produtor_id, fazenda)])
+        rollup.registrar_fazendas(db, [fazenda])
+        rollup.registrar_culturas(db, [c.nome for c in fazenda.culturas or []])
         db.commit()
-        db.refresh(db_fazenda)
-    
-    logger.info(f"Fazenda criada com sucesso. ID: {db_fazenda.id}")
-    return db_fazenda
+    except Exception:
+        db.rollback()
+        raise
+
+    cache.dashboard_cache.invalidate()
+    logger.debug("Fazenda criada com sucesso. ID: %s", fazenda_id)
+    return get_fazenda(db, fazenda_id)
 
 def update_fazenda(db: Session, fazenda_id: int, fazenda: schemas.FazendaUpdate):
-    logger.info(f"Atualizando fazenda com ID: {fazenda_id}")
+    logger.debug("Atualizando fazenda com ID: %s", fazenda_id)
     db_fazenda = get_fazenda(db, fazenda_id)
     if not db_fazenda:
         return None
     
     update_data = fazenda.dict(exclude_unset=True)
+    anterior = {campo: getattr(db_fazenda, campo) for campo in ("estado",) + rollup.AREAS}
     for field, value in update_data.items():
         setattr(db_fazenda, field, value)
-    
+    db.flush()
+    rollup.substituir_fazendas(db, [anterior], [db_fazenda])
     db.commit()
-    db.refresh(db_fazenda)
-    logger.info(f"Fazenda atualizada com sucesso. ID: {fazenda_id}")
-    return db_fazenda
+    cache.dashboard_cache.invalidate()
+    logger.debug("Fazenda atualizada com sucesso. ID: %s", fazenda_id)
+    return get_fazenda(db, fazenda_id)
 
 def delete_fazenda(db: Session, fazenda_id: int):
-    logger.info(f"Deletando fazenda com ID: {fazenda_id}")
+    logger.debug("Deletando fazenda com ID: %s", fazenda_id)
     db_fazenda = get_fazenda(db, fazenda_id)
     if not db_fazenda:
         return False
     
+    culturas = [c.nome for c in db_fazenda.culturas]
     db.delete(db_fazenda)
+    db.flush()
+    rollup.registrar_fazendas(db, [db_fazenda], sinal=-1)
+    rollup.registrar_culturas(db, culturas, sinal=-1)
     db.commit()
-    logger.info(f"Fazenda deletada com sucesso. ID: {fazenda_id}")
+    cache.dashboard_cache.invalidate()
+    logger.debug("Fazenda deletada com sucesso. ID: %s", fazenda_id)
     return True
 
 def get_cultura(db: Session, cultura_id: int):
-    logger.info(f"Buscando cultura com ID: {cultura_id}")
+    logger.debug("Buscando cultura com ID: %s", cultura_id)
     return db.query(models.Cultura).filter(models.Cultura.id == cultura_id).first()
 
 def get_culturas_by_fazenda(db: Session, fazenda_id: int):
-    logger.info(f"Buscando culturas da fazenda ID: {fazenda_id}")
+    logger.debug("Buscando culturas da fazenda ID: %s", fazenda_id)
     return db.query(models.Cultura).filter(models.Cultura.fazenda_id == fazenda_id).all()
 
 def create_cultura(db: Session, cultura: schemas.CulturaCreate, fazenda_id: int):
-    logger.info(f"Criando nova cultura para fazenda ID: {fazenda_id}")
+    logger.debug("Criando nova cultura para fazenda ID: %s", fazenda_id)
     db_cultura = models.Cultura(
         nome=cultura.nome,
         safra=cultura.safra,
         fazenda_id=fazenda_id
     )
     db.add(db_cultura)
+    db.flush()
+    rollup.registrar_culturas(db, [cultura.nome])
     db.commit()
     db.refresh(db_cultura)
-    logger.info(f"Cultura criada com sucesso. ID: {db_cultura.id}")
+    cache.dashboard_cache.invalidate()
+    logger.debug("Cultura criada com sucesso. ID: %s", db_cultura.id)
     return db_cultura
 
 def delete_cultura(db: Session, cultura_id: int):
-    logger.info(f"Deletando cultura com ID: {cultura_id}")
+    logger.debug("Deletando cultura com ID: %s", cultura_id)
     db_cultura = get_cultura(db, cultura_id)
     if not db_cultura:
         return False
     
     db.delete(db_cultura)
+    db.flush()
+    rollup.registrar_culturas(db, [db_cultura.nome], sinal=-1)
     db.commit()
-    logger.info(f"Cultura deletada com sucesso. ID: {cultura_id}")
+    cache.dashboard_cache.invalidate()
+    logger.debug("Cultura deletada com sucesso. ID: %s", cultura_id)
     return True
 
 def get_dashboard_stats(db: Session) -> Dict[str, Any]:
-    logger.info("Gerando estatísticas do dashboard")
-    
-    total_fazendas = db.query(func.count(models.Fazenda.id)).scalar()
-    
-    total_hectares = db.query(func.sum(models.Fazenda.area_total)).scalar() or 0
-    
-    por_estado = db.query(
-        models.Fazenda.estado,
-        func.count(models.Fazenda.id).label('quantidade')
-    ).group_by(models.Fazenda.estado).all()
-    por_estado_dict = {estado: quantidade for estado, quantidade in por_estado}
-    
-    por_cultura = db.query(
-        models.Cultura.nome,
-        func.count(models.Cultura.id).label('quantidade')
-    ).group_by(models.Cultura.nome).all()
-    por_cultura_dict = {cultura: quantidade for cultura, quantidade in por_cultura}
-    
-    area_agricultavel = db.query(func.sum(models.Fazenda.area_agricultavel)).scalar() or 0
-    area_vegetacao = db.query(func.sum(models.Fazenda.area_vegetacao)).scalar() or 0
-    por_uso_solo = {
-        "Área Agricultável": area_agricultavel,
-        "Área de Vegetação": area_vegetacao
-    }
-    
-    logger.info(f"Dashboard gerado - Fazendas: {total_fazendas}, Hectares: {total_hectares}")
-    
-    return {
-        "total_fazendas": total_fazendas,
-        "total_hectares": total_hectares,
-        "por_estado": por_estado_dict,
-        "por_cultura": por_cultura_dict,
-        "por_uso_solo": por_uso_solo
-    } 
\ No newline at end of file
+    logger.debug("Gerando estatísticas do dashboard")
+    # Lê o rollup mantido pelas escritas: custo proporcional ao número de
+    # estados e culturas, não ao tamanho das tabelas
+    stats = rollup.ler(db)
+    logger.debug("Dashboard gerado - Fazendas: %s, Hectares: %s", stats['total_fazendas'], stats['total_hectares'])
+    return stats
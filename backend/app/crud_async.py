@@ -0,0 +1,93 @@
+"""Versões assíncronas das operações de crud.py.
+
+Cada função executa a operação síncrona correspondente com
+AsyncSession.run_sync: a lógica (diff, rollup, invalidação do cache) é a
+mesma, mas o I/O passa pelo driver assíncrono sem ocupar uma thread do pool.
+"""
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, Optional
+from . import crud, schemas, cache, versoes
+from .projecao import Projecao
+
+async def versao_dados(db: AsyncSession) -> int:
+    return await db.run_sync(versoes.atual)
+
+async def get_produtor(db: AsyncSession, produtor_id: int, projecao: Optional[Projecao] = None):
+    return await db.run_sync(crud.get_produtor, produtor_id, projecao)
+
+async def produtor_existe(db: AsyncSession, produtor_id: int) -> bool:
+    return await db.run_sync(crud.produtor_existe, produtor_id)
+
+async def get_produtor_by_cpf_cnpj(db: AsyncSession, cpf_cnpj: str):
+    return await db.run_sync(crud.get_produtor_by_cpf_cnpj, cpf_cnpj)
+
+async def get_produtores(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    after_id: Optional[int] = None,
+    filtros: Optional[schemas.FiltroFazendas] = None,
+    projecao: Optional[Projecao] = None,
+):
+    return await db.run_sync(crud.get_produtores, skip, limit, after_id, filtros, projecao)
+
+async def create_produtor(db: AsyncSession, produtor: schemas.ProdutorCreate):
+    return await db.run_sync(crud.create_produtor, produtor)
+
+async def update_produtor(db: AsyncSession, produtor_id: int, produtor: schemas.ProdutorCreate):
+    return await db.run_sync(crud.update_produtor, produtor_id, produtor)
+
+async def delete_produtor(db: AsyncSession, produtor_id: int) -> bool:
+    return await db.run_sync(crud.delete_produtor, produtor_id)
+
+async def get_fazenda(db: AsyncSession, fazenda_id: int, projecao: Optional[Projecao] = None):
+    return await db.run_sync(crud.get_fazenda, fazenda_id, projecao)
+
+async def fazenda_existe(db: AsyncSession, fazenda_id: int) -> bool:
+    return await db.run_sync(crud.fazenda_existe, fazenda_id)
+
+async def get_fazendas_by_produtor(db: AsyncSession, produtor_id: int, projecao: Optional[Projecao] = None):
+    return await db.run_sync(crud.get_fazendas_by_produtor, produtor_id, projecao)
+
+async def get_fazendas(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    after_id: Optional[int] = None,
+    filtros: Optional[schemas.FiltroFazendas] = None,
+    projecao: Optional[Projecao] = None,
+):
+    return await db.run_sync(crud.get_fazendas, skip, limit, after_id, filtros, projecao)
+
+async def create_fazenda(db: AsyncSession, fazenda: schemas.FazendaCreate, produtor_id: int):
+    return await db.run_sync(crud.create_fazenda, fazenda, produtor_id)
+
+async def update_fazenda(db: AsyncSession, fazenda_id: int, fazenda: schemas.FazendaUpdate):
+    return await db.run_sync(crud.update_fazenda, fazenda_id, fazenda)
+
+async def delete_fazenda(db: AsyncSession, fazenda_id: int) -> bool:
+    return await db.run_sync(crud.delete_fazenda, fazenda_id)
+
+async def get_culturas_by_fazenda(db: AsyncSession, fazenda_id: int):
+    return await db.run_sync(crud.get_culturas_by_fazenda, fazenda_id)
+
+async def create_cultura(db: AsyncSession, cultura: schemas.CulturaCreate, fazenda_id: int):
+    return await db.run_sync(crud.create_cultura, cultura, fazenda_id)
+
+async def delete_cultura(db: AsyncSession, cultura_id: int) -> bool:
+    return await db.run_sync(crud.delete_cultura, cultura_id)
+
+async def get_dashboard_stats(db: AsyncSession) -> Dict[str, Any]:
+    return await db.run_sync(crud.get_dashboard_stats)
+
+async def get_dashboard_stats_cached(db: AsyncSession, primario: Optional[AsyncSession] = None) -> Dict[str, Any]:
+    # A consulta ao cache roda dentro do run_sync para que um miss possa
+    # carregar pela mesma sessão; um hit não chega a abrir conexão. O
+    # sync_session do primário também funciona dentro do mesmo run_sync
+    loader_primario = None
+    if primario is not None:
+        loader_primario = lambda: crud.get_dashboard_stats(primario.sync_session)
+    return await db.run_sync(lambda session: cache.dashboard_cache.get(
+        lambda: crud.get_dashboard_stats(session), loader_primario=loader_primario
+    ))
@@ -0,0 +1,127 @@
+"""Validação de CPF/CNPJ em lote.
+
+Os documentos de mesmo tamanho viram uma matriz de dígitos e os dígitos
+verificadores de todos são calculados com um produto matricial, em vez do
+laço por documento de schemas.ProdutorBase. As regras e mensagens são as
+mesmas do validador do schema.
+"""
+
+from sqlalchemy.orm import Session
+from sqlalchemy import select
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+import re
+import numpy as np
+from . import models
+from .schemas import ProdutorBase
+
+VALIDO = 0
+TAMANHO_INVALIDO = 1
+CPF_INVALIDO = 2
+CNPJ_INVALIDO = 3
+
+MENSAGENS: Dict[int, Optional[str]] = {
+    VALIDO: None,
+    TAMANHO_INVALIDO: "CPF deve ter 11 dígitos ou CNPJ deve ter 14 dígitos",
+    CPF_INVALIDO: "CPF inválido",
+    CNPJ_INVALIDO: "CNPJ inválido",
+}
+
+_PESOS_CPF = (np.arange(10, 1, -1), np.arange(11, 1, -1))
+_PESOS_CNPJ = (
+    np.array([5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]),
+    np.array([6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]),
+)
+_NAO_DIGITO = re.compile(r"[^\d]")
+
+# Documentos lidos do banco e validados por vez na auditoria
+TAMANHO_CHUNK_AUDITORIA = 50000
+
+def normalizar(documentos: Sequence[str]) -> List[str]:
+    return [d if d.isascii() and d.isdigit() else _NAO_DIGITO.sub("", d) for d in documentos]
+
+def _digito(digitos: np.ndarray, pesos: np.ndarray) -> np.ndarray:
+    resto = (digitos[:, :len(pesos)] @ pesos) % 11
+    return np.where(resto < 2, 0, 11 - resto)
+
+def _validar_matriz(digitos: np.ndarray, pesos: Tuple[np.ndarray, np.ndarray]) -> np.ndarray:
+    n = len(pesos[0])
+    repetidos = (digitos == digitos[:, :1]).all(axis=1)
+    return (
+        ~repetidos
+        & (digitos[:, n] == _digito(digitos, pesos[0]))
+        & (digitos[:, n + 1] == _digito(digitos, pesos[1]))
+    )
+
+def completar(raizes: np.ndarray) -> List[str]:
+    """Acrescenta os dígitos verificadores a uma matriz de raízes.
+
+    Linhas com 9 dígitos viram CPFs e com 12 dígitos, CNPJs.
+    """
+    pesos = _PESOS_CPF if raizes.shape[1] == 9 else _PESOS_CNPJ
+    digitos = np.zeros((raizes.shape[0], raizes.shape[1] + 2), dtype=np.int64)
+    digitos[:, :-2] = raizes
+    digitos[:, -2] = _digito(digitos, pesos[0])
+    digitos[:, -1] = _digito(digitos, pesos[1])
+    texto = (digitos + ord("0")).astype(np.uint8).tobytes().decode("ascii")
+    tamanho = digitos.shape[1]
+    return [texto[i:i + tamanho] for i in range(0, len(texto), tamanho)]
+
+def _matriz(documentos: List[str], tamanho: int) -> np.ndarray:
+    bruto = np.frombuffer("".join(documentos).encode("ascii"), dtype=np.uint8)
+    return (bruto.reshape(-1, tamanho) - ord("0")).astype(np.int64)
+
+def validar_em_lote(documentos: Sequence[str]) -> Tuple[List[str], np.ndarray]:
+    """Normaliza e valida os documentos; retorna (normalizados, códigos).
+
+    codigos[i] é VALIDO, TAMANHO_INVALIDO, CPF_INVALIDO ou CNPJ_INVALIDO e a
+    mensagem correspondente está em MENSAGENS.
+    """
+    normalizados = normalizar(documentos)
+    codigos = np.full(len(normalizados), TAMANHO_INVALIDO, dtype=np.int8)
+
+    for tamanho, pesos, invalido, escalar in (
+        (11, _PESOS_CPF, CPF_INVALIDO, ProdutorBase._validate_cpf),
+        (14, _PESOS_CNPJ, CNPJ_INVALIDO, ProdutorBase._validate_cnpj),
+    ):
+        indices = [i for i, d in enumerate(normalizados) if len(d) == tamanho and d.isascii()]
+        if indices:
+            validos = _validar_matriz(_matriz([normalizados[i] for i in indices], tamanho), pesos)
+            codigos[indices] = np.where(validos, VALIDO, invalido)
+        # Dígitos Unicode fora do ASCII também passam por \d; ficam com o validador do schema
+        for i, d in enumerate(normalizados):
+            if len(d) == tamanho and not d.isascii():
+                codigos[i] = VALIDO if escalar(d) else invalido
+
+    return normalizados, codigos
+
+def erros(documentos: Sequence[str]) -> List[Optional[str]]:
+    """Mensagem de erro de cada documento, ou None quando válido"""
+    _, codigos = validar_em_lote(documentos)
+    return [MENSAGENS[c] for c in codigos.tolist()]
+
+def auditar(db: Session, tamanho_chunk: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """Percorre produtores.cpf_cnpj e produz os registros com problema.
+
+    Além de documentos inválidos, aponta valores gravados sem normalização
+    (com pontuação), que o validador do schema não deixaria passar.
+    """
+    tamanho_chunk = tamanho_chunk or TAMANHO_CHUNK_AUDITORIA
+    tabela = models.Produtor.__table__
+    stmt = (
+        select(tabela.c.id, tabela.c.cpf_cnpj)
+        .order_by(tabela.c.id)
+        .execution_options(stream_results=True, yield_per=tamanho_chunk)
+    )
+    resultado = db.execute(stmt)
+    try:
+        for linhas in resultado.partitions():
+            ids = [linha[0] for linha in linhas]
+            valores = [linha[1] or "" for linha in linhas]
+            normalizados, codigos = validar_em_lote(valores)
+            for produtor_id, valor, normalizado, codigo in zip(ids, valores, normalizados, codigos.tolist()):
+                if codigo != VALIDO:
+                    yield {"id": produtor_id, "cpf_cnpj": valor, "erro": MENSAGENS[codigo]}
+                elif valor != normalizado:
+                    yield {"id": produtor_id, "cpf_cnpj": valor, "erro": "CPF/CNPJ não normalizado"}
+    finally:
+        resultado.close()
@@ -0,0 +1,80 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import select
+from datetime import date, datetime
+from typing import Iterator, Optional
+import csv
+import io
+import json
+import logging
+from . import models
+
+logger = logging.getLogger(__name__)
+
+# Linhas buscadas do cursor do servidor e escritas na resposta por vez
+TAMANHO_CHUNK = 2000
+
+FORMATO_NDJSON = "ndjson"
+FORMATO_CSV = "csv"
+
+MEDIA_TYPES = {
+    FORMATO_NDJSON: "application/x-ndjson",
+    FORMATO_CSV: "text/csv; charset=utf-8",
+}
+
+TABELAS = {
+    "produtores": models.Produtor.__table__,
+    "fazendas": models.Fazenda.__table__,
+    "culturas": models.Cultura.__table__,
+}
+
+def _json_default(valor):
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    raise TypeError(f"Tipo não serializável: {type(valor).__name__}")
+
+def _csv_valor(valor):
+    if valor is None:
+        return ""
+    if isinstance(valor, (datetime, date)):
+        return valor.isoformat()
+    return valor
+
+def iter_export(db: Session, entidade: str, formato: str, tamanho_chunk: Optional[int] = None) -> Iterator[str]:
+    """Gera o conteúdo da exportação em blocos, lendo por um cursor do servidor.
+
+    Cada bloco corresponde a um chunk de linhas do banco, então a memória
+    usada não depende do tamanho da tabela.
+    """
+    tamanho_chunk = tamanho_chunk or TAMANHO_CHUNK
+    tabela = TABELAS[entidade]
+    colunas = [c.name for c in tabela.columns]
+    stmt = (
+        select(tabela)
+        .order_by(tabela.c.id)
+        .execution_options(stream_results=True, yield_per=tamanho_chunk)
+    )
+    logger.info("Iniciando exportação de %s em %s", entidade, formato)
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if formato == FORMATO_CSV else None
+    if writer is not None:
+        writer.writerow(colunas)
+        yield buffer.getvalue()
+
+    total = 0
+    resultado = db.execute(stmt)
+    try:
+        for linhas in resultado.partitions():
+            buffer.seek(0)
+            buffer.truncate()
+            if writer is not None:
+                writer.writerows([_csv_valor(v) for v in linha] for linha in linhas)
+            else:
+                for linha in linhas:
+                    buffer.write(json.dumps(dict(zip(colunas, linha)), default=_json_default, ensure_ascii=False))
+                    buffer.write("\n")
+            total += len(linhas)
+            yield buffer.getvalue()
+    finally:
+        resultado.close()
+    logger.info("Exportação de %s concluída com %s linhas", entidade, total)
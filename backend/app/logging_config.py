@@ -0,0 +1,159 @@
+"""Configuração de logging da API.
+
+Com LOG_ASYNC=true (padrão) os registros passam por uma fila em memória até
+uma thread dedicada (QueueHandler/QueueListener): a formatação da mensagem e
+a escrita no stderr não acontecem na thread da requisição nem no event loop.
+LOG_FORMAT=json grava um objeto JSON por linha, com a rota da requisição.
+
+Com LOG_LEVEL=DEBUG, os logs de debug podem ser amostrados por requisição
+(LOG_DEBUG_SAMPLE_RATE e LOG_DEBUG_SAMPLE_ROUTES): cada requisição sorteada
+emite todos os seus registros DEBUG e as demais nenhum.
+"""
+
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+from .ambiente import env_bool
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+LOG_ASYNC = env_bool("LOG_ASYNC", "true")
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "1.0"))
+# Taxas por rota, ex.: "/api/v1/produtores/=0.01,/api/v1/dashboard/=0"
+LOG_DEBUG_SAMPLE_ROUTES = os.getenv("LOG_DEBUG_SAMPLE_ROUTES", "")
+
+FORMATO_TEXTO = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+class ContextoRequisicao:
+    __slots__ = ("scope", "amostrado")
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.amostrado: Optional[bool] = None
+
+    @property
+    def rota(self) -> Optional[str]:
+        rota = self.scope.get("route")
+        return getattr(rota, "path", None)
+
+_contexto: ContextVar[Optional[ContextoRequisicao]] = ContextVar("contexto_log", default=None)
+
+def iniciar_requisicao(scope):
+    return _contexto.set(ContextoRequisicao(scope))
+
+def encerrar_requisicao(token):
+    _contexto.reset(token)
+
+def ler_taxas_por_rota(valor: str) -> Dict[str, float]:
+    taxas = {}
+    for item in valor.split(","):
+        if "=" in item:
+            rota, taxa = item.rsplit("=", 1)
+            taxas[rota.strip()] = float(taxa)
+    return taxas
+
+class FiltroRequisicao(logging.Filter):
+    """Anexa método e rota ao registro e aplica a amostragem dos logs DEBUG.
+
+    Roda na thread que gerou o registro, antes da fila, porque o contexto da
+    requisição não existe na thread do listener.
+    """
+
+    def __init__(self, taxa_padrao: float = 1.0, taxas_por_rota: Optional[Dict[str, float]] = None):
+        super().__init__()
+        self.taxa_padrao = taxa_padrao
+        self.taxas_por_rota = taxas_por_rota or {}
+
+    def _sortear(self, rota: Optional[str]) -> bool:
+        taxa = self.taxas_por_rota.get(rota, self.taxa_padrao)
+        return taxa >= 1.0 or random.random() < taxa
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        contexto = _contexto.get()
+        if contexto is None:
+            return record.levelno > logging.DEBUG or self._sortear(None)
+        record.method = contexto.scope.get("method")
+        record.route = contexto.rota
+        if record.levelno > logging.DEBUG:
+            return True
+        if contexto.amostrado is None:
+            contexto.amostrado = self._sortear(record.route)
+        return contexto.amostrado
+
+class FormatadorJSON(logging.Formatter):
+    """Um objeto JSON por linha"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        dados = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for campo in ("method", "route"):
+            valor = getattr(record, campo, None)
+            if valor is not None:
+                dados[campo] = valor
+        if record.exc_info:
+            dados["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(dados, ensure_ascii=False, default=str)
+
+class QueueHandlerSemFormatacao(QueueHandler):
+    """QueueHandler que enfileira o registro sem formatá-lo.
+
+    O QueueHandler padrão formata a mensagem antes de enfileirar para que o
+    registro possa ser serializado; a fila aqui é em memória, então msg e
+    args seguem como estão e a mensagem é montada na thread do listener.
+    Os argumentos de log devem ser valores que não mudam depois da chamada.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+_listener: Optional[QueueListener] = None
+
+def configurar_logging(
+    nivel: str = LOG_LEVEL,
+    formato: str = LOG_FORMAT,
+    assincrono: bool = LOG_ASYNC,
+    stream=None,
+) -> logging.Handler:
+    """Substitui os handlers do logger raiz; pode ser chamada de novo para reconfigurar"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+    saida = logging.StreamHandler(stream)
+    saida.setFormatter(FormatadorJSON() if formato == "json" else logging.Formatter(FORMATO_TEXTO))
+
+    if assincrono:
+        fila = queue.SimpleQueue()
+        handler: logging.Handler = QueueHandlerSemFormatacao(fila)
+        _listener = QueueListener(fila, saida)
+        _listener.start()
+    else:
+        handler = saida
+    handler.addFilter(FiltroRequisicao(LOG_DEBUG_SAMPLE_RATE, ler_taxas_por_rota(LOG_DEBUG_SAMPLE_ROUTES)))
+
+    raiz = logging.getLogger()
+    for antigo in list(raiz.handlers):
+        raiz.removeHandler(antigo)
+    raiz.addHandler(handler)
+    raiz.setLevel(nivel)
+    return handler
+
+def encerrar_logging():
+    """Esvazia a fila e para a thread do listener"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+atexit.register(encerrar_logging)
@@ -0,0 +1,180 @@
+"""Métricas no formato Prometheus expostas em /metrics.
+
+As métricas de requisição são atualizadas por um middleware ASGI puro; o
+tempo de banco de cada requisição vem de eventos do SQLAlchemy acumulados em
+um contextvar. Cache do dashboard e pool de conexões são lidos apenas no
+momento da coleta, sem custo no caminho das requisições.
+"""
+
+from contextvars import ContextVar
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, REGISTRY, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from typing import Optional
+import logging
+import os
+import time
+from . import cache, database
+
+logger = logging.getLogger(__name__)
+
+ROTA_NAO_MAPEADA = "nao_mapeada"
+
+# Requisições com mais comandos SQL que isso geram um aviso (0 desativa)
+DB_QUERY_WARN_THRESHOLD = int(os.getenv("DB_QUERY_WARN_THRESHOLD", "20"))
+
+HEADER_CONSULTAS = "X-DB-Queries"
+HEADER_TEMPO = "X-DB-Time-ms"
+
+REQUISICOES = Counter(
+    "http_requests_total",
+    "Requisições HTTP atendidas",
+    ["method", "route", "status"],
+)
+EM_ANDAMENTO = Gauge(
+    "http_requests_in_progress",
+    "Requisições HTTP em andamento",
+)
+LATENCIA = Histogram(
+    "http_request_duration_seconds",
+    "Latência das requisições HTTP",
+    ["method", "route", "status"],
+)
+TEMPO_BANCO = Histogram(
+    "http_request_db_duration_seconds",
+    "Tempo gasto em comandos SQL por requisição",
+    ["method", "route"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+CONSULTAS_BANCO = Histogram(
+    "http_request_db_queries",
+    "Comandos SQL emitidos por requisição",
+    ["method", "route"],
+    buckets=(1, 2, 3, 5, 8, 13, 21, 34, 55, 100),
+)
+
+class ConsultasRequisicao:
+    """Comandos SQL e tempo de banco acumulados durante uma requisição"""
+    __slots__ = ("quantidade", "tempo")
+
+    def __init__(self):
+        self.quantidade = 0
+        self.tempo = 0.0
+
+_consultas: ContextVar[Optional[ConsultasRequisicao]] = ContextVar("consultas_requisicao", default=None)
+
+def consultas_atuais() -> Optional[ConsultasRequisicao]:
+    return _consultas.get()
+
+# Os eventos são registrados na classe Engine para valer para o engine
+# síncrono, o assíncrono (sync_engine) e os criados nos testes
+@event.listens_for(Engine, "before_cursor_execute")
+def _antes_de_executar(conn, cursor, statement, parameters, context, executemany):
+    if _consultas.get() is not None:
+        conn.info.setdefault("inicio_consultas", []).append(time.perf_counter())
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _depois_de_executar(conn, cursor, statement, parameters, context, executemany):
+    consultas = _consultas.get()
+    inicios = conn.info.get("inicio_consultas")
+    if consultas is None or not inicios:
+        return
+    consultas.quantidade += 1
+    consultas.tempo += time.perf_counter() - inicios.pop()
+
+@event.listens_for(Engine, "handle_error")
+def _erro_ao_executar(contexto):
+    inicios = contexto.connection.info.get("inicio_consultas") if contexto.connection is not None else None
+    if inicios:
+        inicios.pop()
+
+def _rota(scope) -> str:
+    rota = scope.get("route")
+    return getattr(rota, "path", ROTA_NAO_MAPEADA)
+
+class MetricasMiddleware:
+    """Middleware ASGI que registra contagem, latência e tempo de banco por rota.
+
+    Também devolve nos headers X-DB-Queries e X-DB-Time-ms os comandos SQL
+    emitidos até o início da resposta; em respostas em streaming, os
+    comandos executados durante o envio do corpo entram só nas métricas.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        consultas = ConsultasRequisicao()
+
+        async def enviar(mensagem):
+            nonlocal status
+            if mensagem["type"] == "http.response.start":
+                status = mensagem["status"]
+                headers = MutableHeaders(scope=mensagem)
+                headers.append(HEADER_CONSULTAS, str(consultas.quantidade))
+                headers.append(HEADER_TEMPO, f"{consultas.tempo * 1000:.2f}")
+            await send(mensagem)
+
+        token = _consultas.set(consultas)
+        EM_ANDAMENTO.inc()
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            duracao = time.perf_counter() - inicio
+            EM_ANDAMENTO.dec()
+            _consultas.reset(token)
+            metodo = scope["method"]
+            rota = _rota(scope)
+            REQUISICOES.labels(metodo, rota, status).inc()
+            LATENCIA.labels(metodo, rota, status).observe(duracao)
+            TEMPO_BANCO.labels(metodo, rota).observe(consultas.tempo)
+            CONSULTAS_BANCO.labels(metodo, rota).observe(consultas.quantidade)
+            if DB_QUERY_WARN_THRESHOLD and consultas.quantidade > DB_QUERY_WARN_THRESHOLD:
+                logger.warning(
+                    "Possível N+1: %s %s emitiu %s comandos SQL (%.1f ms), limite %s",
+                    metodo, rota, consultas.quantidade, consultas.tempo * 1000, DB_QUERY_WARN_THRESHOLD
+                )
+
+class ColetorAplicacao:
+    """Expõe os contadores do cache do dashboard e o estado do pool na coleta"""
+
+    def collect(self):
+        stats = cache.dashboard_cache.stats()
+        resultados = CounterMetricFamily(
+            "dashboard_cache_requests", "Consultas ao cache do dashboard por resultado", labels=["resultado"]
+        )
+        resultados.add_metric(["hit"], stats["hits"])
+        resultados.add_metric(["stale"], stats["stale_hits"])
+        resultados.add_metric(["miss"], stats["misses"])
+        yield resultados
+
+        conexoes = GaugeMetricFamily("db_pool_connections", "Conexões do pool por estado", labels=["engine", "estado"])
+        checkouts = CounterMetricFamily("db_pool_checkouts", "Conexões obtidas do pool", labels=["engine"])
+        timeouts = CounterMetricFamily("db_pool_timeouts", "Timeouts esperando conexão do pool", labels=["engine"])
+        espera = CounterMetricFamily("db_pool_wait_seconds", "Tempo total esperando conexão do pool", labels=["engine"])
+        for nome, pool in database.get_pool_stats().items():
+            if "conexoes_em_uso" in pool:
+                conexoes.add_metric([nome, "em_uso"], pool["conexoes_em_uso"])
+                conexoes.add_metric([nome, "livres"], pool["conexoes_livres"])
+                conexoes.add_metric([nome, "overflow"], pool["overflow"])
+            if "checkouts" in pool:
+                checkouts.add_metric([nome], pool["checkouts"])
+                timeouts.add_metric([nome], pool["timeouts"])
+                espera.add_metric([nome], pool["espera_total_ms"] / 1000)
+        yield conexoes
+        yield checkouts
+        yield timeouts
+        yield espera
+
+REGISTRY.register(ColetorAplicacao())
+
+def exportar() -> bytes:
+    return generate_latest(REGISTRY)
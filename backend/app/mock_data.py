@@ -1,5 +1,6 @@
 from .models import Produtor, Fazenda, Cultura
 from .database import SessionLocal
+from . import rollup
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,6 +11,9 @@ def create_mock_data():
     try:
         if db.query(Produtor).count() > 0:
             logger.info("Dados já existem, pulando criação de mock data")
+            if rollup.esta_vazio(db):
+                # Banco anterior ao rollup do dashboard: popula a partir da base
+                rollup.rebuild(db)
             return
 
         logger.info("Criando dados de exemplo...")
@@ -132,10 +136,11 @@ def create_mock_data():
         db.add_all([cultura6, cultura7, cultura8])
 
         db.commit()
+        rollup.rebuild(db)
         logger.info("Dados de exemplo criados com sucesso!")
 
     except Exception as e:
-        logger.error(f"Erro ao criar dados de exemplo: {e}")
+        logger.error("Erro ao criar dados de exemplo: %s", e)
         db.rollback()
     finally:
         db.close() 
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
@@ -21,24 +21,48 @@ class Fazenda(Base):
     nome = Column(String, nullable=False)
     cidade = Column(String, nullable=False)
     estado = Column(String, nullable=False)
-    area_total = Column(Float, nullable=False)
+    area_total = Column(Float, nullable=False, index=True)
     area_agricultavel = Column(Float, nullable=False)
     area_vegetacao = Column(Float, nullable=False)
-    produtor_id = Column(Integer, ForeignKey("produtores.id"), nullable=False)
+    produtor_id = Column(Integer, ForeignKey("produtores.id"), nullable=False, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     produtor = relationship("Produtor", back_populates="fazendas")
     culturas = relationship("Cultura", back_populates="fazenda", cascade="all, delete-orphan")
 
+    # Filtros de listagem por estado (e cidade) e agrupamento do dashboard por estado
+    __table_args__ = (Index("ix_fazendas_estado_cidade", "estado", "cidade"),)
+
 class Cultura(Base):
     __tablename__ = "culturas"
     
     id = Column(Integer, primary_key=True, index=True)
     nome = Column(String, nullable=False)
     safra = Column(String, nullable=False)
-    fazenda_id = Column(Integer, ForeignKey("fazendas.id"), nullable=False)
+    fazenda_id = Column(Integer, ForeignKey("fazendas.id"), nullable=False, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
-    fazenda = relationship("Fazenda", back_populates="culturas") 
\ No newline at end of file
+    fazenda = relationship("Fazenda", back_populates="culturas")
+
+    # Filtro por cultura/safra resolvido só no índice (semi-join por fazenda_id)
+    __table_args__ = (Index("ix_culturas_nome_safra", "nome", "safra", "fazenda_id"),)
+
+class DashboardRollup(Base):
+    """Agregados do dashboard mantidos incrementalmente pelas operações de escrita"""
+    __tablename__ = "dashboard_rollup"
+
+    dimensao = Column(String, primary_key=True)  # "estado" ou "cultura"
+    chave = Column(String, primary_key=True)
+    quantidade = Column(Integer, nullable=False, default=0)
+    area_total = Column(Float, nullable=False, default=0)
+    area_agricultavel = Column(Float, nullable=False, default=0)
+    area_vegetacao = Column(Float, nullable=False, default=0)
+
+class VersaoDados(Base):
+    """Contador incrementado em toda transação que altera produtores, fazendas ou culturas"""
+    __tablename__ = "versao_dados"
+
+    chave = Column(String, primary_key=True)
+    valor = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,60 @@
+import base64
+import json
+from typing import Optional, Tuple
+
+
+class CursorInvalido(ValueError):
+    pass
+
+
+def _encode(payload: dict) -> str:
+    texto = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(texto).decode().rstrip("=")
+
+
+def _decode(cursor: str) -> dict:
+    try:
+        padding = "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(cursor + padding))
+    except (ValueError, TypeError) as exc:
+        raise CursorInvalido("Cursor inválido") from exc
+    if not isinstance(payload, dict):
+        raise CursorInvalido("Cursor inválido")
+    return payload
+
+
+def encode_cursor(ultimo_id: int) -> str:
+    """Gera um cursor opaco a partir do último ID retornado na página"""
+    return _encode({"id": ultimo_id})
+
+
+def decode_cursor(cursor: str) -> int:
+    """Extrai o último ID visto de um cursor gerado por encode_cursor"""
+    ultimo_id = _decode(cursor).get("id")
+    if not isinstance(ultimo_id, int):
+        raise CursorInvalido("Cursor inválido")
+    return ultimo_id
+
+
+def encode_cursor_relevancia(relevancia: float, tipo: str, ultimo_id: int) -> str:
+    """Cursor de resultados ordenados por relevância: (relevância, tipo, ID) do último item"""
+    return _encode({"r": relevancia, "t": tipo, "id": ultimo_id})
+
+
+def decode_cursor_relevancia(cursor: str) -> Tuple[float, str, int]:
+    payload = _decode(cursor)
+    relevancia, tipo, ultimo_id = payload.get("r"), payload.get("t"), payload.get("id")
+    if (
+        not isinstance(relevancia, (int, float)) or isinstance(relevancia, bool)
+        or not isinstance(tipo, str)
+        or not isinstance(ultimo_id, int)
+    ):
+        raise CursorInvalido("Cursor inválido")
+    return float(relevancia), tipo, ultimo_id
+
+
+def next_cursor(itens: list, limit: int) -> Optional[str]:
+    """Retorna o cursor da próxima página, ou None se a página não estiver cheia"""
+    if limit <= 0 or len(itens) < limit:
+        return None
+    return encode_cursor(itens[-1].id)
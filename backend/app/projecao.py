@@ -0,0 +1,107 @@
+"""Campos esparsos (fields=) e expansão de relações (expand=) nas leituras.
+
+Sem os parâmetros, produtores e fazendas saem com o grafo completo, como
+sempre. Com qualquer um deles, a resposta traz só os campos escalares pedidos
+(todos, se fields não for informado) e só as relações listadas em expand:
+
+    ?fields=id,nome,cpf_cnpj                    produtor sem fazendas
+    ?expand=fazendas                            fazendas sem culturas
+    ?expand=fazendas.culturas&fields=id,fazendas.nome,fazendas.culturas.nome
+
+Campos de uma relação (fazendas.nome) exigem a relação em expand. Sem
+expansão, a leitura é uma consulta de projeção (só as colunas pedidas, sem
+instanciar o ORM); com expansão, o ORM carrega as colunas pedidas com
+load_only e uma consulta selectin por relação expandida.
+"""
+
+from pydantic import BaseModel
+from sqlalchemy.orm import load_only, selectinload
+from typing import Dict, List, Optional, Tuple, Type
+from . import models, schemas, respostas
+
+MODELOS = {
+    schemas.Produtor: models.Produtor,
+    schemas.Fazenda: models.Fazenda,
+    schemas.Cultura: models.Cultura,
+}
+
+class ProjecaoInvalida(ValueError):
+    pass
+
+class Projecao:
+    """Campos escalares e relações expandidas de um schema de resposta"""
+
+    def __init__(self, schema: Type[BaseModel], campos: Tuple[str, ...], expandir: Dict[str, "Projecao"]):
+        self.schema = schema
+        self.modelo = MODELOS[schema]
+        self.campos = campos
+        self.expandir = expandir
+
+    @property
+    def plana(self) -> bool:
+        return not self.expandir
+
+    def colunas(self) -> list:
+        """Colunas da consulta de projeção; o id vai sempre, para o cursor"""
+        nomes = ("id",) + tuple(c for c in self.campos if c != "id")
+        return [getattr(self.modelo, nome) for nome in nomes]
+
+    def opcoes(self) -> list:
+        """Opções de carga do ORM: só as colunas pedidas e as relações expandidas"""
+        opcoes = [load_only(*(getattr(self.modelo, c) for c in self.campos))]
+        for nome, sub in self.expandir.items():
+            opcoes.append(selectinload(getattr(self.modelo, nome)).options(*sub.opcoes()))
+        return opcoes
+
+def _escalares(schema: Type[BaseModel]) -> Tuple[str, ...]:
+    return tuple(nome for nome, aninhado, _ in respostas._plano(schema) if aninhado is None)
+
+def _relacoes(schema: Type[BaseModel]) -> Dict[str, Type[BaseModel]]:
+    return {nome: aninhado for nome, aninhado, _ in respostas._plano(schema) if aninhado is not None}
+
+def _nomes(valor: Optional[str], parametro: str) -> List[str]:
+    if valor is None:
+        return []
+    nomes = [nome.strip() for nome in valor.split(",")]
+    if not all(nomes):
+        raise ProjecaoInvalida(f"{parametro} tem um nome vazio")
+    return nomes
+
+def _montar(caminho: Tuple[str, ...], esquemas: Dict[Tuple[str, ...], Type[BaseModel]], pedidos) -> Projecao:
+    escalares = _escalares(esquemas[caminho])
+    campos = tuple(c for c in escalares if c in pedidos[caminho]) if pedidos[caminho] else escalares
+    expandir = {
+        filho[-1]: _montar(filho, esquemas, pedidos)
+        for filho in esquemas if len(filho) == len(caminho) + 1 and filho[:-1] == caminho
+    }
+    return Projecao(esquemas[caminho], campos, expandir)
+
+def ler(schema: Type[BaseModel], fields: Optional[str], expand: Optional[str]) -> Optional[Projecao]:
+    """Projeção pedida na query string, ou None para o grafo completo"""
+    if fields is None and expand is None:
+        return None
+
+    # Caminho da relação ("fazendas", "culturas") -> schema
+    esquemas: Dict[Tuple[str, ...], Type[BaseModel]] = {(): schema}
+    for nome in _nomes(expand, "expand"):
+        caminho, atual = (), schema
+        for parte in nome.split("."):
+            relacoes = _relacoes(atual)
+            if parte not in relacoes:
+                raise ProjecaoInvalida(f"Relação desconhecida em expand: {nome}")
+            caminho, atual = caminho + (parte,), relacoes[parte]
+            esquemas[caminho] = atual
+
+    pedidos = {caminho: set() for caminho in esquemas}
+    for nome in _nomes(fields, "fields"):
+        *relacao, campo = nome.split(".")
+        relacao = tuple(relacao)
+        if relacao not in esquemas:
+            raise ProjecaoInvalida(f"Campo de relação não expandida em fields: {nome} (use expand={'.'.join(relacao)})")
+        if campo in _relacoes(esquemas[relacao]):
+            raise ProjecaoInvalida(f"Relações vão em expand, não em fields: {nome}")
+        if campo not in _escalares(esquemas[relacao]):
+            raise ProjecaoInvalida(f"Campo desconhecido em fields: {nome}")
+        pedidos[relacao].add(campo)
+
+    return _montar((), esquemas, pedidos)
@@ -0,0 +1,92 @@
+"""Serialização rápida das respostas de leitura.
+
+O caminho padrão do FastAPI valida os objetos do ORM contra o response_model
+(from_attributes), converte o resultado para tipos JSON e só então aplica o
+json da stdlib. Para páginas de produtores com fazendas e culturas, quase todo
+esse tempo vai na validação, que lê cada atributo pelo descritor do
+SQLAlchemy.
+
+Aqui os objetos carregados do banco são convertidos direto para dicts,
+seguindo os campos (e a ordem) dos schemas Pydantic de resposta, e codificados
+com orjson. O corpo é o mesmo do caminho padrão; a diferença é que os dados
+lidos do banco não são revalidados na saída. JSON_RAPIDO=false volta ao
+caminho padrão.
+
+Respostas com fields=/expand= (projecao.py) sempre passam por aqui: o
+response_model completo recusaria os campos omitidos.
+"""
+
+from fastapi import Response
+from pydantic import BaseModel
+from sqlalchemy.engine import Row
+from typing import Any, Dict, List, Optional, Tuple, Type, get_args, get_origin
+import orjson
+from .ambiente import env_bool
+
+JSON_RAPIDO = env_bool("JSON_RAPIDO", "true")
+
+class RespostaJSONRapida(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        # OPT_UTC_Z: datetimes em UTC saem com "Z", como no serializador do Pydantic
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+
+# Campo -> schema aninhado (ou None) e se é lista
+Plano = List[Tuple[str, Optional[Type[BaseModel]], bool]]
+
+_planos: Dict[Type[BaseModel], Plano] = {}
+
+def _plano(schema: Type[BaseModel]) -> Plano:
+    plano = _planos.get(schema)
+    if plano is None:
+        plano = []
+        for nome, campo in schema.model_fields.items():
+            anotacao, lista = campo.annotation, False
+            if get_origin(anotacao) in (list, List):
+                anotacao, lista = get_args(anotacao)[0], True
+            aninhado = anotacao if isinstance(anotacao, type) and issubclass(anotacao, BaseModel) else None
+            plano.append((nome, aninhado, lista))
+        _planos[schema] = plano
+    return plano
+
+def para_dict(schema: Type[BaseModel], objeto: Any, projecao=None) -> Dict[str, Any]:
+    """Converte um objeto do ORM (ou linha de uma consulta de projeção) para o
+    dict que `schema` serializaria, limitado à `projecao` se houver"""
+    atributos = objeto._mapping if isinstance(objeto, Row) else objeto.__dict__
+    resultado = {}
+    for nome, aninhado, lista in _plano(schema):
+        sub = None
+        if projecao is not None:
+            if aninhado is None and nome not in projecao.campos:
+                continue
+            if aninhado is not None:
+                sub = projecao.expandir.get(nome)
+                if sub is None:
+                    continue
+        # Atributos carregados ficam no __dict__ da instância; os demais
+        # (expirados ou lazy) passam pelo descritor
+        valor = atributos[nome] if nome in atributos else getattr(objeto, nome)
+        if aninhado is not None and valor is not None:
+            valor = [para_dict(aninhado, item, sub) for item in valor] if lista else para_dict(aninhado, valor, sub)
+        resultado[nome] = valor
+    return resultado
+
+def responder(schema: Type[BaseModel], dados: Any, response: Response, projecao=None):
+    """Resposta rápida para um objeto ou lista de objetos do ORM.
+
+    Os cabeçalhos já definidos em `response` (X-Next-Cursor, ETag) são
+    copiados. Com JSON_RAPIDO=false e sem projeção, devolve `dados` para o
+    caminho padrão.
+    """
+    if not JSON_RAPIDO and projecao is None:
+        return dados
+    if isinstance(dados, list):
+        conteudo = [para_dict(schema, item, projecao) for item in dados]
+    else:
+        conteudo = para_dict(schema, dados, projecao)
+    resposta = RespostaJSONRapida(conteudo)
+    resposta.headers.raw.extend(
+        (nome, valor) for nome, valor in response.headers.raw if nome != b"content-length"
+    )
+    return resposta
@@ -0,0 +1,192 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import func, delete, insert
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List
+import logging
+from . import models, cache, upsert
+
+logger = logging.getLogger(__name__)
+
+ESTADO = "estado"
+CULTURA = "cultura"
+
+AREAS = ("area_total", "area_agricultavel", "area_vegetacao")
+
+# Tolerância para comparar somas de área acumuladas em ponto flutuante
+TOLERANCIA_AREA = 1e-6
+
+def _valor(item, campo):
+    if isinstance(item, dict):
+        return item[campo]
+    return getattr(item, campo)
+
+def _aplicar(db: Session, dimensao: str, deltas: Dict[str, Dict[str, float]]):
+    """Soma os deltas às linhas do rollup, criando as que ainda não existem"""
+    # Chaves em ordem fixa: escritas concorrentes travam as linhas do rollup
+    # sempre na mesma sequência e não entram em deadlock entre si
+    for chave, delta in sorted(deltas.items()):
+        if not any(delta.values()):
+            continue
+        upsert.somar(db, models.DashboardRollup, {"dimensao": dimensao, "chave": chave}, delta)
+
+def _deltas_fazendas(deltas, fazendas: Iterable[Any], sinal: int):
+    for fazenda in fazendas:
+        delta = deltas[_valor(fazenda, "estado")]
+        delta["quantidade"] += sinal
+        for campo in AREAS:
+            delta[campo] += sinal * _valor(fazenda, campo)
+
+def _deltas_culturas(deltas, nomes: Iterable[str], sinal: int):
+    for nome in nomes:
+        deltas[nome]["quantidade"] += sinal
+
+def _novos_deltas_fazendas():
+    return defaultdict(lambda: {"quantidade": 0, "area_total": 0.0, "area_agricultavel": 0.0, "area_vegetacao": 0.0})
+
+def _novos_deltas_culturas():
+    return defaultdict(lambda: {"quantidade": 0})
+
+def registrar_fazendas(db: Session, fazendas: Iterable[Any], sinal: int = 1):
+    """Contabiliza (sinal=1) ou descontabiliza (sinal=-1) fazendas no rollup.
+
+    Aceita objetos do modelo ou dicionários com estado e áreas. Não faz commit:
+    a atualização entra na mesma transação da escrita que a originou. As linhas
+    do rollup são as mais disputadas do esquema; chame por último, logo antes
+    do commit (estados antes de culturas), para segurar os locks o mínimo.
+    """
+    deltas = _novos_deltas_fazendas()
+    _deltas_fazendas(deltas, fazendas, sinal)
+    _aplicar(db, ESTADO, deltas)
+
+def registrar_culturas(db: Session, nomes: Iterable[str], sinal: int = 1):
+    """Contabiliza (sinal=1) ou descontabiliza (sinal=-1) culturas pelo nome"""
+    deltas = _novos_deltas_culturas()
+    _deltas_culturas(deltas, nomes, sinal)
+    _aplicar(db, CULTURA, deltas)
+
+def substituir_fazendas(db: Session, anteriores: Iterable[Any], novas: Iterable[Any]):
+    """Troca um conjunto de fazendas por outro com um único upsert por estado"""
+    deltas = _novos_deltas_fazendas()
+    _deltas_fazendas(deltas, anteriores, -1)
+    _deltas_fazendas(deltas, novas, 1)
+    _aplicar(db, ESTADO, deltas)
+
+def substituir_culturas(db: Session, anteriores: Iterable[str], novas: Iterable[str]):
+    """Troca um conjunto de culturas por outro com um único upsert por nome"""
+    deltas = _novos_deltas_culturas()
+    _deltas_culturas(deltas, anteriores, -1)
+    _deltas_culturas(deltas, novas, 1)
+    _aplicar(db, CULTURA, deltas)
+
+def ler(db: Session) -> Dict[str, Any]:
+    """Monta o payload de schemas.DashboardStats a partir do rollup"""
+    linhas = (
+        db.query(models.DashboardRollup)
+        .filter(models.DashboardRollup.quantidade > 0)
+        .all()
+    )
+    total_fazendas = 0
+    total_hectares = 0.0
+    area_agricultavel = 0.0
+    area_vegetacao = 0.0
+    por_estado = {}
+    por_cultura = {}
+    for linha in linhas:
+        if linha.dimensao == ESTADO:
+            por_estado[linha.chave] = linha.quantidade
+            total_fazendas += linha.quantidade
+            total_hectares += linha.area_total
+            area_agricultavel += linha.area_agricultavel
+            area_vegetacao += linha.area_vegetacao
+        elif linha.dimensao == CULTURA:
+            por_cultura[linha.chave] = linha.quantidade
+
+    return {
+        "total_fazendas": total_fazendas,
+        "total_hectares": total_hectares,
+        "por_estado": por_estado,
+        "por_cultura": por_cultura,
+        "por_uso_solo": {
+            "Área Agricultável": area_agricultavel,
+            "Área de Vegetação": area_vegetacao
+        }
+    }
+
+def calcular_da_base(db: Session) -> List[Dict[str, Any]]:
+    """Recalcula as linhas do rollup varrendo fazendas e culturas uma vez cada"""
+    linhas = []
+    por_estado = db.query(
+        models.Fazenda.estado,
+        func.count(models.Fazenda.id),
+        func.sum(models.Fazenda.area_total),
+        func.sum(models.Fazenda.area_agricultavel),
+        func.sum(models.Fazenda.area_vegetacao)
+    ).group_by(models.Fazenda.estado).all()
+    for estado, quantidade, total, agricultavel, vegetacao in por_estado:
+        linhas.append({
+            "dimensao": ESTADO,
+            "chave": estado,
+            "quantidade": quantidade,
+            "area_total": total or 0.0,
+            "area_agricultavel": agricultavel or 0.0,
+            "area_vegetacao": vegetacao or 0.0,
+        })
+
+    por_cultura = db.query(
+        models.Cultura.nome,
+        func.count(models.Cultura.id)
+    ).group_by(models.Cultura.nome).all()
+    for nome, quantidade in por_cultura:
+        linhas.append({
+            "dimensao": CULTURA,
+            "chave": nome,
+            "quantidade": quantidade,
+            "area_total": 0.0,
+            "area_agricultavel": 0.0,
+            "area_vegetacao": 0.0,
+        })
+    return linhas
+
+def rebuild(db: Session) -> int:
+    """Substitui o conteúdo do rollup pelos valores recalculados da base"""
+    logger.info("Reconstruindo rollup do dashboard")
+    linhas = calcular_da_base(db)
+    db.execute(delete(models.DashboardRollup))
+    if linhas:
+        db.execute(insert(models.DashboardRollup), linhas)
+    db.commit()
+    cache.dashboard_cache.invalidate()
+    logger.info("Rollup do dashboard reconstruído com %s linhas", len(linhas))
+    return len(linhas)
+
+def verificar(db: Session) -> List[Dict[str, Any]]:
+    """Compara o rollup com a base e retorna as divergências encontradas"""
+    esperado = {(l["dimensao"], l["chave"]): l for l in calcular_da_base(db)}
+    atual = {
+        (l.dimensao, l.chave): l
+        for l in db.query(models.DashboardRollup).filter(models.DashboardRollup.quantidade != 0).all()
+    }
+
+    divergencias = []
+    for chave in sorted(set(esperado) | set(atual)):
+        linha_esperada = esperado.get(chave)
+        linha_atual = atual.get(chave)
+        for campo in ("quantidade",) + AREAS:
+            valor_esperado = linha_esperada[campo] if linha_esperada else 0
+            valor_atual = getattr(linha_atual, campo) if linha_atual is not None else 0
+            if campo == "quantidade":
+                igual = valor_esperado == valor_atual
+            else:
+                igual = abs(valor_esperado - valor_atual) <= TOLERANCIA_AREA * max(1.0, abs(valor_esperado))
+            if not igual:
+                divergencias.append({
+                    "dimensao": chave[0],
+                    "chave": chave[1],
+                    "campo": campo,
+                    "esperado": valor_esperado,
+                    "atual": valor_atual,
+                })
+    return divergencias
+
+def esta_vazio(db: Session) -> bool:
+    return db.query(models.DashboardRollup.dimensao).first() is None
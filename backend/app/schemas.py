@@ -8,7 +8,8 @@ class CulturaBase(BaseModel):
     safra: str
 
 class CulturaCreate(CulturaBase):
-    pass
+    # Preenchido na edição do produtor para atualizar a cultura existente
+    id: Optional[int] = None
 
 class Cultura(CulturaBase):
     id: int
@@ -27,6 +28,11 @@ class FazendaBase(BaseModel):
     area_agricultavel: float
     area_vegetacao: float
     
+    @validator('estado')
+    def normalize_estado(cls, v):
+        # Gravado sempre como sigla em maiúsculas: filtros e rollup comparam por igualdade
+        return v.strip().upper()
+
     @validator('area_total', 'area_agricultavel', 'area_vegetacao')
     def validate_areas(cls, v):
         if v <= 0:
@@ -44,6 +50,8 @@ class FazendaBase(BaseModel):
         return values
 
 class FazendaCreate(FazendaBase):
+    # Preenchido na edição do produtor para atualizar a fazenda existente
+    id: Optional[int] = None
     culturas: Optional[List[CulturaCreate]] = []
 
 class FazendaUpdate(BaseModel):
@@ -54,6 +62,23 @@ class FazendaUpdate(BaseModel):
     area_agricultavel: Optional[float] = None
     area_vegetacao: Optional[float] = None
 
+    @validator('estado')
+    def normalize_estado(cls, v):
+        return v.strip().upper() if v is not None else v
+
+class FiltroFazendas(BaseModel):
+    """Filtros das listagens de fazendas e produtores (query string)
+
+    cultura e safra se aplicam à mesma cultura da fazenda; area_min e
+    area_max limitam a área total, inclusive.
+    """
+    estado: Optional[str] = None
+    cidade: Optional[str] = None
+    cultura: Optional[str] = None
+    safra: Optional[str] = None
+    area_min: Optional[float] = None
+    area_max: Optional[float] = None
+
 class Fazenda(FazendaBase):
     id: int
     produtor_id: int
@@ -136,6 +161,18 @@ class ProdutorBase(BaseModel):
 class ProdutorCreate(ProdutorBase):
     fazendas: Optional[List[FazendaCreate]] = []
 
+    @validator('fazendas')
+    def validate_ids_unicos(cls, fazendas):
+        # Um ID repetido atualizaria a mesma linha duas vezes e contaria o
+        # registro em dobro no rollup do dashboard
+        ids_fazendas = [f.id for f in fazendas or [] if f.id is not None]
+        if len(ids_fazendas) != len(set(ids_fazendas)):
+            raise ValueError('ID de fazenda repetido')
+        ids_culturas = [c.id for f in fazendas or [] for c in f.culturas or [] if c.id is not None]
+        if len(ids_culturas) != len(set(ids_culturas)):
+            raise ValueError('ID de cultura repetido')
+        return fazendas
+
 class ProdutorUpdate(BaseModel):
     nome: Optional[str] = None
 
@@ -153,4 +190,30 @@ class DashboardStats(BaseModel):
     total_hectares: float
     por_estado: dict
     por_cultura: dict
-    por_uso_solo: dict 
\ No newline at end of file
+    por_uso_solo: dict
+
+class DashboardCacheStats(BaseModel):
+    ttl: float
+    stale: float
+    geracao: int
+    hits: int
+    stale_hits: int
+    misses: int
+
+class ResultadoBusca(BaseModel):
+    tipo: str
+    id: int
+    nome: str
+    cidade: Optional[str] = None
+    estado: Optional[str] = None
+    produtor_id: Optional[int] = None
+    relevancia: float
+
+class ErroImportacao(BaseModel):
+    linha: int
+    erro: str
+
+class ResultadoImportacao(BaseModel):
+    importados: int
+    total_erros: int
+    erros: List[ErroImportacao]
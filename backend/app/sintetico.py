@@ -0,0 +1,268 @@
+"""Geração de dados sintéticos em volume para testes de carga e escala.
+
+Os produtores são gerados em lotes com NumPy: quantidade de fazendas por
+produtor, estados, áreas, culturas e safras seguem distribuições fixas e a
+mesma seed (com o mesmo tamanho de lote) produz os mesmos dados. Os IDs são
+atribuídos aqui, a partir do maior ID existente, para que cada tabela seja
+carregada sem RETURNING: COPY no PostgreSQL e INSERT em lote nos demais
+bancos.
+
+O CPF/CNPJ de cada produtor é derivado só do ID, e não da seed: cargas
+acrescentadas a uma base existente, com qualquer seed, não repetem documentos
+gerados antes. Produtores cujo documento já foi cadastrado por outro caminho
+(API, importação) são descartados do lote, com fazendas e culturas.
+"""
+
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.engine import Connection, Engine
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import csv
+import io
+import logging
+import numpy as np
+from . import models, documentos, versoes
+
+logger = logging.getLogger(__name__)
+
+TAMANHO_LOTE = 50000
+
+ESTADOS = {
+    "MT": ["Sorriso", "Sinop", "Rondonópolis", "Primavera do Leste", "Lucas do Rio Verde"],
+    "PR": ["Cascavel", "Toledo", "Guarapuava", "Ponta Grossa", "Londrina"],
+    "RS": ["Passo Fundo", "Cruz Alta", "Santa Rosa", "Ijuí", "Tupanciretã"],
+    "GO": ["Rio Verde", "Jataí", "Cristalina", "Mineiros", "Catalão"],
+    "MG": ["Uberlândia", "Unaí", "Patos de Minas", "Uberaba", "Paracatu"],
+    "SP": ["Ribeirão Preto", "Barretos", "Franca", "Sertãozinho", "Presidente Prudente"],
+    "MS": ["Dourados", "Maracaju", "Chapadão do Sul", "Sidrolândia", "Ponta Porã"],
+    "BA": ["Luís Eduardo Magalhães", "Barreiras", "São Desidério", "Formosa do Rio Preto"],
+    "SC": ["Chapecó", "Campos Novos", "Canoinhas", "Xanxerê"],
+    "TO": ["Porto Nacional", "Campos Lindos", "Pedro Afonso"],
+    "MA": ["Balsas", "Tasso Fragoso", "Sambaíba"],
+    "PI": ["Uruçuí", "Baixa Grande do Ribeiro", "Bom Jesus"],
+    "RO": ["Vilhena", "Cerejeiras", "Ji-Paraná"],
+    "PA": ["Paragominas", "Santarém", "Dom Eliseu"],
+}
+PESOS_ESTADOS = [0.19, 0.12, 0.12, 0.10, 0.10, 0.09, 0.08, 0.06, 0.04, 0.03, 0.02, 0.02, 0.02, 0.01]
+
+CULTURAS = ["Soja", "Milho", "Cana-de-açúcar", "Café", "Feijão", "Trigo", "Algodão", "Arroz", "Mandioca", "Laranja"]
+PESOS_CULTURAS = [0.34, 0.24, 0.08, 0.07, 0.06, 0.05, 0.05, 0.04, 0.04, 0.03]
+
+SAFRAS = ["2018", "2019", "2020", "2021", "2022", "2023", "2024"]
+PESOS_SAFRAS = [0.04, 0.06, 0.09, 0.13, 0.18, 0.24, 0.26]
+
+NOMES = ["João", "Maria", "José", "Ana", "Antônio", "Francisca", "Carlos", "Paulo", "Adriana", "Lucas",
+         "Juliana", "Marcos", "Fernanda", "Pedro", "Patrícia", "Rafael", "Aline", "Luiz", "Camila", "Roberto"]
+SOBRENOMES = ["Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves", "Pereira", "Lima", "Gomes",
+              "Costa", "Ribeiro", "Martins", "Carvalho", "Almeida", "Lopes", "Schneider", "Zanella", "Borges", "Moraes"]
+EMPRESAS = ["Agropecuária", "Agrícola", "Agronegócios", "Grãos", "Cerealista"]
+NOMES_FAZENDAS = ["Santa Maria", "Boa Vista", "São João", "Esperança", "Três Irmãos", "Santa Rita", "Bela Vista",
+                  "Primavera", "Água Limpa", "Sol Nascente", "Rio Verde", "Ouro Verde", "Recanto", "Palmeiras"]
+
+# Fração de produtores pessoa jurídica (CNPJ)
+FRACAO_CNPJ = 0.15
+# Multiplicadores coprimos com 10: id -> raiz do documento é uma bijeção
+_MULT_CPF, _MOD_CPF = 387420489, 10 ** 9
+_MULT_CNPJ, _MOD_CNPJ = 43046721, 10 ** 8
+# Documentos por consulta ao procurar os já cadastrados (limite de parâmetros do SQLite)
+_LOTE_CONSULTA = 900
+
+COLUNAS = {
+    "produtores": ("id", "cpf_cnpj", "nome"),
+    "fazendas": ("id", "nome", "cidade", "estado", "area_total", "area_agricultavel", "area_vegetacao", "produtor_id"),
+    "culturas": ("id", "nome", "safra", "fazenda_id"),
+}
+
+def _digitos(numeros: np.ndarray, tamanho: int) -> np.ndarray:
+    potencias = 10 ** np.arange(tamanho - 1, -1, -1, dtype=np.int64)
+    return (numeros[:, None] // potencias) % 10
+
+class GeradorSintetico:
+    def __init__(self, seed: int = 42):
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+
+    def documentos(self, ids: np.ndarray) -> List[str]:
+        """CPF ou CNPJ válido e único para cada ID de produtor
+
+        A seed só decide entre CPF e CNPJ; a raiz vem do ID, então IDs
+        diferentes nunca repetem documento, qualquer que seja a seed.
+        """
+        cnpj = self.rng.random(len(ids)) < FRACAO_CNPJ
+        raizes_cpf = _digitos((ids * _MULT_CPF) % _MOD_CPF, 9)
+        # Raízes com todos os dígitos iguais geram CPFs rejeitados pelo validador
+        cnpj |= (raizes_cpf == raizes_cpf[:, :1]).all(axis=1)
+        raizes_cnpj = np.zeros((int(cnpj.sum()), 12), dtype=np.int64)
+        raizes_cnpj[:, :8] = _digitos((ids[cnpj] * _MULT_CNPJ) % _MOD_CNPJ, 8)
+        raizes_cnpj[:, 11] = 1  # filial 0001
+
+        resultado = np.empty(len(ids), dtype=object)
+        resultado[~cnpj] = documentos.completar(raizes_cpf[~cnpj])
+        resultado[cnpj] = documentos.completar(raizes_cnpj)
+        return resultado.tolist()
+
+    def _nomes(self, quantidade: int, cnpj: Sequence[bool]) -> List[str]:
+        nome = self.rng.integers(0, len(NOMES), quantidade)
+        sobrenome = self.rng.integers(0, len(SOBRENOMES), (quantidade, 2))
+        empresa = self.rng.integers(0, len(EMPRESAS), quantidade)
+        return [
+            f"{EMPRESAS[e]} {SOBRENOMES[s[0]]} Ltda" if j else f"{NOMES[n]} {SOBRENOMES[s[0]]} {SOBRENOMES[s[1]]}"
+            for n, s, e, j in zip(nome.tolist(), sobrenome.tolist(), empresa.tolist(), cnpj)
+        ]
+
+    def gerar_lote(self, produtor_id: int, fazenda_id: int, cultura_id: int, quantidade: int) -> Dict[str, List[Tuple]]:
+        """Gera `quantidade` produtores com IDs a partir dos informados"""
+        rng = self.rng
+        ids = np.arange(produtor_id, produtor_id + quantidade, dtype=np.int64)
+        docs = self.documentos(ids)
+        nomes = self._nomes(quantidade, [len(d) == 14 for d in docs])
+        produtores = list(zip(ids.tolist(), docs, nomes))
+
+        # Maioria com uma ou duas fazendas, cauda longa de grandes grupos
+        fazendas_por_produtor = np.minimum(rng.geometric(0.45, quantidade), 30)
+        total_fazendas = int(fazendas_por_produtor.sum())
+        fazenda_ids = np.arange(fazenda_id, fazenda_id + total_fazendas, dtype=np.int64)
+        donos = np.repeat(ids, fazendas_por_produtor)
+
+        siglas = list(ESTADOS)
+        estados = rng.choice(len(siglas), total_fazendas, p=PESOS_ESTADOS)
+        cidades = [ESTADOS[siglas[e]][c % len(ESTADOS[siglas[e]])]
+                   for e, c in zip(estados.tolist(), rng.integers(0, 60, total_fazendas).tolist())]
+        nomes_fazendas = rng.integers(0, len(NOMES_FAZENDAS), total_fazendas)
+        area_total = np.round(np.clip(rng.lognormal(5.5, 1.3, total_fazendas), 1.0, 250000.0), 2)
+        fracao_agricultavel = rng.uniform(0.2, 0.8, total_fazendas)
+        fracao_vegetacao = rng.uniform(0.05, 1.0, total_fazendas) * (1.0 - fracao_agricultavel)
+        area_agricultavel = np.floor(area_total * fracao_agricultavel * 100) / 100
+        area_vegetacao = np.maximum(np.floor(area_total * fracao_vegetacao * 100) / 100, 0.01)
+        area_agricultavel = np.maximum(np.minimum(area_agricultavel, area_total - area_vegetacao), 0.01)
+
+        fazendas = list(zip(
+            fazenda_ids.tolist(),
+            [f"Fazenda {NOMES_FAZENDAS[n]}" for n in nomes_fazendas.tolist()],
+            cidades,
+            [siglas[e] for e in estados.tolist()],
+            area_total.tolist(),
+            area_agricultavel.tolist(),
+            area_vegetacao.tolist(),
+            donos.tolist(),
+        ))
+
+        culturas_por_fazenda = np.minimum(rng.poisson(2.6, total_fazendas), 12)
+        total_culturas = int(culturas_por_fazenda.sum())
+        culturas = list(zip(
+            range(cultura_id, cultura_id + total_culturas),
+            [CULTURAS[c] for c in rng.choice(len(CULTURAS), total_culturas, p=PESOS_CULTURAS).tolist()],
+            [SAFRAS[s] for s in rng.choice(len(SAFRAS), total_culturas, p=PESOS_SAFRAS).tolist()],
+            np.repeat(fazenda_ids, culturas_por_fazenda).tolist(),
+        ))
+        return {"produtores": produtores, "fazendas": fazendas, "culturas": culturas}
+
+def _copy_postgres(conn: Connection, tabela: str, linhas: List[Tuple]):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(linhas)
+    buffer.seek(0)
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {tabela} ({', '.join(COLUNAS[tabela])}) FROM STDIN WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+
+def carregar(conn: Connection, tabela: str, linhas: List[Tuple]):
+    """Grava as linhas com COPY no PostgreSQL (psycopg2) ou executemany de INSERT"""
+    if not linhas:
+        return
+    if conn.dialect.name == "postgresql" and conn.dialect.driver == "psycopg2":
+        _copy_postgres(conn, tabela, linhas)
+        return
+    colunas = COLUNAS[tabela]
+    if conn.dialect.name == "sqlite":
+        # executemany direto no driver, sem montar um dicionário por linha
+        conn.exec_driver_sql(
+            f"INSERT INTO {tabela} ({', '.join(colunas)}) VALUES ({', '.join('?' * len(colunas))})", linhas
+        )
+        return
+    conn.execute(insert(models.Base.metadata.tables[tabela]), [dict(zip(colunas, linha)) for linha in linhas])
+
+def descartar_existentes(conn: Connection, lote: Dict[str, List[Tuple]]) -> int:
+    """Tira do lote os produtores com documento já cadastrado, com fazendas e culturas"""
+    documentos = [produtor[1] for produtor in lote["produtores"]]
+    tabela = models.Produtor.__table__
+    existentes = set()
+    for i in range(0, len(documentos), _LOTE_CONSULTA):
+        trecho = documentos[i:i + _LOTE_CONSULTA]
+        existentes.update(conn.execute(select(tabela.c.cpf_cnpj).where(tabela.c.cpf_cnpj.in_(trecho))).scalars())
+    if not existentes:
+        return 0
+    produtores = {produtor[0] for produtor in lote["produtores"] if produtor[1] in existentes}
+    fazendas = {fazenda[0] for fazenda in lote["fazendas"] if fazenda[-1] in produtores}
+    lote["produtores"] = [p for p in lote["produtores"] if p[0] not in produtores]
+    lote["fazendas"] = [f for f in lote["fazendas"] if f[0] not in fazendas]
+    lote["culturas"] = [c for c in lote["culturas"] if c[-1] not in fazendas]
+    return len(produtores)
+
+def proximos_ids(conn: Connection) -> Dict[str, int]:
+    return {
+        tabela: (conn.execute(select(func.max(models.Base.metadata.tables[tabela].c.id))).scalar() or 0) + 1
+        for tabela in COLUNAS
+    }
+
+def limpar(conn: Connection):
+    if conn.dialect.name == "postgresql":
+        conn.execute(text("TRUNCATE culturas, fazendas, produtores, dashboard_rollup RESTART IDENTITY"))
+        versoes.incrementar(conn)
+        return
+    for tabela in ("culturas", "fazendas", "produtores", "dashboard_rollup"):
+        conn.execute(models.Base.metadata.tables[tabela].delete())
+    versoes.incrementar(conn)
+
+def _ajustar_sequencias(conn: Connection):
+    # O COPY com IDs explícitos não avança as sequências do PostgreSQL
+    if conn.dialect.name != "postgresql":
+        return
+    for tabela in COLUNAS:
+        conn.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{tabela}', 'id'), "
+            f"COALESCE((SELECT MAX(id) FROM {tabela}), 1))"
+        ))
+
+def gerar(
+    engine: Engine,
+    produtores: int,
+    seed: int = 42,
+    tamanho_lote: int = TAMANHO_LOTE,
+    progresso: Optional[Callable[[Dict[str, int]], Any]] = None,
+) -> Dict[str, int]:
+    """Gera e grava `produtores` produtores com fazendas e culturas.
+
+    Cada lote é gravado em uma transação própria. O rollup do dashboard não é
+    atualizado aqui: chame rollup.rebuild ao final da carga. Produtores com
+    documento já cadastrado são descartados (descartar_existentes) e não
+    entram nos totais.
+    """
+    gerador = GeradorSintetico(seed)
+    totais = {tabela: 0 for tabela in COLUNAS}
+    with engine.connect() as conn:
+        ids = proximos_ids(conn)
+        conn.rollback()
+        restantes = produtores
+        while restantes > 0:
+            quantidade = min(tamanho_lote, restantes)
+            lote = gerador.gerar_lote(ids["produtores"], ids["fazendas"], ids["culturas"], quantidade)
+            # Os IDs dos descartados ficam vagos; os próximos lotes seguem depois deles
+            for tabela in COLUNAS:
+                ids[tabela] += len(lote[tabela])
+            with conn.begin():
+                descartados = descartar_existentes(conn, lote)
+                for tabela in COLUNAS:
+                    carregar(conn, tabela, lote[tabela])
+                versoes.incrementar(conn)
+            if descartados:
+                logger.warning("%s produtores sintéticos descartados: CPF/CNPJ já cadastrado", descartados)
+            for tabela in COLUNAS:
+                totais[tabela] += len(lote[tabela])
+            restantes -= quantidade
+            logger.debug("Lote sintético gravado: %s produtores", quantidade)
+            if progresso is not None:
+                progresso(totais)
+        with conn.begin():
+            _ajustar_sequencias(conn)
+    return totais
@@ -0,0 +1,38 @@
+"""Upsert que soma valores a uma linha, usado pelos contadores do banco.
+
+dashboard_rollup (rollup.py) e versao_dados (versoes.py) são linhas de
+contadores: cada escrita soma deltas à linha da chave, criando-a na primeira
+vez. No PostgreSQL e no SQLite isso é um INSERT ... ON CONFLICT DO UPDATE;
+nos demais bancos, um UPDATE seguido de INSERT se nenhuma linha mudou.
+"""
+
+from sqlalchemy import insert, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from typing import Any, Dict, Union
+
+_UPSERT_DIALETOS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+def somar(db: Union[Session, Connection], tabela, chave: Dict[str, Any], deltas: Dict[str, Any]):
+    """Soma `deltas` às colunas da linha com a chave primária `chave`.
+
+    Se a linha não existe, é criada com os próprios deltas. Não faz commit.
+    """
+    dialeto = db.get_bind().dialect if isinstance(db, Session) else db.dialect
+    incrementos = {campo: getattr(tabela, campo) + valor for campo, valor in deltas.items()}
+    insert_dialeto = _UPSERT_DIALETOS.get(dialeto.name)
+    if insert_dialeto is not None:
+        db.execute(
+            insert_dialeto(tabela).values(**chave, **deltas)
+            .on_conflict_do_update(index_elements=[getattr(tabela, c) for c in chave], set_=incrementos)
+        )
+        return
+    resultado = db.execute(
+        update(tabela).where(*(getattr(tabela, c) == valor for c, valor in chave.items())).values(incrementos)
+    )
+    if resultado.rowcount == 0:
+        db.execute(insert(tabela).values(**chave, **deltas))
@@ -0,0 +1,101 @@
+"""Versão dos dados para respostas condicionais (ETag / If-None-Match).
+
+Toda transação que insere, altera ou remove produtores, fazendas ou culturas
+incrementa models.VersaoDados no próprio commit, seja pela unidade de
+trabalho do ORM (flush) ou por insert/update/delete executados na sessão. O
+contador fica no banco, então vale entre processos e réplicas da API.
+
+As leituras consultam a versão antes dos dados: se uma escrita acontecer no
+meio, a resposta sai com a versão anterior e a próxima requisição condicional
+recebe o corpo novo, nunca um 304 indevido.
+"""
+
+from sqlalchemy import event, select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from typing import Any, Optional, Union
+import hashlib
+import json
+from . import models, upsert
+
+CHAVE = "dados"
+
+# Tabelas cuja alteração muda a versão (incluem o grafo das respostas)
+RASTREADAS = {models.Produtor.__table__, models.Fazenda.__table__, models.Cultura.__table__}
+
+_ALTERADO = "versao_dados_alterada"
+
+def atual(db: Session) -> int:
+    valor = db.execute(
+        select(models.VersaoDados.valor).where(models.VersaoDados.chave == CHAVE)
+    ).scalar()
+    return valor or 0
+
+def incrementar(db: Union[Session, Connection]):
+    """Soma 1 à versão; a linha é criada na primeira escrita se não existir.
+
+    Chamado automaticamente no commit das sessões; cargas feitas direto em
+    uma Connection (app.sintetico) chamam explicitamente.
+    """
+    upsert.somar(db, models.VersaoDados, {"chave": CHAVE}, {"valor": 1})
+
+def _marcar(session: Session):
+    session.info[_ALTERADO] = True
+
+@event.listens_for(Session, "do_orm_execute")
+def _registrar_execucao(estado):
+    if (estado.is_insert or estado.is_update or estado.is_delete) and estado.bind_mapper is not None:
+        if estado.bind_mapper.local_table in RASTREADAS:
+            _marcar(estado.session)
+
+@event.listens_for(Session, "after_flush")
+def _registrar_flush(session, flush_context):
+    for objeto in (*session.new, *session.dirty, *session.deleted):
+        if getattr(objeto, "__table__", None) in RASTREADAS:
+            _marcar(session)
+            return
+
+@event.listens_for(Session, "before_commit")
+def _incrementar_no_commit(session):
+    # before_commit vem antes do flush final do commit
+    if session.new or session.dirty or session.deleted:
+        session.flush()
+    if session.info.pop(_ALTERADO, False):
+        incrementar(session)
+
+@event.listens_for(Session, "after_rollback")
+def _descartar(session):
+    session.info.pop(_ALTERADO, None)
+
+# ETags fracos (W/): a mesma versão é servida com e sem gzip, e um validador
+# forte exigiria bytes idênticos em cada codificação (RFC 9110, 8.8.1)
+def etag(prefixo: str, versao: int, recurso: Optional[str] = None) -> str:
+    """ETag da versão dos dados; `recurso` (caminho e query) amarra o ETag à URL.
+
+    Sem ele, o ETag copiado de qualquer outro recurso (ou de um ID que não
+    existe) casaria com a mesma versão e receberia 304.
+    """
+    if recurso is None:
+        return f'W/"{prefixo}-{versao}"'
+    resumo = hashlib.sha1(recurso.encode()).hexdigest()[:12]
+    return f'W/"{prefixo}-{versao}-{resumo}"'
+
+def recurso(request) -> str:
+    """Caminho e query da requisição, na forma usada por etag()"""
+    return f"{request.url.path}?{request.url.query}"
+
+def etag_conteudo(prefixo: str, dados: Any) -> str:
+    """ETag derivado do conteúdo, para respostas pequenas servidas de cache"""
+    resumo = hashlib.sha1(json.dumps(dados, sort_keys=True, default=str).encode()).hexdigest()[:16]
+    return f'W/"{prefixo}-{resumo}"'
+
+def _opaca(tag: str) -> str:
+    return tag[2:] if tag.startswith("W/") else tag
+
+def corresponde(if_none_match: Optional[str], valor: str) -> bool:
+    """Comparação fraca do If-None-Match (RFC 9110), com suporte a listas e *"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return _opaca(valor) in (_opaca(c.strip()) for c in if_none_match.split(","))
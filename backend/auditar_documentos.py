@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Auditoria dos CPFs/CNPJs cadastrados
+
+Lê a coluna produtores.cpf_cnpj em blocos, valida cada bloco de uma vez com
+app.documentos e reporta os documentos inválidos ou não normalizados.
+"""
+
+import sys
+import os
+import argparse
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import SessionLocal
+from app import documentos
+import logging
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunk", type=int, default=documentos.TAMANHO_CHUNK_AUDITORIA, help="Documentos validados por bloco")
+    parser.add_argument("--limite", type=int, default=100, help="Máximo de problemas listados no log (0 lista todos)")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    inicio = time.perf_counter()
+    total = 0
+    try:
+        for problema in documentos.auditar(db, args.chunk):
+            total += 1
+            if not args.limite or total <= args.limite:
+                logger.warning("Produtor ID %s (%s): %s", problema["id"], problema["cpf_cnpj"], problema["erro"])
+    finally:
+        db.close()
+
+    duracao = time.perf_counter() - inicio
+    if total:
+        logger.error("%s documentos com problema encontrados em %.1f s", total, duracao)
+        return 1
+    logger.info("Todos os documentos são válidos (%.1f s)", duracao)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Teste de carga ponta a ponta: popula um banco local com app.sintetico, sobe
+o `app` de main.py com uvicorn e reproduz um mix de tráfego com usuários
+concorrentes. O relatório traz vazão e latências p50/p95/p99 por rota.
+
+Operações do mix (pesos relativos em --mix):
+    dashboard  GET  /api/v1/dashboard/ (polling)
+    listar     GET  /api/v1/produtores/ seguindo o X-Next-Cursor
+    detalhe    GET  /api/v1/produtores/{produtor_id}
+    criar      POST /api/v1/produtores/ com fazendas e culturas aninhadas
+    editar     PUT  /api/v1/produtores/{produtor_id} de um produtor criado na carga
+
+Uso:
+    python benchmarks/carga.py --produtores 10000 --usuarios 50 --duracao 30
+    python benchmarks/carga.py --database-url postgresql://... --mix dashboard=50,listar=20,detalhe=20,criar=5,editar=5
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+import httpx
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+
+from app import documentos, models, rollup, sintetico
+from concurrency import aguardar, percentil, subir_servidor
+
+MIX_PADRAO = "dashboard=30,listar=25,detalhe=30,criar=10,editar=5"
+
+
+def ler_mix(valor: str):
+    mix = {}
+    for item in valor.split(","):
+        nome, peso = item.split("=")
+        mix[nome.strip()] = float(peso)
+    desconhecidas = set(mix) - set(OPERACOES)
+    if desconhecidas:
+        raise SystemExit(f"Operações desconhecidas no mix: {', '.join(sorted(desconhecidas))}")
+    return mix
+
+
+def popular(url: str, produtores: int, seed: int) -> int:
+    """Gera os produtores sintéticos e retorna o maior ID de produtor da base"""
+    engine = create_engine(url)
+    models.Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    try:
+        if produtores:
+            sintetico.gerar(engine, produtores, seed=seed)
+            rollup.rebuild(db)
+        return db.query(func.max(models.Produtor.id)).scalar() or 0
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def cnpj_carga(i: int) -> str:
+    # Filial 0007: não colide com os documentos do gerador sintético (0001)
+    raiz = [int(d) for d in f"{i % 10 ** 8:08d}"] + [0, 0, 0, 7]
+    return documentos.completar(np.array([raiz]))[0]
+
+
+def payload_produtor(i: int):
+    return {
+        "cpf_cnpj": cnpj_carga(i),
+        "nome": f"Produtor Carga {i}",
+        "fazendas": [
+            {
+                "nome": f"Fazenda Carga {i}-{j}", "cidade": "Sorriso", "estado": "MT",
+                "area_total": 1000.0, "area_agricultavel": 600.0, "area_vegetacao": 300.0,
+                "culturas": [{"nome": "Soja", "safra": "2024"}, {"nome": "Milho", "safra": "2024"}],
+            }
+            for j in range(2)
+        ],
+    }
+
+
+def payload_edicao(produtor, rodada: int):
+    return {
+        "cpf_cnpj": produtor["cpf_cnpj"],
+        "nome": f"Produtor Carga editado {rodada}",
+        "fazendas": [
+            {
+                "id": f["id"], "nome": f["nome"], "cidade": f["cidade"], "estado": f["estado"],
+                "area_total": f["area_total"], "area_agricultavel": f["area_agricultavel"],
+                "area_vegetacao": f["area_vegetacao"] - (rodada % 2) * 10,
+                "culturas": [{"id": c["id"], "nome": c["nome"], "safra": str(2020 + rodada % 5)} for c in f["culturas"]],
+            }
+            for f in produtor["fazendas"]
+        ],
+    }
+
+
+class Usuario:
+    """Estado de um usuário virtual: cursor da listagem e produtores que criou"""
+
+    def __init__(self, client: httpx.AsyncClient, estado, rng: random.Random):
+        self.client = client
+        self.rng = rng
+        self.estado = estado
+        self.cursor = None
+        self.criados = []
+        self.rodada = 0
+
+
+async def op_dashboard(u: Usuario):
+    return "GET /api/v1/dashboard/", await u.client.get("/api/v1/dashboard/")
+
+
+async def op_listar(u: Usuario):
+    params = {"limit": 20}
+    if u.cursor:
+        params["cursor"] = u.cursor
+    response = await u.client.get("/api/v1/produtores/", params=params)
+    u.cursor = response.headers.get("X-Next-Cursor")
+    return "GET /api/v1/produtores/", response
+
+
+async def op_detalhe(u: Usuario):
+    produtor_id = u.rng.randint(1, max(u.estado["max_id"], 1))
+    return "GET /api/v1/produtores/{produtor_id}", await u.client.get(f"/api/v1/produtores/{produtor_id}")
+
+
+async def op_criar(u: Usuario):
+    i = next(u.estado["sequencia"])
+    response = await u.client.post("/api/v1/produtores/", json=payload_produtor(i))
+    if response.status_code == 201:
+        u.criados.append(response.json())
+    return "POST /api/v1/produtores/", response
+
+
+async def op_editar(u: Usuario):
+    if not u.criados:
+        return await op_criar(u)
+    produtor = u.rng.choice(u.criados)
+    u.rodada += 1
+    response = await u.client.put(f"/api/v1/produtores/{produtor['id']}", json=payload_edicao(produtor, u.rodada))
+    if response.status_code == 200:
+        u.criados[u.criados.index(produtor)] = response.json()
+    return "PUT /api/v1/produtores/{produtor_id}", response
+
+
+OPERACOES = {
+    "dashboard": op_dashboard,
+    "listar": op_listar,
+    "detalhe": op_detalhe,
+    "criar": op_criar,
+    "editar": op_editar,
+}
+
+
+async def disparar(base_url: str, mix, usuarios: int, duracao: float, seed: int, max_id: int):
+    latencias = defaultdict(list)
+    erros = defaultdict(int)
+    nomes = list(mix)
+    pesos = [mix[n] for n in nomes]
+    estado = {"max_id": max_id, "sequencia": itertools.count(seed * 10 ** 6)}
+    limites = httpx.Limits(max_connections=usuarios, max_keepalive_connections=usuarios)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limites, timeout=60.0) as client:
+        fim = time.monotonic() + duracao
+
+        async def trabalhador(indice: int):
+            usuario = Usuario(client, estado, random.Random(seed + indice))
+            while time.monotonic() < fim:
+                operacao = OPERACOES[usuario.rng.choices(nomes, pesos)[0]]
+                inicio = time.perf_counter()
+                try:
+                    rota, response = await operacao(usuario)
+                except httpx.HTTPError:
+                    erros["(transporte)"] += 1
+                    continue
+                decorrido = time.perf_counter() - inicio
+                if response.status_code >= 400:
+                    erros[rota] += 1
+                else:
+                    latencias[rota].append(decorrido)
+
+        inicio = time.monotonic()
+        await asyncio.gather(*(trabalhador(i) for i in range(usuarios)))
+        total = time.monotonic() - inicio
+    return latencias, erros, total
+
+
+def relatorio(latencias, erros, duracao: float):
+    linhas = []
+    for rota in sorted(set(latencias) | set(erros)):
+        valores = latencias.get(rota, [])
+        linhas.append({
+            "rota": rota,
+            "requisicoes": len(valores),
+            "erros": erros.get(rota, 0),
+            "vazao": len(valores) / duracao,
+            "p50_ms": percentil(valores, 50) * 1000,
+            "p95_ms": percentil(valores, 95) * 1000,
+            "p99_ms": percentil(valores, 99) * 1000,
+        })
+    todas = [v for valores in latencias.values() for v in valores]
+    linhas.append({
+        "rota": "TOTAL",
+        "requisicoes": len(todas),
+        "erros": sum(erros.values()),
+        "vazao": len(todas) / duracao,
+        "p50_ms": percentil(todas, 50) * 1000,
+        "p95_ms": percentil(todas, 95) * 1000,
+        "p99_ms": percentil(todas, 99) * 1000,
+    })
+    return linhas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None, help="Banco descartável (padrão: SQLite temporário)")
+    parser.add_argument("--produtores", type=int, default=5000, help="Produtores sintéticos gerados antes da carga (0 usa a base como está)")
+    parser.add_argument("--usuarios", type=int, default=50, help="Usuários virtuais concorrentes")
+    parser.add_argument("--duracao", type=float, default=30.0, help="Segundos de carga")
+    parser.add_argument("--mix", default=MIX_PADRAO, help="Pesos das operações, ex.: dashboard=30,listar=25")
+    parser.add_argument("--async", dest="assincrono", action="store_true", help="Sobe a API com DB_ASYNC=true")
+    parser.add_argument("--porta", type=int, default=8766)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--saida", default=None, help="Arquivo JSON com o relatório")
+    args = parser.parse_args()
+
+    mix = ler_mix(args.mix)
+    tmpdir = None
+    url = args.database_url
+    if url is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        url = f"sqlite:///{os.path.join(tmpdir.name, 'carga.db')}"
+
+    max_id = popular(url, args.produtores, args.seed)
+    processo = subir_servidor(url, args.porta, args.assincrono)
+    try:
+        base_url = f"http://127.0.0.1:{args.porta}"
+        asyncio.run(aguardar(base_url))
+        latencias, erros, total = asyncio.run(disparar(base_url, mix, args.usuarios, args.duracao, args.seed, max_id))
+    finally:
+        processo.terminate()
+        processo.wait()
+        if tmpdir is not None:
+            tmpdir.cleanup()
+
+    linhas = relatorio(latencias, erros, total)
+    print(f"{args.usuarios} usuários, {total:.1f} s, mix {args.mix}")
+    print(f"{'rota':<38} {'req':>7} {'erros':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for linha in linhas:
+        print(
+            f"{linha['rota']:<38} {linha['requisicoes']:>7} {linha['erros']:>6} {linha['vazao']:>8.1f} "
+            f"{linha['p50_ms']:>8.1f} {linha['p95_ms']:>8.1f} {linha['p99_ms']:>8.1f}"
+        )
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            json.dump({"usuarios": args.usuarios, "duracao": total, "mix": mix, "rotas": linhas}, arquivo, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Benchmark de concorrência: sobe a API com as rotas síncronas (threadpool +
+psycopg2) e depois com DB_ASYNC=true (AsyncSession + asyncpg), dispara o
+mesmo número de conexões simultâneas contra cada uma e compara a vazão.
+
+Uso:
+    python benchmarks/concurrency.py --database-url postgresql://... --conexoes 500 --duracao 20
+
+Sem --database-url usa um SQLite temporário (útil só para validar o script;
+o SQLite serializa escritas e não representa o ganho do asyncpg).
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ROTAS = ["/api/v1/produtores/?limit=20", "/api/v1/dashboard/", "/api/v1/fazendas/?limit=20"]
+
+
+def subir_servidor(database_url: str, porta: int, assincrono: bool) -> subprocess.Popen:
+    env = dict(os.environ, DATABASE_URL=database_url, DB_ASYNC="true" if assincrono else "false")
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(porta), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+async def aguardar(base_url: str, timeout: float = 30.0):
+    limite = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < limite:
+            try:
+                if (await client.get(f"{base_url}/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"Servidor em {base_url} não respondeu")
+
+
+async def disparar(base_url: str, conexoes: int, duracao: float):
+    latencias = []
+    erros = 0
+    fim = time.monotonic() + duracao
+    limites = httpx.Limits(max_connections=conexoes, max_keepalive_connections=conexoes)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limites, timeout=60.0) as client:
+        async def trabalhador(indice: int):
+            nonlocal erros
+            i = indice
+            while time.monotonic() < fim:
+                rota = ROTAS[i % len(ROTAS)]
+                i += 1
+                inicio = time.perf_counter()
+                try:
+                    response = await client.get(rota)
+                    if response.status_code != 200:
+                        erros += 1
+                except httpx.HTTPError:
+                    erros += 1
+                    continue
+                latencias.append(time.perf_counter() - inicio)
+
+        await asyncio.gather(*(trabalhador(i) for i in range(conexoes)))
+    return latencias, erros
+
+
+def percentil(valores, p):
+    if not valores:
+        return float("nan")
+    if len(valores) == 1:
+        return valores[0]
+    return statistics.quantiles(valores, n=100, method="inclusive")[p - 1]
+
+
+async def medir(database_url: str, porta: int, assincrono: bool, conexoes: int, duracao: float):
+    processo = subir_servidor(database_url, porta, assincrono)
+    try:
+        base_url = f"http://127.0.0.1:{porta}"
+        await aguardar(base_url)
+        latencias, erros = await disparar(base_url, conexoes, duracao)
+    finally:
+        processo.terminate()
+        processo.wait()
+    return {
+        "vazao": len(latencias) / duracao,
+        "p50": percentil(latencias, 50) * 1000,
+        "p99": percentil(latencias, 99) * 1000,
+        "erros": erros,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--conexoes", type=int, default=500)
+    parser.add_argument("--duracao", type=float, default=20.0, help="Segundos de carga por modo")
+    parser.add_argument("--porta", type=int, default=8765)
+    args = parser.parse_args()
+
+    tmpdir = None
+    url = args.database_url
+    if url is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        url = f"sqlite:///{os.path.join(tmpdir.name, 'bench.db')}"
+
+    print(f"{'modo':<8} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'erros':>7}")
+    for nome, assincrono in (("sync", False), ("async", True)):
+        resultado = asyncio.run(medir(url, args.porta, assincrono, args.conexoes, args.duracao))
+        print(
+            f"{nome:<8} {resultado['vazao']:>9.1f} {resultado['p50']:>9.1f} "
+            f"{resultado['p99']:>9.1f} {resultado['erros']:>7}"
+        )
+
+    if tmpdir is not None:
+        tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Benchmark do dashboard: compara a agregação antiga (seis consultas), a
+agregação em passada única sobre as tabelas base (rollup.calcular_da_base)
+e a leitura do rollup feita por crud.get_dashboard_stats.
+
+Uso:
+    python benchmarks/dashboard.py --fazendas 1000000
+    python benchmarks/dashboard.py --database-url postgresql://... --fazendas 1000000
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, func, insert
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, models, rollup
+
+ESTADOS = ["SP", "MG", "GO", "MT", "MS", "PR", "RS", "BA", "TO", "MA"]
+CULTURAS = ["Soja", "Milho", "Café", "Algodão", "Cana-de-açúcar", "Feijão", "Arroz", "Trigo"]
+LOTE = 50000
+
+
+def get_dashboard_stats_legado(db):
+    """Implementação anterior, com uma consulta por métrica"""
+    total_fazendas = db.query(func.count(models.Fazenda.id)).scalar()
+    total_hectares = db.query(func.sum(models.Fazenda.area_total)).scalar() or 0
+    por_estado = db.query(
+        models.Fazenda.estado, func.count(models.Fazenda.id)
+    ).group_by(models.Fazenda.estado).all()
+    por_cultura = db.query(
+        models.Cultura.nome, func.count(models.Cultura.id)
+    ).group_by(models.Cultura.nome).all()
+    area_agricultavel = db.query(func.sum(models.Fazenda.area_agricultavel)).scalar() or 0
+    area_vegetacao = db.query(func.sum(models.Fazenda.area_vegetacao)).scalar() or 0
+    return {
+        "total_fazendas": total_fazendas,
+        "total_hectares": total_hectares,
+        "por_estado": dict(por_estado),
+        "por_cultura": dict(por_cultura),
+        "por_uso_solo": {
+            "Área Agricultável": area_agricultavel,
+            "Área de Vegetação": area_vegetacao
+        }
+    }
+
+
+def popular(engine, total_fazendas: int, seed: int):
+    rng = random.Random(seed)
+    with engine.begin() as conn:
+        conn.execute(insert(models.Produtor), [{"id": 1, "cpf_cnpj": "12345678909", "nome": "Benchmark"}])
+        for inicio in range(0, total_fazendas, LOTE):
+            fazendas = []
+            culturas = []
+            for fazenda_id in range(inicio + 1, min(inicio + LOTE, total_fazendas) + 1):
+                area_total = rng.uniform(100, 5000)
+                agricultavel = area_total * rng.uniform(0.5, 0.8)
+                fazendas.append({
+                    "id": fazenda_id,
+                    "nome": f"Fazenda {fazenda_id}",
+                    "cidade": "Cidade",
+                    "estado": rng.choice(ESTADOS),
+                    "area_total": area_total,
+                    "area_agricultavel": agricultavel,
+                    "area_vegetacao": area_total * 0.15,
+                    "produtor_id": 1,
+                })
+                culturas.append({"nome": rng.choice(CULTURAS), "safra": "2023", "fazenda_id": fazenda_id})
+            conn.execute(insert(models.Fazenda), fazendas)
+            conn.execute(insert(models.Cultura), culturas)
+
+
+def medir(funcao, SessionLocal, repeticoes: int):
+    tempos = []
+    for _ in range(repeticoes):
+        db = SessionLocal()
+        try:
+            inicio = time.perf_counter()
+            resultado = funcao(db)
+            tempos.append(time.perf_counter() - inicio)
+        finally:
+            db.close()
+    return resultado, tempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None, help="Banco vazio para o benchmark (padrão: SQLite temporário)")
+    parser.add_argument("--fazendas", type=int, default=1_000_000)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    tmpdir = None
+    url = args.database_url
+    if url is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        url = f"sqlite:///{os.path.join(tmpdir.name, 'bench.db')}"
+
+    engine = create_engine(url)
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    print(f"Populando {args.fazendas} fazendas em {engine.url.get_backend_name()}...")
+    inicio = time.perf_counter()
+    popular(engine, args.fazendas, args.seed)
+    print(f"Carga concluída em {time.perf_counter() - inicio:.1f}s")
+    db = SessionLocal()
+    rollup.rebuild(db)
+    db.close()
+
+    legado, tempos_legado = medir(get_dashboard_stats_legado, SessionLocal, args.repeticoes)
+    _, tempos_passada = medir(rollup.calcular_da_base, SessionLocal, args.repeticoes)
+    atual, tempos_atual = medir(crud.get_dashboard_stats, SessionLocal, args.repeticoes)
+
+    assert legado["total_fazendas"] == atual["total_fazendas"]
+    assert legado["por_estado"] == atual["por_estado"]
+    assert legado["por_cultura"] == atual["por_cultura"]
+
+    mediana_legado = statistics.median(tempos_legado)
+    for nome, tempos in (
+        ("legado (6 consultas)", tempos_legado),
+        ("passada única", tempos_passada),
+        ("rollup", tempos_atual),
+    ):
+        mediana = statistics.median(tempos)
+        print(f"{nome:<22} mediana {mediana * 1000:9.2f} ms  ({mediana_legado / mediana:.1f}x)")
+
+    engine.dispose()
+    if tmpdir is not None:
+        tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
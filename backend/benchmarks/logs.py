@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark de logging: mede o tempo que os logs de uma requisição ocupam na
+thread que a atende, com uma saída lenta simulando stderr redirecionado para
+um pipe ou disco sob carga.
+
+Cenários:
+    legado   - basicConfig + f-strings em INFO (quatro linhas por requisição)
+    lazy     - formatação preguiçosa, debug do crud filtrado, escrita síncrona
+    fila     - como lazy, com QueueHandler/QueueListener e saída JSON
+
+Uso:
+    python benchmarks/logs.py --requisicoes 5000 --atraso-ms 0.2
+"""
+
+import argparse
+import io
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import logging_config
+
+
+class SaidaLenta(io.TextIOBase):
+    """Descarta o texto, mas demora `atraso` segundos por escrita"""
+
+    def __init__(self, atraso: float):
+        self.atraso = atraso
+        self.escritas = 0
+
+    def write(self, texto):
+        self.escritas += 1
+        if self.atraso:
+            time.sleep(self.atraso)
+        return len(texto)
+
+
+def requisicao_legado(log_main, log_api, log_crud, produtor_id):
+    log_main.info(f"Requisição: GET http://localhost:8000/api/v1/produtores/{produtor_id}")
+    log_api.info(f"Recebida requisição para buscar produtor ID: {produtor_id}")
+    log_crud.info(f"Buscando produtor com ID: {produtor_id}")
+    log_main.info(f"Resposta: {200}")
+
+
+def requisicao_nova(log_main, log_api, log_crud, produtor_id):
+    log_api.info("Recebida requisição para buscar produtor ID: %s", produtor_id)
+    log_crud.debug("Buscando produtor com ID: %s", produtor_id)
+    log_main.info("Requisição: %s %s - resposta %s em %.1f ms", "GET", f"/api/v1/produtores/{produtor_id}", 200, 1.3)
+
+
+def configurar(cenario: str, saida: SaidaLenta):
+    raiz = logging.getLogger()
+    if cenario == "legado":
+        logging_config.encerrar_logging()
+        for handler in list(raiz.handlers):
+            raiz.removeHandler(handler)
+        handler = logging.StreamHandler(saida)
+        handler.setFormatter(logging.Formatter(logging_config.FORMATO_TEXTO))
+        raiz.addHandler(handler)
+        raiz.setLevel(logging.INFO)
+    elif cenario == "lazy":
+        logging_config.configurar_logging("INFO", "text", assincrono=False, stream=saida)
+    else:
+        logging_config.configurar_logging("INFO", "json", assincrono=True, stream=saida)
+
+
+def medir(cenario: str, requisicoes: int, atraso: float):
+    saida = SaidaLenta(atraso)
+    configurar(cenario, saida)
+    log_main, log_api, log_crud = (logging.getLogger(n) for n in ("main", "app.api", "app.crud"))
+    requisicao = requisicao_legado if cenario == "legado" else requisicao_nova
+
+    tempos = []
+    for i in range(requisicoes):
+        inicio = time.perf_counter()
+        requisicao(log_main, log_api, log_crud, i)
+        tempos.append(time.perf_counter() - inicio)
+
+    inicio = time.perf_counter()
+    logging_config.encerrar_logging()
+    esvaziamento = time.perf_counter() - inicio
+    tempos.sort()
+    return {
+        "p50": statistics.median(tempos) * 1e6,
+        "p99": tempos[int(len(tempos) * 0.99) - 1] * 1e6,
+        "total": sum(tempos),
+        "esvaziamento": esvaziamento,
+        "linhas": saida.escritas,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requisicoes", type=int, default=5000)
+    parser.add_argument("--atraso-ms", type=float, default=0.2, help="Atraso simulado por escrita na saída")
+    args = parser.parse_args()
+
+    atraso = args.atraso_ms / 1000
+    print(f"{args.requisicoes} requisições, {args.atraso_ms} ms por escrita")
+    print(f"{'cenário':<8} {'p50 (µs)':>10} {'p99 (µs)':>10} {'total (s)':>10} {'fila (s)':>9} {'linhas':>7}")
+    for cenario in ("legado", "lazy", "fila"):
+        r = medir(cenario, args.requisicoes, atraso)
+        print(
+            f"{cenario:<8} {r['p50']:>10.1f} {r['p99']:>10.1f} {r['total']:>10.3f} "
+            f"{r['esvaziamento']:>9.3f} {r['linhas']:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Benchmark da serialização das respostas: uma página de produtores (com
+fazendas e culturas) pelo caminho padrão do FastAPI (validação do
+response_model + json da stdlib) e pelo caminho rápido de app.respostas
+(dicts direto do ORM + orjson), com e sem gzip.
+
+Duas medições:
+    serializacao  - só a conversão da página já carregada em bytes
+    http          - GET /api/v1/produtores/?limit=N pelo TestClient, com a
+                    consulta ao banco, middlewares e compressão, e a mesma
+                    página com fields=id,nome,cpf_cnpj (projecao.py)
+
+Uso:
+    python benchmarks/respostas.py --produtores 2000 --limit 100
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# main.py cria as tabelas e os dados de exemplo ao ser importado; aqui isso
+# vai para um SQLite em memória e as rotas usam a base do benchmark (get_db e get_read_db)
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, database, models, respostas, schemas, sintetico
+
+
+def medir(funcao, repeticoes: int, aquecimento: int = 3):
+    for _ in range(aquecimento):
+        funcao()
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return statistics.median(tempos) * 1000
+
+
+def serializacao(produtores, repeticoes: int, nivel_gzip: int):
+    campo = create_response_field(name="Response_read_produtores", type_=List[schemas.Produtor])
+
+    def padrao():
+        conteudo = asyncio.run(serialize_response(field=campo, response_content=produtores))
+        # Mesmos parâmetros de fastapi.responses.JSONResponse.render
+        return json.dumps(conteudo, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+    def rapido():
+        return respostas.RespostaJSONRapida([respostas.para_dict(schemas.Produtor, p) for p in produtores]).body
+
+    corpo = rapido()
+    assert json.loads(corpo) == json.loads(padrao()), "os dois caminhos devem gerar o mesmo JSON"
+    comprimido = gzip.compress(corpo, compresslevel=nivel_gzip)
+    return [
+        ("padrao", medir(padrao, repeticoes), len(corpo)),
+        ("rapido", medir(rapido, repeticoes), len(corpo)),
+        (f"gzip nível {nivel_gzip}", medir(lambda: gzip.compress(corpo, compresslevel=nivel_gzip), repeticoes), len(comprimido)),
+    ]
+
+
+def http(Sessao, limit: int, repeticoes: int):
+    from fastapi.testclient import TestClient
+    from main import app
+
+    def get_db():
+        db = Sessao()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[database.get_db] = get_db
+    app.dependency_overrides[database.get_read_db] = get_db
+    client = TestClient(app)
+    url = f"/api/v1/produtores/?limit={limit}"
+    linhas = []
+    for rapido in (False, True):
+        respostas.JSON_RAPIDO = rapido
+        for codificacao in ("identity", "gzip"):
+            cabecalhos = {"Accept-Encoding": codificacao}
+            response = client.get(url, headers=cabecalhos)
+            assert response.status_code == 200
+            tamanho = int(response.headers["content-length"])
+            mediana = medir(lambda: client.get(url, headers=cabecalhos), repeticoes)
+            linhas.append((f"{'rapido' if rapido else 'padrao'} + {codificacao}", mediana, tamanho))
+
+    # Lista enxuta: consulta de projeção, sem fazendas nem culturas
+    url_campos = f"{url}&fields=id,nome,cpf_cnpj"
+    response = client.get(url_campos, headers={"Accept-Encoding": "identity"})
+    assert response.status_code == 200
+    mediana = medir(lambda: client.get(url_campos, headers={"Accept-Encoding": "identity"}), repeticoes)
+    linhas.append(("fields=id,nome,cpf_cnpj", mediana, int(response.headers["content-length"])))
+    return linhas
+
+
+def imprimir(titulo, linhas):
+    print(f"\n{titulo}")
+    print(f"{'caminho':<22} {'mediana ms':>10} {'bytes':>10}")
+    for nome, mediana, tamanho in linhas:
+        print(f"{nome:<22} {mediana:>10.2f} {tamanho:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--produtores", type=int, default=2000, help="Produtores sintéticos na base")
+    parser.add_argument("--limit", type=int, default=100, help="Produtores por página")
+    parser.add_argument("--repeticoes", type=int, default=50)
+    parser.add_argument("--gzip-nivel", type=int, default=int(os.getenv("GZIP_LEVEL", "6")))
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.TemporaryDirectory()
+    url = f"sqlite:///{os.path.join(tmpdir.name, 'respostas.db')}"
+    logging.getLogger().setLevel(logging.WARNING)
+
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    models.Base.metadata.create_all(bind=engine)
+    sintetico.gerar(engine, args.produtores, seed=args.seed)
+    Sessao = sessionmaker(bind=engine)
+    db = Sessao()
+    try:
+        pagina = crud.get_produtores(db, limit=args.limit)
+        fazendas = sum(len(p.fazendas) for p in pagina)
+        culturas = sum(len(f.culturas) for p in pagina for f in p.fazendas)
+        print(f"Página de {len(pagina)} produtores, {fazendas} fazendas e {culturas} culturas")
+        imprimir("Serialização", serializacao(pagina, args.repeticoes, args.gzip_nivel))
+    finally:
+        db.close()
+
+    try:
+        imprimir(f"GET /api/v1/produtores/?limit={args.limit}", http(Sessao, args.limit, args.repeticoes))
+    finally:
+        engine.dispose()
+        tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
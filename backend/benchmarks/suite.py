@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+"""
+Suíte de micro-benchmarks: mede cada função de app/crud.py sobre bases de
+tamanho crescente (geradas com app.sintetico), a serialização de
+schemas.Produtor para grafos aninhados grandes e a validação de
+ProdutorCreate com payloads grandes.
+
+O resultado é gravado em JSON; com --comparar, cada caso é confrontado com
+uma execução anterior e aumentos da mediana acima de --limite são
+reportados como regressão (código de saída 1).
+
+Uso:
+    python benchmarks/suite.py --tamanhos 1000 10000 100000 --saida atual.json
+    python benchmarks/suite.py --database-url sqlite:///... --database-url postgresql://... --saida atual.json
+    python benchmarks/suite.py --saida nova.json --comparar atual.json --limite 0.2
+"""
+
+import argparse
+import inspect
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pydantic
+import sqlalchemy
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, documentos, models, rollup, schemas, sintetico
+
+
+class Caso:
+    """Um benchmark: `preparar` e `finalizar` ficam fora da medição"""
+
+    def __init__(self, nome, executar, preparar=None, finalizar=None):
+        self.nome = nome
+        self.executar = executar
+        self.preparar = preparar
+        self.finalizar = finalizar
+
+
+def cnpj_benchmark(i: int) -> str:
+    # Filial 0009: o gerador sintético usa sempre 0001, então não há colisão
+    raiz = [int(d) for d in f"{i % 10 ** 8:08d}"] + [0, 0, 0, 9]
+    return documentos.completar(np.array([raiz]))[0]
+
+
+def fazenda_payload(i: int, culturas: int = 3, **extra) -> dict:
+    return {
+        "nome": f"Fazenda Bench {i}", "cidade": "Sorriso", "estado": "MT",
+        "area_total": 1000.0 + i, "area_agricultavel": 600.0, "area_vegetacao": 300.0,
+        "culturas": [{"nome": "Soja", "safra": "2024"} for _ in range(culturas)],
+        **extra,
+    }
+
+
+def produtor_payload(i: int, fazendas: int = 3, culturas: int = 3) -> schemas.ProdutorCreate:
+    return schemas.ProdutorCreate(
+        cpf_cnpj=cnpj_benchmark(i),
+        nome=f"Produtor Bench {i}",
+        fazendas=[fazenda_payload(j, culturas) for j in range(fazendas)],
+    )
+
+
+def payload_edicao(db, produtor_id: int, i: int) -> schemas.ProdutorCreate:
+    """Mantém as fazendas e culturas existentes alterando áreas e safras"""
+    produtor = crud.get_produtor(db, produtor_id)
+    return schemas.ProdutorCreate(
+        cpf_cnpj=produtor.cpf_cnpj,
+        nome=f"{produtor.nome.split(' #')[0]} #{i}",
+        fazendas=[
+            {
+                "id": f.id, "nome": f.nome, "cidade": f.cidade, "estado": f.estado,
+                "area_total": f.area_total + 1, "area_agricultavel": f.area_agricultavel,
+                "area_vegetacao": f.area_vegetacao,
+                "culturas": [{"id": c.id, "nome": c.nome, "safra": str(2000 + i % 30)} for c in f.culturas],
+            }
+            for f in produtor.fazendas
+        ],
+    )
+
+
+def casos_crud(ctx):
+    produtor_id, fazenda_id, cultura_id = ctx["produtor_id"], ctx["fazenda_id"], ctx["cultura_id"]
+    meio = ctx["produtores"] // 2
+    contador = iter(range(10 ** 7))
+
+    def criar_produtor(db, i):
+        return (crud.create_produtor(db, produtor_payload(next(contador))).id,)
+
+    def criar_fazenda(db, i):
+        return (crud.create_fazenda(db, schemas.FazendaCreate(**fazenda_payload(i)), produtor_id).id,)
+
+    def criar_cultura(db, i):
+        return (crud.create_cultura(db, schemas.CulturaCreate(nome="Milho", safra="2024"), fazenda_id).id,)
+
+    return [
+        Caso("get_produtor", lambda db: crud.get_produtor(db, produtor_id)),
+        Caso("produtor_existe", lambda db: crud.produtor_existe(db, produtor_id)),
+        Caso("get_produtor_by_cpf_cnpj", lambda db: crud.get_produtor_by_cpf_cnpj(db, ctx["cpf_cnpj"])),
+        Caso("get_produtores[offset]", lambda db: crud.get_produtores(db, skip=meio, limit=100)),
+        Caso("get_produtores[cursor]", lambda db: crud.get_produtores(db, limit=100, after_id=meio)),
+        Caso("get_fazenda", lambda db: crud.get_fazenda(db, fazenda_id)),
+        Caso("fazenda_existe", lambda db: crud.fazenda_existe(db, fazenda_id)),
+        Caso("get_fazendas_by_produtor", lambda db: crud.get_fazendas_by_produtor(db, produtor_id)),
+        Caso("get_fazendas[offset]", lambda db: crud.get_fazendas(db, skip=meio, limit=100)),
+        Caso("get_fazendas[cursor]", lambda db: crud.get_fazendas(db, limit=100, after_id=meio)),
+        Caso("get_cultura", lambda db: crud.get_cultura(db, cultura_id)),
+        Caso("get_culturas_by_fazenda", lambda db: crud.get_culturas_by_fazenda(db, fazenda_id)),
+        Caso("get_dashboard_stats", crud.get_dashboard_stats),
+        Caso(
+            "inserir_fazendas_em_lote",
+            lambda db, fazendas: crud.inserir_fazendas_em_lote(db, fazendas),
+            preparar=lambda db, i: ([(produtor_id, schemas.FazendaCreate(**fazenda_payload(j))) for j in range(20)],),
+            finalizar=lambda db, *args: db.rollback(),
+        ),
+        Caso(
+            "create_produtor",
+            lambda db, payload: crud.create_produtor(db, payload),
+            preparar=lambda db, i: (produtor_payload(next(contador)),),
+        ),
+        Caso(
+            "update_produtor",
+            lambda db, payload: crud.update_produtor(db, ctx["produtor_edicao_id"], payload),
+            preparar=lambda db, i: (payload_edicao(db, ctx["produtor_edicao_id"], i),),
+        ),
+        Caso("delete_produtor", crud.delete_produtor, preparar=criar_produtor),
+        Caso(
+            "create_fazenda",
+            lambda db, payload: crud.create_fazenda(db, payload, produtor_id),
+            preparar=lambda db, i: (schemas.FazendaCreate(**fazenda_payload(i)),),
+        ),
+        Caso(
+            "update_fazenda",
+            lambda db, payload: crud.update_fazenda(db, fazenda_id, payload),
+            preparar=lambda db, i: (schemas.FazendaUpdate(area_vegetacao=100.0 + i % 2),),
+        ),
+        Caso("delete_fazenda", crud.delete_fazenda, preparar=criar_fazenda),
+        Caso(
+            "create_cultura",
+            lambda db, payload: crud.create_cultura(db, payload, fazenda_id),
+            preparar=lambda db, i: (schemas.CulturaCreate(nome="Trigo", safra="2024"),),
+        ),
+        Caso("delete_cultura", crud.delete_cultura, preparar=criar_cultura),
+    ]
+
+
+def grafo_orm(fazendas: int, culturas: int) -> models.Produtor:
+    agora = datetime.now(timezone.utc)
+    return models.Produtor(
+        id=1, cpf_cnpj="52998224725", nome="Produtor Grafo", created_at=agora,
+        fazendas=[
+            models.Fazenda(
+                id=i, nome=f"Fazenda {i}", cidade="Sorriso", estado="MT", area_total=1000.0,
+                area_agricultavel=600.0, area_vegetacao=300.0, produtor_id=1, created_at=agora,
+                culturas=[
+                    models.Cultura(id=i * culturas + j, nome="Soja", safra="2024", fazenda_id=i, created_at=agora)
+                    for j in range(culturas)
+                ],
+            )
+            for i in range(fazendas)
+        ],
+    )
+
+
+def casos_schemas(fazendas: int, culturas: int):
+    grafo = grafo_orm(fazendas, culturas)
+    payload = {
+        "cpf_cnpj": "529.982.247-25",
+        "nome": "Produtor Payload",
+        "fazendas": [fazenda_payload(i, culturas) for i in range(fazendas)],
+    }
+    sufixo = f"[{fazendas}x{culturas}]"
+    return [
+        Caso(f"Produtor.serializar{sufixo}", lambda: schemas.Produtor.model_validate(grafo).model_dump_json()),
+        Caso(f"ProdutorCreate.validar{sufixo}", lambda: schemas.ProdutorCreate.model_validate(payload)),
+    ]
+
+
+def medir(caso: Caso, repeticoes: int, SessionLocal=None, aquecimento: int = 3):
+    tempos = []
+    for i in range(aquecimento + repeticoes):
+        db = SessionLocal() if SessionLocal is not None else None
+        args = (db,) if db is not None else ()
+        try:
+            extra = caso.preparar(db, i) if caso.preparar else ()
+            inicio = time.perf_counter()
+            caso.executar(*args, *extra)
+            if i >= aquecimento:
+                tempos.append(time.perf_counter() - inicio)
+            if caso.finalizar:
+                caso.finalizar(db, *extra)
+        finally:
+            if db is not None:
+                db.close()
+    return {
+        "mediana_ms": statistics.median(tempos) * 1000,
+        "min_ms": min(tempos) * 1000,
+        "repeticoes": repeticoes,
+    }
+
+
+def funcoes_sem_caso(casos):
+    publicas = {
+        nome for nome, funcao in inspect.getmembers(crud, inspect.isfunction)
+        if funcao.__module__ == crud.__name__ and not nome.startswith("_")
+    }
+    return sorted(publicas - {c.nome.split("[")[0] for c in casos})
+
+
+def preparar_base(engine, SessionLocal, produtores: int, seed: int):
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    sintetico.gerar(engine, produtores, seed=seed)
+    db = SessionLocal()
+    try:
+        rollup.rebuild(db)
+        produtor_id = max(produtores // 2, 1)
+        fazenda_id = db.query(func.min(models.Fazenda.id)).filter(models.Fazenda.produtor_id == produtor_id).scalar()
+        cultura_id = db.query(func.min(models.Cultura.id)).scalar()
+        return {
+            "produtores": produtores,
+            "produtor_id": produtor_id,
+            "produtor_edicao_id": max(produtores // 3, 1),
+            "cpf_cnpj": crud.get_produtor(db, produtor_id).cpf_cnpj,
+            "fazenda_id": fazenda_id,
+            "cultura_id": cultura_id,
+        }
+    finally:
+        db.close()
+
+
+def comparar(resultados, base, limite: float, minimo_ms: float = 0.0):
+    chave = lambda r: (r["caso"], r["banco"], r["tamanho"])
+    anteriores = {chave(r): r for r in base["resultados"]}
+    regressoes = []
+    for r in resultados:
+        anterior = anteriores.get(chave(r))
+        if anterior is None:
+            continue
+        variacao = r["mediana_ms"] / anterior["mediana_ms"] - 1 if anterior["mediana_ms"] else 0.0
+        if variacao > limite and r["mediana_ms"] - anterior["mediana_ms"] > minimo_ms:
+            regressoes.append((r, anterior, variacao))
+    return regressoes
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", action="append", default=None,
+                        help="Banco descartável; pode ser repetido (padrão: SQLite temporário)")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[1000, 10000], help="Produtores na base")
+    parser.add_argument("--repeticoes", type=int, default=20)
+    parser.add_argument("--aquecimento", type=int, default=3, help="Execuções descartadas antes das medições")
+    parser.add_argument("--grafos", nargs="+", default=["10x5", "100x10", "500x20"],
+                        help="Fazendas x culturas dos grafos de serialização e validação")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--saida", default=None, help="Arquivo JSON com os resultados")
+    parser.add_argument("--comparar", default=None, help="JSON de uma execução anterior")
+    parser.add_argument("--limite", type=float, default=0.2, help="Aumento relativo da mediana tratado como regressão")
+    parser.add_argument("--minimo-ms", type=float, default=0.05, help="Ignora aumentos absolutos menores que isso")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+
+    tmpdir = None
+    urls = args.database_url
+    if not urls:
+        tmpdir = tempfile.TemporaryDirectory()
+        urls = [f"sqlite:///{os.path.join(tmpdir.name, 'bench.db')}"]
+
+    resultados = []
+
+    def registrar(caso, banco, tamanho, medida):
+        resultados.append({"caso": caso, "banco": banco, "tamanho": tamanho, **medida})
+        print(f"{banco:<10} {tamanho:>9} {caso:<36} {medida['mediana_ms']:>10.3f} {medida['min_ms']:>10.3f}")
+
+    print(f"{'banco':<10} {'tamanho':>9} {'caso':<36} {'mediana ms':>10} {'min ms':>10}")
+    for grafo in args.grafos:
+        fazendas, culturas = (int(n) for n in grafo.split("x"))
+        for caso in casos_schemas(fazendas, culturas):
+            registrar(caso.nome, "-", fazendas * culturas, medir(caso, args.repeticoes, aquecimento=args.aquecimento))
+
+    for url in urls:
+        engine = create_engine(url)
+        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        for tamanho in args.tamanhos:
+            ctx = preparar_base(engine, SessionLocal, tamanho, args.seed)
+            casos = casos_crud(ctx)
+            for caso in casos:
+                registrar(caso.nome, engine.dialect.name, tamanho, medir(caso, args.repeticoes, SessionLocal, args.aquecimento))
+        faltando = funcoes_sem_caso(casos)
+        if faltando:
+            print(f"Funções de crud.py sem benchmark: {', '.join(faltando)}")
+        engine.dispose()
+
+    if tmpdir is not None:
+        tmpdir.cleanup()
+
+    saida = {
+        "meta": {
+            "data": datetime.now(timezone.utc).isoformat(),
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "sqlalchemy": sqlalchemy.__version__,
+            "pydantic": pydantic.VERSION,
+            "repeticoes": args.repeticoes,
+            "aquecimento": args.aquecimento,
+            "seed": args.seed,
+        },
+        "resultados": resultados,
+    }
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            json.dump(saida, arquivo, indent=2, ensure_ascii=False)
+        print(f"Resultados gravados em {args.saida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as arquivo:
+            base = json.load(arquivo)
+        regressoes = comparar(resultados, base, args.limite, args.minimo_ms)
+        for atual, anterior, variacao in regressoes:
+            print(
+                f"REGRESSÃO {atual['caso']} ({atual['banco']}, {atual['tamanho']}): "
+                f"{anterior['mediana_ms']:.3f} ms -> {atual['mediana_ms']:.3f} ms (+{variacao:.0%})"
+            )
+        if regressoes:
+            sys.exit(1)
+        print(f"Sem regressões acima de {args.limite:.0%} em relação a {args.comparar}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Benchmark do PUT de produtor: compara a sincronização antiga (commit e refresh
+por fazenda e por cultura) com o diff aplicado em uma transação de
+crud.update_produtor, para payloads aninhados de tamanho crescente.
+
+Uso:
+    python benchmarks/update_produtor.py --fazendas 10 50 200 --culturas 5
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, models, schemas
+
+
+def update_produtor_legado(db, produtor_id, produtor):
+    """Implementação anterior, com commit após cada etapa da sincronização"""
+    db_produtor = crud.get_produtor(db, produtor_id)
+    db_produtor.nome = produtor.nome
+    db.commit()
+    db.refresh(db_produtor)
+
+    fazendas_payload = produtor.fazendas or []
+    fazendas_ids_payload = [f.id for f in fazendas_payload if f.id]
+    fazendas_db = {f.id: f for f in db_produtor.fazendas}
+    for fazenda in db_produtor.fazendas[:]:
+        if fazenda.id not in fazendas_ids_payload:
+            db.delete(fazenda)
+    db.commit()
+
+    for fazenda_data in fazendas_payload:
+        if fazenda_data.id in fazendas_db:
+            fazenda = fazendas_db[fazenda_data.id]
+            for campo in crud.CAMPOS_FAZENDA:
+                setattr(fazenda, campo, getattr(fazenda_data, campo))
+            db.commit()
+            db.refresh(fazenda)
+        else:
+            fazenda = models.Fazenda(
+                **{campo: getattr(fazenda_data, campo) for campo in crud.CAMPOS_FAZENDA},
+                produtor_id=db_produtor.id
+            )
+            db.add(fazenda)
+            db.commit()
+            db.refresh(fazenda)
+        culturas_payload = fazenda_data.culturas or []
+        culturas_ids_payload = [c.id for c in culturas_payload if c.id]
+        culturas_db = {c.id: c for c in fazenda.culturas}
+        for cultura in fazenda.culturas[:]:
+            if cultura.id not in culturas_ids_payload:
+                db.delete(cultura)
+        db.commit()
+        for cultura_data in culturas_payload:
+            if cultura_data.id in culturas_db:
+                cultura = culturas_db[cultura_data.id]
+                cultura.nome = cultura_data.nome
+                cultura.safra = cultura_data.safra
+                db.commit()
+                db.refresh(cultura)
+            else:
+                db.add(models.Cultura(nome=cultura_data.nome, safra=cultura_data.safra, fazenda_id=fazenda.id))
+        db.commit()
+        db.refresh(fazenda)
+
+    db.refresh(db_produtor)
+    return db_produtor
+
+
+def payload_inicial(num_fazendas, num_culturas):
+    return schemas.ProdutorCreate(
+        cpf_cnpj="12345678909",
+        nome="Benchmark",
+        fazendas=[
+            {
+                "nome": f"Fazenda {i}", "cidade": "Cidade", "estado": "SP",
+                "area_total": 1000.0, "area_agricultavel": 500.0, "area_vegetacao": 200.0,
+                "culturas": [{"nome": f"Cultura {j}", "safra": "2023"} for j in range(num_culturas)],
+            }
+            for i in range(num_fazendas)
+        ]
+    )
+
+
+def payload_edicao(db_produtor, rodada):
+    """Edita todas as fazendas e culturas, remove uma fazenda e cria outra"""
+    fazendas = []
+    for fazenda in db_produtor.fazendas[1:]:
+        fazendas.append({
+            "id": fazenda.id, "nome": f"{fazenda.nome}", "cidade": "Cidade", "estado": "SP",
+            "area_total": 1000.0 + rodada, "area_agricultavel": 500.0, "area_vegetacao": 200.0,
+            "culturas": [{"id": c.id, "nome": c.nome, "safra": str(2024 + rodada)} for c in fazenda.culturas],
+        })
+    fazendas.append({
+        "nome": f"Nova {rodada}", "cidade": "Cidade", "estado": "MG",
+        "area_total": 100.0, "area_agricultavel": 50.0, "area_vegetacao": 20.0,
+        "culturas": [{"nome": "Soja", "safra": "2024"}],
+    })
+    return schemas.ProdutorCreate(cpf_cnpj=db_produtor.cpf_cnpj, nome=f"Benchmark {rodada}", fazendas=fazendas)
+
+
+def medir(funcao, SessionLocal, engine, num_fazendas, num_culturas, repeticoes):
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    produtor_id = crud.create_produtor(db, payload_inicial(num_fazendas, num_culturas)).id
+    db.close()
+
+    commits = []
+
+    def contar_commit(conn):
+        commits.append(1)
+
+    event.listen(engine, "commit", contar_commit)
+    tempos = []
+    for rodada in range(repeticoes):
+        db = SessionLocal()
+        try:
+            payload = payload_edicao(crud.get_produtor(db, produtor_id), rodada)
+            db.expire_all()
+            commits.clear()
+            inicio = time.perf_counter()
+            funcao(db, produtor_id, payload)
+            tempos.append(time.perf_counter() - inicio)
+        finally:
+            db.close()
+    event.remove(engine, "commit", contar_commit)
+    return statistics.median(tempos), len(commits)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None, help="Banco descartável para o benchmark (padrão: SQLite temporário)")
+    parser.add_argument("--fazendas", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--culturas", type=int, default=5)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    tmpdir = None
+    url = args.database_url
+    if url is None:
+        tmpdir = tempfile.TemporaryDirectory()
+        url = f"sqlite:///{os.path.join(tmpdir.name, 'bench.db')}"
+    engine = create_engine(url)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    print(f"{'fazendas':>8} {'culturas':>8} {'legado ms':>10} {'commits':>8} {'diff ms':>10} {'commits':>8} {'ganho':>7}")
+    for num_fazendas in args.fazendas:
+        legado, commits_legado = medir(update_produtor_legado, SessionLocal, engine, num_fazendas, args.culturas, args.repeticoes)
+        atual, commits_atual = medir(crud.update_produtor, SessionLocal, engine, num_fazendas, args.culturas, args.repeticoes)
+        print(
+            f"{num_fazendas:>8} {num_fazendas * args.culturas:>8} {legado * 1000:>10.1f} {commits_legado:>8} "
+            f"{atual * 1000:>10.1f} {commits_atual:>8} {legado / atual:>6.1f}x"
+        )
+
+    engine.dispose()
+    if tmpdir is not None:
+        tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Gerador de dados sintéticos para testes de carga e escala
+
+Cria N produtores com fazendas e culturas distribuídas de forma realista e
+CPFs/CNPJs válidos, gravando em lotes com COPY (PostgreSQL) ou INSERT em
+lote. A mesma seed com o mesmo tamanho de lote gera os mesmos dados; os
+documentos dependem só do ID, então é seguro acrescentar cargas com outra seed.
+
+Exemplo (cerca de 10 milhões de culturas):
+    python gerar_dados.py --produtores 1600000 --seed 42
+"""
+
+import sys
+import os
+import argparse
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import text
+from app.database import SessionLocal, engine
+from app.models import Base
+from app import rollup, sintetico
+import logging
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--produtores", type=int, required=True, help="Quantidade de produtores a gerar")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--lote", type=int, default=sintetico.TAMANHO_LOTE, help="Produtores por transação")
+    parser.add_argument("--limpar", action="store_true", help="Apaga produtores, fazendas e culturas antes de gerar")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    if args.limpar:
+        with engine.begin() as conn:
+            sintetico.limpar(conn)
+        logger.info("Dados existentes removidos")
+
+    inicio = time.perf_counter()
+
+    def progresso(totais):
+        decorrido = time.perf_counter() - inicio
+        logger.info(
+            "%s produtores, %s fazendas, %s culturas (%.0f culturas/s)",
+            totais["produtores"], totais["fazendas"], totais["culturas"], totais["culturas"] / decorrido
+        )
+
+    totais = sintetico.gerar(engine, args.produtores, seed=args.seed, tamanho_lote=args.lote, progresso=progresso)
+    logger.info("Carga concluída em %.1f s", time.perf_counter() - inicio)
+
+    if engine.dialect.name == "postgresql":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("ANALYZE produtores, fazendas, culturas"))
+
+    db = SessionLocal()
+    try:
+        rollup.rebuild(db)
+    finally:
+        db.close()
+    logger.info(
+        "Gerados %s produtores, %s fazendas e %s culturas",
+        totais["produtores"], totais["fazendas"], totais["culturas"]
+    )
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
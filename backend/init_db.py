@@ -11,6 +11,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from sqlalchemy.orm import Session
 from app.database import SessionLocal, engine
 from app.models import Base, Produtor, Fazenda, Cultura
+from app import rollup
 from datetime import datetime
 import logging
 
@@ -30,7 +31,9 @@ def init_db():
     try:
         existing_produtores = db.query(Produtor).count()
         if existing_produtores > 0:
-            logger.info(f"Banco já possui {existing_produtores} produtores. Pulando inserção de dados mockados.")
+            logger.info("Banco já possui %s produtores. Pulando inserção de dados mockados.", existing_produtores)
+            if rollup.esta_vazio(db):
+                rollup.rebuild(db)
             return
         
         logger.info("Inserindo dados mockados...")
@@ -197,14 +200,15 @@ def init_db():
         
         # Commit final
         db.commit()
+        rollup.rebuild(db)
         
         logger.info("Dados mockados inseridos com sucesso!")
-        logger.info(f"Total de produtores criados: 4")
-        logger.info(f"Total de fazendas criadas: 5")
-        logger.info(f"Total de culturas criadas: 15")
+        logger.info("Total de produtores criados: 4")
+        logger.info("Total de fazendas criadas: 5")
+        logger.info("Total de culturas criadas: 15")
         
     except Exception as e:
-        logger.error(f"Erro ao inserir dados mockados: {e}")
+        logger.error("Erro ao inserir dados mockados: %s", e)
         db.rollback()
         raise
     finally:
@@ -1,18 +1,22 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, Response
 import logging
+import os
+import time
 import uvicorn
-from app.database import engine
-from app import models, api
+from app.ambiente import env_bool
+from app.database import engine, DB_ASYNC, get_pool_stats
+from app import models, api, api_async, metrics, database
+from app.logging_config import configurar_logging, iniciar_requisicao, encerrar_requisicao
 from app.mock_data import create_mock_data
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+configurar_logging()
 
-models.Base.metadata.create_all(bind=engine)
+# Com migrações (alembic upgrade head), o esquema fica a cargo delas
+if env_bool("DB_AUTO_CREATE", "true"):
+    models.Base.metadata.create_all(bind=engine)
 
 create_mock_data()
 
@@ -28,22 +32,47 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", metrics.HEADER_CONSULTAS, metrics.HEADER_TEMPO],
 )
+app.add_middleware(metrics.MetricasMiddleware)
+
+# Compressão gzip para respostas acima de GZIP_MIN_SIZE bytes (0 desativa)
+GZIP_MIN_SIZE = int(os.getenv("GZIP_MIN_SIZE", "1024"))
+if GZIP_MIN_SIZE > 0:
+    app.add_middleware(GZipMiddleware, minimum_size=GZIP_MIN_SIZE, compresslevel=int(os.getenv("GZIP_LEVEL", "6")))
 
+if DB_ASYNC:
+    # Rotas com AsyncSession têm precedência; o restante segue no router síncrono
+    app.include_router(api_async.router, prefix="/api/v1")
 app.include_router(api.router, prefix="/api/v1")
 
+# Quem acabou de escrever lê do primário até as réplicas alcançarem a escrita
+@app.middleware("http")
+async def ler_do_primario_apos_escrita(request: Request, call_next):
+    response = await call_next(request)
+    if request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+        database.marcar_escrita(response)
+    return response
+
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
     logger = logging.getLogger(__name__)
-    logger.info(f"Requisição: {request.method} {request.url}")
-    response = await call_next(request)
-    logger.info(f"Resposta: {response.status_code}")
+    token = iniciar_requisicao(request.scope)
+    inicio = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        encerrar_requisicao(token)
+    logger.info(
+        "Requisição: %s %s - resposta %s em %.1f ms",
+        request.method, request.url.path, response.status_code, (time.perf_counter() - inicio) * 1000
+    )
     return response
 
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     logger = logging.getLogger(__name__)
-    logger.error(f"Erro não tratado: {exc}", exc_info=True)
+    logger.error("Erro não tratado: %s", exc, exc_info=True)
     return JSONResponse(
         status_code=500,
         content={"detail": "Erro interno do servidor"}
@@ -60,8 +89,13 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Endpoint para verificação de saúde da API"""
-    return {"status": "healthy"}
+    """Endpoint para verificação de saúde da API, com o estado do pool de conexões"""
+    return {"status": "healthy", "pool": get_pool_stats()}
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """Métricas no formato de exposição do Prometheus"""
+    return Response(metrics.exportar(), media_type=metrics.CONTENT_TYPE_LATEST)
 
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
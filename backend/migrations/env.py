@@ -0,0 +1,47 @@
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine, pool
+
+from app.database import DATABASE_URL
+from app.models import Base
+
+config = context.config
+
+if config.config_file_name is not None and config.attributes.get("configurar_logging", True):
+    fileConfig(config.config_file_name)
+
+target_metadata = Base.metadata
+
+# Índices de expressão criados só por migração (busca por trigramas), que os
+# modelos não declaram e o autogenerate não deve propor remover
+INDICES_SO_MIGRACAO = {"ix_produtores_nome_trgm", "ix_fazendas_busca_trgm"}
+
+def include_object(objeto, nome, tipo, refletido, comparado_com):
+    return not (tipo == "index" and nome in INDICES_SO_MIGRACAO)
+
+def database_url() -> str:
+    return config.get_main_option("sqlalchemy.url") or DATABASE_URL
+
+def run_migrations_offline() -> None:
+    context.configure(
+        url=database_url(),
+        target_metadata=target_metadata,
+        include_object=include_object,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online() -> None:
+    connectable = create_engine(database_url(), poolclass=pool.NullPool)
+    with connectable.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata, include_object=include_object)
+        with context.begin_transaction():
+            context.run_migrations()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
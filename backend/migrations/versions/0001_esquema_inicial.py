@@ -0,0 +1,79 @@
+"""Esquema inicial: produtores, fazendas, culturas e rollup do dashboard
+
+Bancos criados antes das migrações (por Base.metadata.create_all) já têm as
+tabelas; elas são mantidas como estão e a revisão apenas passa a controlá-las.
+
+Revision ID: 0001
+Revises:
+Create Date: 2024-06-03 10:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+def _tabelas_existentes():
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+def upgrade() -> None:
+    existentes = _tabelas_existentes()
+
+    if "produtores" not in existentes:
+        op.create_table(
+            "produtores",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("cpf_cnpj", sa.String(), nullable=False),
+            sa.Column("nome", sa.String(), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("updated_at", sa.DateTime(timezone=True)),
+        )
+        op.create_index("ix_produtores_id", "produtores", ["id"])
+        op.create_index("ix_produtores_cpf_cnpj", "produtores", ["cpf_cnpj"], unique=True)
+
+    if "fazendas" not in existentes:
+        op.create_table(
+            "fazendas",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("nome", sa.String(), nullable=False),
+            sa.Column("cidade", sa.String(), nullable=False),
+            sa.Column("estado", sa.String(), nullable=False),
+            sa.Column("area_total", sa.Float(), nullable=False),
+            sa.Column("area_agricultavel", sa.Float(), nullable=False),
+            sa.Column("area_vegetacao", sa.Float(), nullable=False),
+            sa.Column("produtor_id", sa.Integer(), sa.ForeignKey("produtores.id"), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("updated_at", sa.DateTime(timezone=True)),
+        )
+        op.create_index("ix_fazendas_id", "fazendas", ["id"])
+
+    if "culturas" not in existentes:
+        op.create_table(
+            "culturas",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("nome", sa.String(), nullable=False),
+            sa.Column("safra", sa.String(), nullable=False),
+            sa.Column("fazenda_id", sa.Integer(), sa.ForeignKey("fazendas.id"), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("updated_at", sa.DateTime(timezone=True)),
+        )
+        op.create_index("ix_culturas_id", "culturas", ["id"])
+
+    if "dashboard_rollup" not in existentes:
+        op.create_table(
+            "dashboard_rollup",
+            sa.Column("dimensao", sa.String(), primary_key=True),
+            sa.Column("chave", sa.String(), primary_key=True),
+            sa.Column("quantidade", sa.Integer(), nullable=False),
+            sa.Column("area_total", sa.Float(), nullable=False),
+            sa.Column("area_agricultavel", sa.Float(), nullable=False),
+            sa.Column("area_vegetacao", sa.Float(), nullable=False),
+        )
+
+def downgrade() -> None:
+    op.drop_table("dashboard_rollup")
+    op.drop_table("culturas")
+    op.drop_table("fazendas")
+    op.drop_table("produtores")
@@ -0,0 +1,38 @@
+"""Índices para as buscas por pai e os agrupamentos do dashboard
+
+fazendas.produtor_id e culturas.fazenda_id atendem o carregamento das
+fazendas e culturas (selectinload) e as deleções em cascata;
+fazendas.estado e culturas.nome atendem os GROUP BY de rollup.calcular_da_base.
+
+No PostgreSQL os índices são criados com CREATE INDEX CONCURRENTLY, fora de
+transação, sem bloquear escritas nas tabelas. Se uma criação concorrente
+falhar, o índice fica marcado como INVALID: remova-o com DROP INDEX
+CONCURRENTLY e rode a migração de novo.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2024-06-03 10:30:00
+"""
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+INDICES = [
+    ("ix_fazendas_produtor_id", "fazendas", ["produtor_id"]),
+    ("ix_fazendas_estado", "fazendas", ["estado"]),
+    ("ix_culturas_fazenda_id", "culturas", ["fazenda_id"]),
+    ("ix_culturas_nome", "culturas", ["nome"]),
+]
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for nome, tabela, colunas in INDICES:
+            op.create_index(nome, tabela, colunas, postgresql_concurrently=True, if_not_exists=True)
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for nome, tabela, _ in reversed(INDICES):
+            op.drop_index(nome, table_name=tabela, postgresql_concurrently=True, if_exists=True)
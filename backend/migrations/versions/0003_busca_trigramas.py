@@ -0,0 +1,51 @@
+"""Busca textual: pg_trgm, unaccent e índices GIN de trigramas
+
+f_unaccent é um invólucro IMMUTABLE de unaccent (que é apenas STABLE), exigido
+para usá-lo em índices de expressão. Os índices cobrem exatamente as
+expressões de app.busca: f_unaccent(lower(nome)) em produtores e
+f_unaccent(lower(nome || ' ' || cidade)) em fazendas. Criar as extensões
+exige um usuário com permissão de CREATE no banco.
+
+Fora do PostgreSQL não há o que criar: app.busca registra as funções em cada
+conexão SQLite e a busca percorre a tabela.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2024-06-10 09:00:00
+"""
+from alembic import op
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+INDICES = [
+    ("ix_produtores_nome_trgm", "produtores", "f_unaccent(lower(nome))"),
+    ("ix_fazendas_busca_trgm", "fazendas", "f_unaccent(lower(nome || ' ' || cidade))"),
+]
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    op.execute(
+        "CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text "
+        "LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT "
+        "AS $$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$"
+    )
+    with op.get_context().autocommit_block():
+        for nome, tabela, expressao in INDICES:
+            op.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {nome} "
+                f"ON {tabela} USING gin ({expressao} gin_trgm_ops)"
+            )
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    with op.get_context().autocommit_block():
+        for nome, _, _ in INDICES:
+            op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {nome}")
+    op.execute("DROP FUNCTION IF EXISTS f_unaccent(text)")
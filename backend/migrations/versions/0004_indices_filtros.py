@@ -0,0 +1,48 @@
+"""Índices dos filtros de listagem (estado, cidade, cultura, safra, área)
+
+ix_fazendas_estado_cidade e ix_culturas_nome_safra têm como prefixo os
+índices de coluna única ix_fazendas_estado e ix_culturas_nome da revisão 0002,
+que deixam de ser necessários e são removidos depois que os novos existem.
+Com nome, safra e fazenda_id no índice, o filtro de cultura/safra é resolvido
+sem ler a tabela de culturas. Como na 0002, tudo roda com CONCURRENTLY no
+PostgreSQL.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2024-06-17 09:00:00
+"""
+from alembic import op
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+NOVOS = [
+    ("ix_fazendas_estado_cidade", "fazendas", ["estado", "cidade"]),
+    ("ix_fazendas_area_total", "fazendas", ["area_total"]),
+    ("ix_culturas_nome_safra", "culturas", ["nome", "safra", "fazenda_id"]),
+]
+
+SUBSTITUIDOS = [
+    ("ix_fazendas_estado", "fazendas", ["estado"]),
+    ("ix_culturas_nome", "culturas", ["nome"]),
+]
+
+def _criar(indices):
+    for nome, tabela, colunas in indices:
+        op.create_index(nome, tabela, colunas, postgresql_concurrently=True, if_not_exists=True)
+
+def _remover(indices):
+    for nome, tabela, _ in indices:
+        op.drop_index(nome, table_name=tabela, postgresql_concurrently=True, if_exists=True)
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        _criar(NOVOS)
+        _remover(SUBSTITUIDOS)
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        _criar(SUBSTITUIDOS)
+        _remover(NOVOS)
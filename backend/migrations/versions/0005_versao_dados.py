@@ -0,0 +1,28 @@
+"""Contador de versão dos dados para ETag / If-None-Match
+
+Como na 0001, bancos que já têm a tabela (criada por create_all) são adotados.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2024-06-24 09:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    if "versao_dados" in sa.inspect(op.get_bind()).get_table_names():
+        return
+    tabela = op.create_table(
+        "versao_dados",
+        sa.Column("chave", sa.String(), primary_key=True),
+        sa.Column("valor", sa.Integer(), nullable=False),
+    )
+    op.bulk_insert(tabela, [{"chave": "dados", "valor": 0}])
+
+def downgrade() -> None:
+    op.drop_table("versao_dados")
@@ -0,0 +1,34 @@
+"""Normaliza fazendas.estado para a sigla em maiúsculas
+
+O schema passa a gravar o estado em maiúsculas; aqui as linhas antigas são
+corrigidas e, se alguma mudou, as linhas de estado do dashboard_rollup são
+recalculadas (as chaves "mg" e "MG" viram uma só).
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2024-07-01 09:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+def upgrade() -> None:
+    alteradas = op.get_bind().execute(sa.text(
+        "UPDATE fazendas SET estado = upper(trim(estado)) WHERE estado <> upper(trim(estado))"
+    )).rowcount
+    if not alteradas:
+        return
+    op.execute("DELETE FROM dashboard_rollup WHERE dimensao = 'estado'")
+    op.execute(
+        "INSERT INTO dashboard_rollup (dimensao, chave, quantidade, area_total, area_agricultavel, area_vegetacao) "
+        "SELECT 'estado', estado, count(*), sum(area_total), sum(area_agricultavel), sum(area_vegetacao) "
+        "FROM fazendas GROUP BY estado"
+    )
+
+def downgrade() -> None:
+    # A caixa original não é guardada; o esquema não muda
+    pass
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Manutenção do rollup do dashboard
+
+Recalcula os agregados a partir das tabelas fazendas e culturas e, com
+--verificar, apenas reporta as divergências sem alterar nada.
+"""
+
+import sys
+import os
+import argparse
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import SessionLocal, engine
+from app.models import Base
+from app import rollup
+import logging
+
+# Configurar logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--verificar", action="store_true", help="Somente compara o rollup com a base e reporta divergências")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    try:
+        if args.verificar:
+            divergencias = rollup.verificar(db)
+            for d in divergencias:
+                logger.warning(
+                    "Divergência em %s=%s (%s): esperado %s, rollup %s",
+                    d['dimensao'], d['chave'], d['campo'], d['esperado'], d['atual']
+                )
+            if divergencias:
+                logger.error("%s divergências encontradas. Execute sem --verificar para reconstruir.", len(divergencias))
+                return 1
+            logger.info("Rollup do dashboard consistente com a base")
+            return 0
+
+        rollup.rebuild(db)
+        return 0
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,18 @@
+import json
+import logging
+import time
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from fastapi import FastAPI
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from app.database import get_db
+from sqlalchemy.pool import NullPool
+from app.ambiente import env_bool
+from app.database import get_db, get_read_db, get_async_db, get_async_read_db, engine_kwargs, pool_stats
 from app.models import Base
+from app.schemas import ProdutorBase
+from app import rollup, cache, api_async, logging_config, documentos, models, schemas, sintetico, pagination
 from main import app
 
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -18,12 +27,69 @@ def override_get_db():
         db.close()
 
 app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_read_db] = override_get_db
 
 client = TestClient(app)
 
+def gerar_cpf(base: int) -> str:
+    """Gera um CPF válido a partir de um número base de 9 dígitos"""
+    digitos = [int(d) for d in f"{base:09d}"]
+    for peso_inicial in (10, 11):
+        soma = sum(d * (peso_inicial - i) for i, d in enumerate(digitos))
+        resto = soma % 11
+        digitos.append(0 if resto < 2 else 11 - resto)
+    return "".join(str(d) for d in digitos)
+
+class ContadorQueries:
+    """Conta os statements SQL executados no engine de teste"""
+
+    def __init__(self):
+        self.total = 0
+        self.commits = 0
+
+    def _contar(self, *args):
+        self.total += 1
+
+    def _contar_commit(self, *args):
+        self.commits += 1
+
+    def __enter__(self):
+        event.listen(engine, "before_cursor_execute", self._contar)
+        event.listen(engine, "commit", self._contar_commit)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(engine, "before_cursor_execute", self._contar)
+        event.remove(engine, "commit", self._contar_commit)
+
+def criar_produtores(quantidade: int, fazendas_por_produtor: int = 2, inicio: int = 100000000):
+    for i in range(quantidade):
+        produtor_data = {
+            "cpf_cnpj": gerar_cpf(inicio + i),
+            "nome": f"Produtor {i}",
+            "fazendas": [
+                {
+                    "nome": f"Fazenda {i}-{j}",
+                    "cidade": "São Paulo",
+                    "estado": "SP",
+                    "area_total": 1000.0,
+                    "area_agricultavel": 800.0,
+                    "area_vegetacao": 200.0,
+                    "culturas": [
+                        {"nome": "Soja", "safra": "2023"},
+                        {"nome": "Milho", "safra": "2023"}
+                    ]
+                }
+                for j in range(fazendas_por_produtor)
+            ]
+        }
+        response = client.post("/api/v1/produtores/", json=produtor_data)
+        assert response.status_code == 201
+
 @pytest.fixture(autouse=True)
 def setup_database():
     Base.metadata.create_all(bind=engine)
+    cache.dashboard_cache.clear()
     yield
     Base.metadata.drop_all(bind=engine)
 
@@ -171,4 +237,1182 @@ def test_dashboard_stats():
     assert "SP" in data["por_estado"]
     assert "Soja" in data["por_cultura"]
     assert "Área Agricultável" in data["por_uso_solo"]
-    assert "Área de Vegetação" in data["por_uso_solo"] 
\ No newline at end of file
+    assert "Área de Vegetação" in data["por_uso_solo"] 
+
+def test_list_produtores_query_count_is_constant():
+    """Teste para garantir que a listagem não dispara consultas N+1"""
+    criar_produtores(2)
+    with ContadorQueries() as pequeno:
+        response = client.get("/api/v1/produtores/")
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+
+    criar_produtores(10, inicio=200000000)
+    with ContadorQueries() as grande:
+        response = client.get("/api/v1/produtores/")
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data) == 12
+    assert all(len(p["fazendas"]) == 2 for p in data)
+    assert all(len(f["culturas"]) == 2 for p in data for f in p["fazendas"])
+
+    assert grande.total == pequeno.total
+
+def test_fazenda_reads_query_count_is_constant():
+    """Teste para garantir consultas fixas nas leituras de fazendas"""
+    criar_produtores(1, fazendas_por_produtor=1)
+    produtor_id = client.get("/api/v1/produtores/").json()[0]["id"]
+    with ContadorQueries() as pequeno:
+        assert client.get(f"/api/v1/produtores/{produtor_id}/fazendas/").status_code == 200
+
+    criar_produtores(1, fazendas_por_produtor=8, inicio=300000000)
+    produtor_id = client.get("/api/v1/produtores/").json()[1]["id"]
+    with ContadorQueries() as grande:
+        response = client.get(f"/api/v1/produtores/{produtor_id}/fazendas/")
+    assert len(response.json()) == 8
+    assert grande.total == pequeno.total
+
+def test_cursor_pagination_produtores():
+    """Teste para paginação por cursor na listagem de produtores"""
+    criar_produtores(5, fazendas_por_produtor=0)
+
+    response = client.get("/api/v1/produtores/?limit=2")
+    assert response.status_code == 200
+    ids = [p["id"] for p in response.json()]
+    cursor = response.headers["X-Next-Cursor"]
+
+    while cursor:
+        response = client.get(f"/api/v1/produtores/?limit=2&cursor={cursor}")
+        assert response.status_code == 200
+        ids.extend(p["id"] for p in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+
+    assert ids == sorted(ids)
+    assert len(ids) == 5
+
+def test_cursor_pagination_fazendas():
+    """Teste para paginação por cursor na listagem de fazendas"""
+    criar_produtores(1, fazendas_por_produtor=3)
+
+    primeira = client.get("/api/v1/fazendas/?limit=2")
+    segunda = client.get(f"/api/v1/fazendas/?limit=2&cursor={primeira.headers['X-Next-Cursor']}")
+    assert len(primeira.json()) == 2
+    assert len(segunda.json()) == 1
+    assert "X-Next-Cursor" not in segunda.headers
+    assert segunda.json()[0]["id"] > primeira.json()[-1]["id"]
+
+def test_invalid_cursor():
+    """Teste para cursor inválido"""
+    response = client.get("/api/v1/produtores/?cursor=nao-e-um-cursor")
+    assert response.status_code == 400
+
+def test_dashboard_rollup_follows_writes():
+    """Teste para o rollup do dashboard acompanhar criações, edições e deleções"""
+    criar_produtores(2, fazendas_por_produtor=2)
+    produtores = client.get("/api/v1/produtores/").json()
+    fazenda = produtores[0]["fazendas"][0]
+
+    response = client.put(f"/api/v1/fazendas/{fazenda['id']}", json={"estado": "MG", "area_total": 1500.0})
+    assert response.status_code == 200
+    client.post(f"/api/v1/fazendas/{fazenda['id']}/culturas/", json={"nome": "Café", "safra": "2024"})
+    client.delete(f"/api/v1/culturas/{fazenda['culturas'][0]['id']}")
+    client.delete(f"/api/v1/fazendas/{produtores[0]['fazendas'][1]['id']}")
+    client.delete(f"/api/v1/produtores/{produtores[1]['id']}")
+
+    data = client.get("/api/v1/dashboard/").json()
+    assert data["total_fazendas"] == 1
+    assert data["total_hectares"] == 1500.0
+    assert data["por_estado"] == {"MG": 1}
+    assert data["por_cultura"] == {"Milho": 1, "Café": 1}
+    assert data["por_uso_solo"]["Área Agricultável"] == 800.0
+
+    db = TestingSessionLocal()
+    try:
+        assert rollup.verificar(db) == []
+    finally:
+        db.close()
+
+def test_rollup_written_last_in_key_order():
+    """O rollup é gravado por último na transação, com as chaves ordenadas"""
+    comandos = []
+
+    def registrar(conn, cursor, statement, parameters, context, executemany):
+        comandos.append((statement, parameters))
+
+    payload = {
+        "cpf_cnpj": gerar_cpf(600000000),
+        "nome": "Ordem dos locks",
+        "fazendas": [
+            {
+                "nome": f"Fazenda {estado}", "cidade": "Cidade", "estado": estado,
+                "area_total": 100.0, "area_agricultavel": 50.0, "area_vegetacao": 20.0,
+                "culturas": [{"nome": cultura, "safra": "2024"}],
+            }
+            for estado, cultura in (("SP", "Soja"), ("MG", "Café"))
+        ],
+    }
+    event.listen(engine, "before_cursor_execute", registrar)
+    try:
+        assert client.post("/api/v1/produtores/", json=payload).status_code == 201
+    finally:
+        event.remove(engine, "before_cursor_execute", registrar)
+
+    escritas = [(sql, params) for sql, params in comandos if sql.lstrip().upper().startswith(("INSERT", "UPDATE"))]
+    rollup_sql = [params for sql, params in escritas if "dashboard_rollup" in sql]
+    assert [p[1] for p in rollup_sql] == ["MG", "SP", "Café", "Soja"]
+    # Depois do rollup, só o contador de versão dos ETags
+    primeira = next(i for i, (sql, _) in enumerate(escritas) if "dashboard_rollup" in sql)
+    assert all("dashboard_rollup" in sql or "versao_dados" in sql for sql, _ in escritas[primeira:])
+
+def test_counters_without_native_upsert(monkeypatch):
+    """Sem ON CONFLICT no dialeto, rollup e versão dos dados usam UPDATE e depois INSERT"""
+    from app import upsert, versoes
+    monkeypatch.setattr(upsert, "_UPSERT_DIALETOS", {})
+    db = TestingSessionLocal()
+    try:
+        versao = versoes.atual(db)
+        criar_produtores(2)
+        client.delete(f"/api/v1/produtores/{client.get('/api/v1/produtores/').json()[0]['id']}")
+        assert rollup.verificar(db) == []
+        assert versoes.atual(db) == versao + 3
+    finally:
+        db.close()
+
+def test_dashboard_rollup_rebuild():
+    """Teste para detectar e corrigir divergências no rollup"""
+    criar_produtores(1, fazendas_por_produtor=1)
+    db = TestingSessionLocal()
+    try:
+        db.query(rollup.models.DashboardRollup).delete()
+        db.commit()
+        assert rollup.verificar(db) != []
+
+        rollup.rebuild(db)
+        assert rollup.verificar(db) == []
+    finally:
+        db.close()
+    assert client.get("/api/v1/dashboard/").json()["total_fazendas"] == 1
+
+def test_dashboard_cache_hits_and_invalidation():
+    """Teste para o cache do dashboard e a invalidação por escrita"""
+    criar_produtores(1, fazendas_por_produtor=1)
+
+    primeira = client.get("/api/v1/dashboard/").json()
+    segunda = client.get("/api/v1/dashboard/").json()
+    assert primeira == segunda
+
+    stats = client.get("/api/v1/dashboard/cache/").json()
+    assert stats["misses"] == 1
+    assert stats["hits"] == 1
+
+    criar_produtores(1, fazendas_por_produtor=1, inicio=200000000)
+    data = client.get("/api/v1/dashboard/").json()
+    assert data["total_fazendas"] == 2
+    assert client.get("/api/v1/dashboard/cache/").json()["misses"] == 2
+
+def test_dashboard_cache_stale_while_revalidate():
+    """Teste para servir valor anterior enquanto outro chamador recalcula"""
+    dashboard = cache.DashboardCache(ttl=0.01, stale=60)
+    assert dashboard.get(lambda: 1) == 1
+    time.sleep(0.02)
+
+    valores = []
+    def recalcular():
+        # Chamada concorrente durante o recálculo recebe o valor anterior
+        valores.append(dashboard.get(lambda: 3))
+        return 2
+
+    assert dashboard.get(recalcular) == 2
+    assert valores == [1]
+    assert dashboard.get(lambda: 4) == 2
+    assert dashboard.stats()["stale_hits"] == 1
+
+    dashboard.invalidate()
+    assert dashboard.get(lambda: 5) == 5
+
+def test_dashboard_cache_refills_on_primary_after_write():
+    """Depois de uma escrita, o recálculo usa o primário e não uma réplica atrasada"""
+    dashboard = cache.DashboardCache(ttl=60)
+    assert dashboard.get(lambda: "réplica", loader_primario=lambda: "primário") == "réplica"
+
+    dashboard.invalidate()
+    assert dashboard.get(lambda: "réplica atrasada", loader_primario=lambda: "primário") == "primário"
+    assert dashboard.get(lambda: "réplica atrasada", loader_primario=lambda: "outro") == "primário"
+    assert dashboard.stats()["hits"] == 1
+
+def test_import_ndjson():
+    """Teste para importação em massa via NDJSON com erros por linha"""
+    linhas = [
+        {"cpf_cnpj": gerar_cpf(100000001), "nome": "Produtor A", "fazendas": [{
+            "nome": "Fazenda A", "cidade": "Sorriso", "estado": "MT",
+            "area_total": 500.0, "area_agricultavel": 300.0, "area_vegetacao": 100.0,
+            "culturas": [{"nome": "Soja", "safra": "2023"}]
+        }]},
+        {"cpf_cnpj": "12345678900", "nome": "CPF inválido"},
+        {"cpf_cnpj": gerar_cpf(100000002), "nome": "Produtor B"},
+        {"cpf_cnpj": gerar_cpf(100000002), "nome": "Duplicado"},
+    ]
+    corpo = "\n".join(json.dumps(l) for l in linhas) + "\n{quebrado\n"
+
+    response = client.post(
+        "/api/v1/produtores/importar",
+        content=corpo.encode(),
+        headers={"Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["importados"] == 2
+    assert data["total_erros"] == 3
+    assert [e["linha"] for e in data["erros"]] == [2, 4, 5]
+
+    assert len(client.get("/api/v1/produtores/").json()) == 2
+    dashboard = client.get("/api/v1/dashboard/").json()
+    assert dashboard["por_estado"] == {"MT": 1}
+    assert dashboard["por_cultura"] == {"Soja": 1}
+
+def test_import_csv_in_batches(monkeypatch):
+    """Teste para importação CSV agrupando fazendas e culturas por produtor"""
+    from app import bulk_import
+    monkeypatch.setattr(bulk_import, "TAMANHO_LOTE", 2)
+
+    cabecalho = "cpf_cnpj,nome,fazenda_nome,fazenda_cidade,fazenda_estado,area_total,area_agricultavel,area_vegetacao,cultura_nome,cultura_safra"
+    linhas = [cabecalho]
+    for i in range(5):
+        cpf = gerar_cpf(400000000 + i)
+        linhas.append(f"{cpf},Produtor {i},Fazenda {i},Goiânia,GO,100,50,20,Soja,2023")
+        linhas.append(f"{cpf},Produtor {i},Fazenda {i},Goiânia,GO,100,50,20,Milho,2023")
+    linhas.append(f"{gerar_cpf(400000099)},Área ruim,Fazenda X,Goiânia,GO,100,90,20,,")
+
+    response = client.post("/api/v1/produtores/importar?formato=csv", content="\n".join(linhas).encode())
+    assert response.status_code == 200
+    data = response.json()
+    assert data["importados"] == 5
+    assert data["total_erros"] == 1
+    assert data["erros"][0]["linha"] == 12
+
+    produtores = client.get("/api/v1/produtores/").json()
+    assert len(produtores) == 5
+    assert all(len(p["fazendas"]) == 1 for p in produtores)
+    assert all(len(p["fazendas"][0]["culturas"]) == 2 for p in produtores)
+
+def test_import_batch_failure_reports_only_failing_rows(monkeypatch):
+    """Se o lote falha no banco, as linhas são regravadas uma a uma e só as culpadas viram erro"""
+    from app import bulk_import
+    existente = gerar_cpf(420000000)
+    assert client.post("/api/v1/produtores/", json={"cpf_cnpj": existente, "nome": "Já cadastrado"}).status_code == 201
+    # Simula a corrida: o CPF foi gravado por outra requisição depois da consulta aos existentes
+    monkeypatch.setattr(bulk_import.Importador, "_existentes", lambda self, cpfs: set())
+
+    linhas = [
+        {"cpf_cnpj": gerar_cpf(420000001), "nome": "Produtor A", "fazendas": [{
+            "nome": "Fazenda A", "cidade": "Sorriso", "estado": "MT",
+            "area_total": 500.0, "area_agricultavel": 300.0, "area_vegetacao": 100.0,
+            "culturas": [{"nome": "Soja", "safra": "2023"}]
+        }]},
+        {"cpf_cnpj": existente, "nome": "Corrida"},
+        {"cpf_cnpj": gerar_cpf(420000002), "nome": "Produtor B"},
+    ]
+    response = client.post(
+        "/api/v1/produtores/importar",
+        content="\n".join(json.dumps(l) for l in linhas).encode(),
+        headers={"Content-Type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["importados"] == 2
+    assert data["erros"] == [{"linha": 2, "erro": "CPF/CNPJ já cadastrado"}]
+    assert {p["nome"] for p in client.get("/api/v1/produtores/").json()} == {"Já cadastrado", "Produtor A", "Produtor B"}
+    db = TestingSessionLocal()
+    try:
+        assert rollup.verificar(db) == []
+    finally:
+        db.close()
+
+def test_import_runs_off_the_event_loop(monkeypatch):
+    """Interpretação, validação e gravação da importação não rodam no event loop"""
+    import asyncio
+    from app import bulk_import
+    no_loop = []
+    adicionar = bulk_import.Importador.adicionar
+    def registrar(self, linha, registro):
+        try:
+            asyncio.get_running_loop()
+            no_loop.append(True)
+        except RuntimeError:
+            no_loop.append(False)
+        adicionar(self, linha, registro)
+    monkeypatch.setattr(bulk_import.Importador, "adicionar", registrar)
+
+    linhas = [json.dumps({"cpf_cnpj": gerar_cpf(430000000 + i), "nome": f"Produtor {i}"}) for i in range(3)]
+    response = client.post(
+        "/api/v1/produtores/importar", content="\n".join(linhas).encode(),
+        headers={"Content-Type": "application/x-ndjson"}
+    )
+    assert response.json()["importados"] == 3
+    assert no_loop == [False, False, False]
+
+def test_import_reader_across_chunks():
+    """Linhas e caracteres UTF-8 partidos entre chunks são remontados"""
+    from app import bulk_import
+    corpo = "\ufeffcpf_cnpj,nome\r\n111,José\r\n111,José\n\n222,Conceição".encode()
+    leitor = bulk_import.Leitor(bulk_import.FORMATO_CSV)
+    registros = []
+    for i in range(0, len(corpo), 5):
+        registros.extend(leitor.alimentar(corpo[i:i + 5]))
+    registros.extend(leitor.finalizar())
+    assert registros == [
+        (2, {"cpf_cnpj": "111", "nome": "José", "fazendas": []}),
+        (5, {"cpf_cnpj": "222", "nome": "Conceição", "fazendas": []}),
+    ]
+
+def test_import_requires_format():
+    """Teste para importação sem formato identificável"""
+    response = client.post("/api/v1/produtores/importar", content=b"{}", headers={"Content-Type": "text/plain"})
+    assert response.status_code == 415
+
+def test_export_ndjson(monkeypatch):
+    """Teste para exportação em streaming no formato NDJSON"""
+    from app import export
+    monkeypatch.setattr(export, "TAMANHO_CHUNK", 2)
+    criar_produtores(3, fazendas_por_produtor=1)
+
+    response = client.get("/api/v1/export/culturas")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    linhas = [json.loads(l) for l in response.text.splitlines()]
+    assert len(linhas) == 6
+    assert {l["nome"] for l in linhas} == {"Soja", "Milho"}
+    assert all("fazenda_id" in l for l in linhas)
+
+def test_export_csv():
+    """Teste para exportação em streaming no formato CSV"""
+    criar_produtores(2, fazendas_por_produtor=2)
+
+    response = client.get("/api/v1/export/fazendas?formato=csv")
+    assert response.status_code == 200
+    linhas = response.text.strip().splitlines()
+    assert linhas[0].startswith("id,nome,cidade,estado")
+    assert len(linhas) == 5
+
+def test_export_unknown_entity():
+    """Teste para exportação de entidade inexistente"""
+    assert client.get("/api/v1/export/usuarios").status_code == 404
+    assert client.get("/api/v1/export/produtores?formato=xml").status_code == 400
+
+def test_update_produtor_applies_diff():
+    """Teste para atualização de produtor preservando, alterando e removendo filhos"""
+    criar_produtores(1, fazendas_por_produtor=3)
+    produtor = client.get("/api/v1/produtores/").json()[0]
+    mantida, alterada, _removida = produtor["fazendas"]
+
+    alterada["nome"] = "Fazenda Renomeada"
+    alterada["estado"] = "MG"
+    alterada["culturas"] = [
+        {"id": alterada["culturas"][0]["id"], "nome": "Café", "safra": "2024"},
+        {"nome": "Trigo", "safra": "2024"},
+    ]
+    payload = {
+        "cpf_cnpj": produtor["cpf_cnpj"],
+        "nome": "Nome Novo",
+        "fazendas": [
+            mantida,
+            alterada,
+            {
+                "nome": "Fazenda Nova", "cidade": "Cuiabá", "estado": "MT",
+                "area_total": 300.0, "area_agricultavel": 100.0, "area_vegetacao": 100.0,
+                "culturas": [{"nome": "Algodão", "safra": "2024"}]
+            },
+        ]
+    }
+    response = client.put(f"/api/v1/produtores/{produtor['id']}", json=payload)
+    assert response.status_code == 200
+    data = response.json()
+
+    assert data["nome"] == "Nome Novo"
+    fazendas = {f["nome"]: f for f in data["fazendas"]}
+    assert set(fazendas) == {mantida["nome"], "Fazenda Renomeada", "Fazenda Nova"}
+    assert fazendas[mantida["nome"]]["id"] == mantida["id"]
+    assert fazendas[mantida["nome"]]["culturas"] == mantida["culturas"]
+    renomeada = fazendas["Fazenda Renomeada"]
+    assert renomeada["id"] == alterada["id"]
+    assert renomeada["estado"] == "MG"
+    assert {c["nome"] for c in renomeada["culturas"]} == {"Café", "Trigo"}
+    assert alterada["culturas"][0]["id"] in {c["id"] for c in renomeada["culturas"]}
+
+    dashboard = client.get("/api/v1/dashboard/").json()
+    assert dashboard["por_estado"] == {"SP": 1, "MG": 1, "MT": 1}
+    assert dashboard["por_cultura"] == {"Soja": 1, "Milho": 1, "Café": 1, "Trigo": 1, "Algodão": 1}
+    db = TestingSessionLocal()
+    try:
+        assert rollup.verificar(db) == []
+    finally:
+        db.close()
+
+def test_update_produtor_rejects_repeated_ids():
+    """IDs repetidos de fazenda ou cultura no payload são recusados sem tocar no rollup"""
+    criar_produtores(1, fazendas_por_produtor=2)
+    produtor = client.get("/api/v1/produtores/").json()[0]
+    fazenda = produtor["fazendas"][0]
+    cultura = fazenda["culturas"][0]
+
+    fazenda_repetida = {**produtor, "fazendas": [fazenda, fazenda]}
+    outra = {**produtor["fazendas"][1], "culturas": [cultura]}
+    cultura_repetida = {**produtor, "fazendas": [fazenda, outra]}
+    for payload, mensagem in ((fazenda_repetida, "ID de fazenda repetido"), (cultura_repetida, "ID de cultura repetido")):
+        response = client.put(f"/api/v1/produtores/{produtor['id']}", json=payload)
+        assert response.status_code == 422
+        assert mensagem in response.text
+
+    assert client.get(f"/api/v1/produtores/{produtor['id']}").json() == produtor
+    assert client.get("/api/v1/dashboard/").json()["total_fazendas"] == 2
+    db = TestingSessionLocal()
+    try:
+        assert rollup.verificar(db) == []
+    finally:
+        db.close()
+
+def test_update_produtor_single_commit_and_fixed_statements():
+    """Teste para atualização aninhada em uma transação com statements fixos"""
+    def atualizar(inicio, quantidade):
+        criar_produtores(1, fazendas_por_produtor=quantidade, inicio=inicio)
+        produtor = [p for p in client.get("/api/v1/produtores/").json() if p["cpf_cnpj"] == gerar_cpf(inicio)][0]
+        for fazenda in produtor["fazendas"]:
+            fazenda["area_total"] = 2000.0
+            fazenda["culturas"].append({"nome": "Feijão", "safra": "2024"})
+        produtor["fazendas"].append({
+            "nome": "Extra", "cidade": "Palmas", "estado": "TO",
+            "area_total": 10.0, "area_agricultavel": 5.0, "area_vegetacao": 5.0, "culturas": []
+        })
+        with ContadorQueries() as contador:
+            response = client.put(f"/api/v1/produtores/{produtor['id']}", json=produtor)
+        assert response.status_code == 200
+        assert len(response.json()["fazendas"]) == quantidade + 1
+        return contador
+
+    pequeno = atualizar(500000000, 2)
+    grande = atualizar(600000000, 20)
+    assert pequeno.commits == 1
+    assert grande.commits == 1
+    assert grande.total == pequeno.total
+
+def test_create_produtor_single_commit():
+    """Teste para criação aninhada em uma única transação"""
+    def criar(inicio, quantidade):
+        with ContadorQueries() as contador:
+            criar_produtores(1, fazendas_por_produtor=quantidade, inicio=inicio)
+        return contador
+
+    # No SQLite o INSERT ... RETURNING ordenado é emitido linha a linha; o que
+    # não pode crescer com o número de fazendas é a quantidade de commits
+    pequeno = criar(700000000, 1)
+    grande = criar(800000000, 25)
+    assert pequeno.commits == 1
+    assert grande.commits == 1
+
+    produtor_id = client.get("/api/v1/produtores/?limit=1").json()[0]["id"]
+    with ContadorQueries() as contador:
+        response = client.post(f"/api/v1/produtores/{produtor_id}/fazendas/", json={
+            "nome": "Fazenda Nova", "cidade": "Sinop", "estado": "MT",
+            "area_total": 100.0, "area_agricultavel": 50.0, "area_vegetacao": 20.0,
+            "culturas": [{"nome": "Soja", "safra": "2024"}, {"nome": "Milho", "safra": "2024"}]
+        })
+    assert response.status_code == 201
+    assert len(response.json()["culturas"]) == 2
+    assert contador.commits == 1
+
+def test_create_produtor_is_atomic(monkeypatch):
+    """Teste para não deixar produtor parcial quando a criação falha"""
+    def falhar(*args, **kwargs):
+        raise RuntimeError("falha simulada")
+    monkeypatch.setattr(rollup, "registrar_culturas", falhar)
+
+    with pytest.raises(RuntimeError):
+        criar_produtores(1)
+    assert client.get("/api/v1/produtores/").json() == []
+    assert client.get("/api/v1/fazendas/").json() == []
+
+async_engine = create_async_engine("sqlite+aiosqlite:///./test.db", poolclass=NullPool)
+AsyncTestingSessionLocal = async_sessionmaker(async_engine, autoflush=False)
+
+async def override_get_async_db():
+    async with AsyncTestingSessionLocal() as db:
+        yield db
+
+def test_async_routes():
+    """Teste para as rotas assíncronas com AsyncSession"""
+    async_app = FastAPI()
+    async_app.include_router(api_async.router, prefix="/api/v1")
+    async_app.dependency_overrides[get_async_db] = override_get_async_db
+    async_app.dependency_overrides[get_async_read_db] = override_get_async_db
+
+    with TestClient(async_app) as async_client:
+        produtor_data = {
+            "cpf_cnpj": gerar_cpf(900000000),
+            "nome": "Produtor Async",
+            "fazendas": [{
+                "nome": "Fazenda Async", "cidade": "Dourados", "estado": "MS",
+                "area_total": 100.0, "area_agricultavel": 50.0, "area_vegetacao": 20.0,
+                "culturas": [{"nome": "Soja", "safra": "2024"}]
+            }]
+        }
+        response = async_client.post("/api/v1/produtores/", json=produtor_data)
+        assert response.status_code == 201
+        produtor = response.json()
+        assert produtor["fazendas"][0]["culturas"][0]["nome"] == "Soja"
+
+        assert async_client.post("/api/v1/produtores/", json=produtor_data).status_code == 400
+
+        fazenda_id = produtor["fazendas"][0]["id"]
+        response = async_client.put(f"/api/v1/fazendas/{fazenda_id}", json={"estado": "MT"})
+        assert response.status_code == 200
+        assert response.json()["culturas"][0]["nome"] == "Soja"
+
+        response = async_client.get("/api/v1/produtores/?limit=1")
+        assert response.status_code == 200
+        assert "X-Next-Cursor" in response.headers
+
+        dashboard = async_client.get("/api/v1/dashboard/").json()
+        assert dashboard["por_estado"] == {"MT": 1}
+
+        assert async_client.delete(f"/api/v1/produtores/{produtor['id']}").status_code == 204
+        assert async_client.get(f"/api/v1/produtores/{produtor['id']}").status_code == 404
+
+    # Mesmo banco visto pelas rotas síncronas
+    assert client.get("/api/v1/produtores/").json() == []
+
+def test_health_reports_pool_stats():
+    """Teste para o estado do pool no /health"""
+    response = client.get("/health")
+    assert response.status_code == 200
+    pool = response.json()["pool"]["principal"]
+    for campo in ("conexoes_em_uso", "overflow", "checkouts", "timeouts", "espera_max_ms"):
+        assert campo in pool
+
+def test_pool_telemetry_counts_timeouts(monkeypatch):
+    """Teste para a contagem de esperas e timeouts do pool instrumentado"""
+    monkeypatch.setattr("app.database.DB_POOL_SIZE", 1)
+    monkeypatch.setattr("app.database.DB_MAX_OVERFLOW", 0)
+    monkeypatch.setattr("app.database.DB_POOL_TIMEOUT", 0.05)
+    pool_engine = create_engine(SQLALCHEMY_DATABASE_URL, **engine_kwargs(SQLALCHEMY_DATABASE_URL))
+    try:
+        with pool_engine.connect():
+            assert pool_stats(pool_engine)["conexoes_em_uso"] == 1
+            with pytest.raises(exc.TimeoutError):
+                pool_engine.connect()
+        stats = pool_stats(pool_engine)
+        assert stats["conexoes_em_uso"] == 0
+        assert stats["checkouts"] == 2
+        assert stats["timeouts"] == 1
+        assert stats["espera_max_ms"] >= 50
+    finally:
+        pool_engine.dispose()
+
+def test_pool_wait_excludes_connect_time():
+    """A espera registrada pelo pool não inclui o tempo de abrir conexões novas"""
+    pool_engine = create_engine(SQLALCHEMY_DATABASE_URL, **engine_kwargs(SQLALCHEMY_DATABASE_URL))
+    event.listen(pool_engine, "connect", lambda *args: time.sleep(0.1))
+    try:
+        with pool_engine.connect():
+            pass
+        stats = pool_stats(pool_engine)
+        assert stats["checkouts"] == 1
+        assert stats["espera_max_ms"] < 50
+    finally:
+        pool_engine.dispose()
+
+def test_env_bool_accepts_the_same_values_everywhere(monkeypatch):
+    """Todas as flags booleanas de ambiente aceitam os mesmos valores"""
+    for valor, esperado in [("1", True), ("true", True), ("YES", True), ("on", True), (" On ", True), ("0", False), ("off", False), ("", False)]:
+        monkeypatch.setenv("FLAG_TESTE", valor)
+        assert env_bool("FLAG_TESTE", "false") is esperado, valor
+
+def test_read_routes_use_replicas(monkeypatch, tmp_path):
+    """Leituras vão para as réplicas em rodízio; escritas, X-Read-Primary e quem acabou de escrever ficam no primário"""
+    from app import database
+    urls = []
+    for i, nome in enumerate(("A", "B")):
+        url = f"sqlite:///{tmp_path / f'replica_{nome}.db'}"
+        replica = create_engine(url)
+        Base.metadata.create_all(bind=replica)
+        with sessionmaker(bind=replica)() as db:
+            db.add(models.Produtor(cpf_cnpj=gerar_cpf(700000000 + i), nome=f"Réplica {nome}"))
+            db.commit()
+        replica.dispose()
+        urls.append(url)
+
+    replicas = database.Replicas(urls)
+    monkeypatch.setattr(database, "replicas", replicas)
+    monkeypatch.setattr(database, "SessionLocal", TestingSessionLocal)
+    monkeypatch.delitem(app.dependency_overrides, get_read_db)
+    try:
+        criado = client.post("/api/v1/produtores/", json={"cpf_cnpj": gerar_cpf(710000000), "nome": "No primário"})
+        assert criado.status_code == 201
+        # A resposta da escrita é lida no primário, na mesma sessão
+        assert criado.json()["nome"] == "No primário"
+
+        # Logo depois da escrita o mesmo cliente lê do primário (cookie), mesmo sem o cabeçalho
+        assert database.COOKIE_LER_PRIMARIO in criado.cookies
+        assert client.get(f"/api/v1/produtores/{criado.json()['id']}").json()["nome"] == "No primário"
+        client.cookies.clear()
+
+        # A escrita invalidou o cache do dashboard; o recálculo vem do primário,
+        # não das réplicas (que não têm fazendas)
+        assert client.post(f"/api/v1/produtores/{criado.json()['id']}/fazendas/", json={
+            "nome": "Fazenda Primário", "cidade": "Uberaba", "estado": "MG",
+            "area_total": 100.0, "area_agricultavel": 50.0, "area_vegetacao": 20.0, "culturas": [],
+        }).status_code == 201
+        client.cookies.clear()
+        assert client.get("/api/v1/dashboard/").json()["total_fazendas"] == 1
+
+        nomes = [client.get("/api/v1/produtores/").json()[0]["nome"] for _ in range(4)]
+        assert sorted(nomes) == ["Réplica A", "Réplica A", "Réplica B", "Réplica B"]
+        assert nomes[0] != nomes[1]
+        # Mesmo ID nas três bases: sem o cabeçalho, a leitura vem de uma réplica
+        assert client.get(f"/api/v1/produtores/{criado.json()['id']}").json()["nome"].startswith("Réplica")
+
+        primario = client.get(f"/api/v1/produtores/{criado.json()['id']}", headers={database.HEADER_LER_PRIMARIO: "1"})
+        assert primario.status_code == 200
+        assert primario.json()["nome"] == "No primário"
+
+        pools = client.get("/health").json()["pool"]
+        assert "leitura-0" in pools and "leitura-1" in pools
+    finally:
+        client.cookies.clear()
+        for replica in replicas.engines:
+            replica.dispose()
+
+def test_metrics_endpoint():
+    """Teste para as métricas de requisição, banco e cache em /metrics"""
+    produtor = client.post("/api/v1/produtores/", json={"cpf_cnpj": gerar_cpf(910000000), "nome": "Produtor Métricas"}).json()
+    client.get(f"/api/v1/produtores/{produtor['id']}")
+    client.get("/api/v1/dashboard/")
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    corpo = response.text
+    assert 'http_requests_total{method="GET",route="/api/v1/produtores/{produtor_id}",status="200"}' in corpo
+    assert 'http_request_duration_seconds_bucket{le="0.005",method="GET",route="/api/v1/produtores/{produtor_id}",status="200"}' in corpo
+    assert 'http_request_db_queries_count{method="GET",route="/api/v1/produtores/{produtor_id}"}' in corpo
+    assert "http_requests_in_progress" in corpo
+    assert 'dashboard_cache_requests_total{resultado="miss"}' in corpo
+    assert 'db_pool_connections{engine="principal",estado="em_uso"}' in corpo
+
+def consultas(response) -> int:
+    return int(response.headers["X-DB-Queries"])
+
+def test_query_budget_per_endpoint():
+    """Teste para o orçamento de comandos SQL de cada endpoint (regressões N+1)"""
+    criar_produtores(5, fazendas_por_produtor=3)
+    produtor = client.get("/api/v1/produtores/").json()[0]
+    fazenda = produtor["fazendas"][0]
+
+    # As leituras com ETag incluem a consulta da versão dos dados e as escritas, o incremento
+    orcamentos = [
+        ("get", "/api/v1/produtores/", None, 4),
+        ("get", f"/api/v1/produtores/{produtor['id']}", None, 4),
+        ("get", f"/api/v1/produtores/{produtor['id']}/fazendas/", None, 4),
+        ("get", "/api/v1/fazendas/", None, 3),
+        ("get", f"/api/v1/fazendas/{fazenda['id']}", None, 3),
+        ("get", f"/api/v1/fazendas/{fazenda['id']}/culturas/", None, 3),
+        ("get", "/api/v1/dashboard/", None, 1),
+        ("put", f"/api/v1/fazendas/{fazenda['id']}", {"estado": "GO"}, 8),
+        ("post", f"/api/v1/fazendas/{fazenda['id']}/culturas/", {"nome": "Café", "safra": "2024"}, 6),
+        ("put", f"/api/v1/produtores/{produtor['id']}", {"cpf_cnpj": produtor["cpf_cnpj"], "nome": "Renomeado"}, 14),
+    ]
+    for metodo, url, corpo, orcamento in orcamentos:
+        response = client.request(metodo, url, json=corpo)
+        assert response.status_code < 300, url
+        assert consultas(response) <= orcamento, f"{metodo.upper()} {url}: {consultas(response)} > {orcamento}"
+        assert float(response.headers["X-DB-Time-ms"]) >= 0
+
+def test_query_threshold_logs_warning(monkeypatch, caplog):
+    """Teste para o aviso de requisições acima do limite de comandos SQL"""
+    criar_produtores(1)
+    monkeypatch.setattr("app.metrics.DB_QUERY_WARN_THRESHOLD", 2)
+    with caplog.at_level("WARNING", logger="app.metrics"):
+        client.get("/api/v1/produtores/")
+    assert "GET /api/v1/produtores/ emitiu 4 comandos SQL" in caplog.text
+
+def test_logging_json_and_debug_sampling():
+    """Teste para o formato JSON e a amostragem por rota dos logs de debug"""
+    filtro = logging_config.FiltroRequisicao(1.0, {"/api/v1/produtores/": 0.0})
+    formatador = logging_config.FormatadorJSON()
+
+    class Rota:
+        path = "/api/v1/produtores/"
+
+    def registro(nivel):
+        return logging.LogRecord("app.crud", nivel, __file__, 1, "Buscando produtor %s", (7,), None)
+
+    token = logging_config.iniciar_requisicao({"method": "GET", "route": Rota()})
+    try:
+        debug, info = registro(logging.DEBUG), registro(logging.INFO)
+        assert not filtro.filter(debug)
+        assert filtro.filter(info)
+    finally:
+        logging_config.encerrar_requisicao(token)
+    dados = json.loads(formatador.format(info))
+    assert dados["message"] == "Buscando produtor 7"
+    assert dados["route"] == "/api/v1/produtores/"
+    assert dados["method"] == "GET"
+
+    # Fora de uma requisição vale a taxa padrão
+    assert filtro.filter(registro(logging.DEBUG))
+
+def test_batch_document_validation_matches_schema():
+    """Teste para a validação em lote de CPF/CNPJ contra o validador do schema"""
+    lote = [
+        "529.982.247-25", "52998224725", "52998224724", "11111111111",
+        "11.222.333/0001-81", "11222333000182", "00000000000000",
+        "123", "", gerar_cpf(123456789),
+    ]
+    normalizados, _ = documentos.validar_em_lote(lote)
+    assert normalizados[0] == "52998224725"
+
+    for documento, erro in zip(lote, documentos.erros(lote)):
+        try:
+            ProdutorBase(cpf_cnpj=documento, nome="Teste")
+            esperado = None
+        except ValueError as exc:
+            esperado = exc.errors()[0]["msg"].replace("Value error, ", "")
+        assert erro == esperado, documento
+
+def test_document_audit_reports_invalid_rows():
+    """Teste para a auditoria da coluna produtores.cpf_cnpj"""
+    criar_produtores(2, fazendas_por_produtor=0)
+    db = TestingSessionLocal()
+    try:
+        db.add_all([
+            models.Produtor(cpf_cnpj="52998224724", nome="Inválido"),
+            models.Produtor(cpf_cnpj="529.982.247-25", nome="Formatado"),
+        ])
+        db.commit()
+        problemas = list(documentos.auditar(db, tamanho_chunk=2))
+    finally:
+        db.close()
+    assert [(p["cpf_cnpj"], p["erro"]) for p in problemas] == [
+        ("52998224724", "CPF inválido"),
+        ("529.982.247-25", "CPF/CNPJ não normalizado"),
+    ]
+
+def test_synthetic_generator_is_valid_and_reproducible():
+    """Teste para o gerador de dados sintéticos"""
+    lote = sintetico.GeradorSintetico(seed=7).gerar_lote(1, 1, 1, 200)
+    assert lote == sintetico.GeradorSintetico(seed=7).gerar_lote(1, 1, 1, 200)
+    assert lote != sintetico.GeradorSintetico(seed=8).gerar_lote(1, 1, 1, 200)
+
+    totais = sintetico.gerar(engine, 25, seed=7, tamanho_lote=10)
+    assert totais["produtores"] == 25
+    assert totais["fazendas"] >= 25
+
+    db = TestingSessionLocal()
+    try:
+        cpfs = [cpf for (cpf,) in db.query(models.Produtor.cpf_cnpj)]
+        assert len(set(cpfs)) == 25
+        assert documentos.erros(cpfs) == [None] * 25
+        rollup.rebuild(db)
+    finally:
+        db.close()
+
+    produtores = client.get("/api/v1/produtores/?limit=100").json()
+    assert len(produtores) == 25
+    # Os dados gerados passam pelas validações dos schemas de entrada
+    for produtor in produtores:
+        schemas.ProdutorCreate.model_validate(produtor)
+    assert client.get("/api/v1/dashboard/").json()["total_fazendas"] == totais["fazendas"]
+
+def test_synthetic_append_skips_existing_documents():
+    """Cargas acrescentadas com outra seed não repetem documentos nem abortam na unicidade"""
+    import numpy as np
+    assert sintetico.gerar(engine, 10, seed=1, tamanho_lote=10)["produtores"] == 10
+
+    # Documento que a próxima carga daria ao ID 501, cadastrado antes por fora
+    documento = sintetico.GeradorSintetico(seed=2).documentos(np.array([501]))[0]
+    db = TestingSessionLocal()
+    try:
+        db.add(models.Produtor(id=500, cpf_cnpj=documento, nome="Cadastrado pela API"))
+        db.commit()
+    finally:
+        db.close()
+
+    totais = sintetico.gerar(engine, 10, seed=2, tamanho_lote=10)
+    assert totais["produtores"] == 9
+    db = TestingSessionLocal()
+    try:
+        cpfs = [cpf for (cpf,) in db.query(models.Produtor.cpf_cnpj)]
+        assert len(cpfs) == len(set(cpfs)) == 20
+        assert db.get(models.Produtor, 501) is None
+        assert db.query(models.Fazenda).filter(models.Fazenda.produtor_id == 501).count() == 0
+    finally:
+        db.close()
+
+def test_search_is_accent_insensitive_fuzzy_and_paged():
+    """Busca ignora acentos, aceita trechos e erros de digitação e pagina por relevância"""
+    fazenda = {"cidade": "Ribeirão Preto", "estado": "SP", "area_total": 100.0,
+               "area_agricultavel": 60.0, "area_vegetacao": 30.0, "culturas": []}
+    for i, nome in enumerate(["José Araújo", "Maria Araujo Lima", "Joao Silva", "Pedro Souza"]):
+        response = client.post("/api/v1/produtores/", json={
+            "cpf_cnpj": gerar_cpf(200000000 + i), "nome": nome,
+            "fazendas": [{**fazenda, "nome": f"Fazenda Santa Fé {i}"}],
+        })
+        assert response.status_code == 201
+
+    response = client.get("/api/v1/busca/", params={"q": "ARAUJO"})
+    assert response.status_code == 200
+    nomes = [r["nome"] for r in response.json() if r["tipo"] == "produtor"]
+    assert sorted(nomes) == ["José Araújo", "Maria Araujo Lima"]
+
+    # Erro de digitação e trecho de palavra
+    response = client.get("/api/v1/busca/", params={"q": "araujjo", "tipo": "produtor"})
+    assert {r["nome"] for r in response.json()} == {"José Araújo", "Maria Araujo Lima"}
+    response = client.get("/api/v1/busca/", params={"q": "ribeirao", "tipo": "fazenda"})
+    resultados = response.json()
+    assert len(resultados) == 4
+    assert all(r["cidade"] == "Ribeirão Preto" and r["produtor_id"] for r in resultados)
+
+    # Paginação por cursor cobre todos os resultados, em ordem de relevância, sem repetir
+    vistos, cursor = [], None
+    while True:
+        params = {"q": "santa fe", "limit": 3}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/api/v1/busca/", params=params)
+        assert response.status_code == 200
+        vistos.extend(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert len(vistos) == 4
+    assert len({(r["tipo"], r["id"]) for r in vistos}) == 4
+    relevancias = [r["relevancia"] for r in vistos]
+    assert relevancias == sorted(relevancias, reverse=True)
+
+    assert client.get("/api/v1/busca/", params={"q": "ab"}).status_code == 422
+    assert client.get("/api/v1/busca/", params={"q": "abc", "tipo": "cultura"}).status_code == 400
+    assert client.get("/api/v1/busca/", params={"q": "abc", "cursor": "xyz"}).status_code == 400
+    cursor_de_id = pagination.encode_cursor(10)
+    assert client.get("/api/v1/busca/", params={"q": "abc", "cursor": cursor_de_id}).status_code == 400
+
+def test_create_all_prepares_search_on_postgres():
+    """create_all sem migrações cria no PostgreSQL o que a busca usa"""
+    from sqlalchemy import create_mock_engine
+    from app import busca
+    comandos = []
+    mock = create_mock_engine("postgresql://", lambda sql, *args, **kwargs: comandos.append(str(sql.compile(dialect=mock.dialect))))
+    Base.metadata.create_all(bind=mock, checkfirst=False)
+    sql = "\n".join(comandos)
+    for comando in busca.DDL_BUSCA:
+        assert comando in sql
+    # As extensões e f_unaccent vêm depois das tabelas que os índices usam
+    assert sql.index("CREATE TABLE fazendas") < sql.index("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # Fora do PostgreSQL nada disso é emitido
+    comandos.clear()
+    mock = create_mock_engine("sqlite://", lambda sql, *args, **kwargs: comandos.append(str(sql.compile(dialect=mock.dialect))))
+    Base.metadata.create_all(bind=mock, checkfirst=False)
+    assert not any("EXTENSION" in comando for comando in comandos)
+
+def test_list_filters_with_cursor_pagination():
+    """Filtros de estado, cidade, cultura, safra e área rodam no SQL e combinam com o cursor"""
+    def fazenda(nome, estado, cidade, area, culturas):
+        return {"nome": nome, "cidade": cidade, "estado": estado, "area_total": area,
+                "area_agricultavel": area / 2, "area_vegetacao": area / 4,
+                "culturas": [{"nome": c, "safra": s} for c, s in culturas]}
+
+    produtores = [
+        [fazenda("A", "SP", "Ribeirão Preto", 1500.0, [("Soja", "2023"), ("Milho", "2022")])],
+        [fazenda("B", "SP", "Campinas", 800.0, [("Soja", "2023")])],
+        [fazenda("C", "MT", "Sorriso", 5000.0, [("Soja", "2023")]),
+         fazenda("D", "SP", "Campinas", 2000.0, [("Soja", "2022"), ("Milho", "2023")])],
+        [fazenda("E", "SP", "Ribeirão Preto", 3000.0, [("Soja", "2023"), ("Soja", "2024")])],
+    ]
+    for i, fazendas in enumerate(produtores):
+        response = client.post("/api/v1/produtores/", json={
+            "cpf_cnpj": gerar_cpf(300000000 + i), "nome": f"Produtor {i}", "fazendas": fazendas
+        })
+        assert response.status_code == 201
+
+    def nomes(params):
+        response = client.get("/api/v1/fazendas/", params=params)
+        assert response.status_code == 200
+        return [f["nome"] for f in response.json()]
+
+    # Soja na safra 2023 precisa estar na mesma cultura: D (Soja 2022, Milho 2023) fica de fora
+    filtro = {"estado": "sp", "cultura": "Soja", "safra": "2023", "area_min": 1000}
+    assert nomes(filtro) == ["A", "E"]
+    assert nomes({"cidade": "Campinas"}) == ["B", "D"]
+    assert nomes({"area_min": 1500, "area_max": 3000}) == ["A", "D", "E"]
+    assert nomes({"safra": "2024"}) == ["E"]
+
+    # O cursor percorre só o conjunto filtrado
+    paginas, cursor = [], None
+    while True:
+        params = {"estado": "SP", "limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/api/v1/fazendas/", params=params)
+        paginas.append([f["nome"] for f in response.json()])
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert paginas == [["A", "B"], ["D", "E"], []]
+
+    # Produtores com ao menos uma fazenda que casa, retornados com todas as fazendas
+    response = client.get("/api/v1/produtores/", params={"cultura": "Milho", "safra": "2023"})
+    assert [p["nome"] for p in response.json()] == ["Produtor 2"]
+    assert len(response.json()[0]["fazendas"]) == 2
+    response = client.get("/api/v1/produtores/", params={"estado": "SP", "area_min": 1000, "limit": 2})
+    assert [p["nome"] for p in response.json()] == ["Produtor 0", "Produtor 2"]
+    cursor = response.headers["X-Next-Cursor"]
+    response = client.get("/api/v1/produtores/", params={"estado": "SP", "area_min": 1000, "limit": 2, "cursor": cursor})
+    assert [p["nome"] for p in response.json()] == ["Produtor 3"]
+
+    response = client.get("/api/v1/fazendas/", params={"area_min": 10, "area_max": 5})
+    assert response.status_code == 400
+
+def test_estado_is_stored_uppercase():
+    """estado é gravado em maiúsculas, então o filtro casa com qualquer caixa"""
+    payload = {
+        "cpf_cnpj": gerar_cpf(610000000),
+        "nome": "Produtor Mineiro",
+        "fazendas": [{
+            "nome": "Fazenda Minúscula", "cidade": "Uberaba", "estado": " mg ",
+            "area_total": 100.0, "area_agricultavel": 50.0, "area_vegetacao": 20.0,
+        }],
+    }
+    criado = client.post("/api/v1/produtores/", json=payload).json()
+    fazenda = criado["fazendas"][0]
+    assert fazenda["estado"] == "MG"
+    for estado in ("mg", "MG", "Mg"):
+        assert [f["id"] for f in client.get("/api/v1/fazendas/", params={"estado": estado}).json()] == [fazenda["id"]]
+
+    atualizada = client.put(f"/api/v1/fazendas/{fazenda['id']}", json={"estado": "go"}).json()
+    assert atualizada["estado"] == "GO"
+    assert client.get("/api/v1/dashboard/").json()["por_estado"] == {"GO": 1}
+
+def test_conditional_get_with_etag():
+    """ETag + If-None-Match: 304 sem carregar o grafo até a próxima escrita"""
+    criar_produtores(2)
+    produtor = client.get("/api/v1/produtores/").json()[0]
+    urls = [
+        "/api/v1/produtores/",
+        f"/api/v1/produtores/{produtor['id']}",
+        f"/api/v1/produtores/{produtor['id']}/fazendas/",
+        "/api/v1/fazendas/",
+        f"/api/v1/fazendas/{produtor['fazendas'][0]['id']}",
+        f"/api/v1/fazendas/{produtor['fazendas'][0]['id']}/culturas/",
+        "/api/v1/dashboard/",
+    ]
+    etags = {}
+    for url in urls:
+        response = client.get(url)
+        etags[url] = response.headers["ETag"]
+        assert response.headers["Cache-Control"] == "no-cache"
+
+        response = client.get(url, headers={"If-None-Match": etags[url]})
+        assert response.status_code == 304, url
+        assert response.content == b""
+        assert response.headers["ETag"] == etags[url]
+        assert consultas(response) <= 1, url
+
+    # O ETag é de cada URL: copiado de outro recurso, ou usado num ID que não existe, não vale
+    outro = f"/api/v1/produtores/{produtor['id']}"
+    assert client.get("/api/v1/produtores/99999", headers={"If-None-Match": etags[outro]}).status_code == 404
+    assert client.get(urls[0], headers={"If-None-Match": etags[outro]}).status_code == 200
+    assert client.get(urls[0] + "?limit=1", headers={"If-None-Match": etags[urls[0]]}).status_code == 200
+
+    # ETags fracos; listas e a forma sem W/ também casam (comparação fraca)
+    url = urls[0]
+    assert all(etag.startswith('W/"') for etag in etags.values())
+    response = client.get(url, headers={"If-None-Match": f'"outro", {etags[url][2:]}'})
+    assert response.status_code == 304
+
+    # Com gzip o corpo muda, mas o ETag fraco é o mesmo e o 304 vale para as duas codificações
+    comprimida = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert comprimida.headers["content-encoding"] == "gzip"
+    assert comprimida.headers["ETag"] == etags[url]
+    for codificacao in ("gzip", "identity"):
+        response = client.get(url, headers={"Accept-Encoding": codificacao, "If-None-Match": comprimida.headers["ETag"]})
+        assert response.status_code == 304, codificacao
+        assert response.content == b""
+
+    # Qualquer escrita em produtores, fazendas ou culturas muda a versão
+    response = client.put(f"/api/v1/fazendas/{produtor['fazendas'][0]['id']}", json={"cidade": "Campinas"})
+    assert response.status_code == 200
+    for url in urls:
+        response = client.get(url, headers={"If-None-Match": etags[url]})
+        if url == "/api/v1/dashboard/":
+            # O conteúdo do dashboard não depende da cidade
+            assert response.status_code == 304
+            continue
+        assert response.status_code == 200, url
+        assert response.headers["ETag"] != etags[url]
+
+    # Escritas pelo ORM (flush) e remoções em cascata também contam
+    etag = client.get(urls[3]).headers["ETag"]
+    assert client.delete(f"/api/v1/produtores/{produtor['id']}").status_code == 204
+    assert client.get(urls[3], headers={"If-None-Match": etag}).status_code == 200
+
+    # Uma transação desfeita não muda a versão
+    etag = client.get(urls[0]).headers["ETag"]
+    db = TestingSessionLocal()
+    try:
+        db.add(models.Produtor(cpf_cnpj=gerar_cpf(900000000), nome="Desfeito"))
+        db.flush()
+        db.rollback()
+        db.commit()
+    finally:
+        db.close()
+    assert client.get(urls[0], headers={"If-None-Match": etag}).status_code == 304
+
+def test_fast_json_matches_default_serialization(monkeypatch):
+    """O caminho rápido (orjson direto do ORM) gera o mesmo corpo do response_model padrão"""
+    from app import respostas
+    criar_produtores(3)
+    produtor = client.get("/api/v1/produtores/").json()[0]
+    fazenda_id = produtor["fazendas"][0]["id"]
+    urls = [
+        "/api/v1/produtores/?limit=2",
+        f"/api/v1/produtores/{produtor['id']}",
+        f"/api/v1/produtores/{produtor['id']}/fazendas/",
+        "/api/v1/fazendas/",
+        f"/api/v1/fazendas/{fazenda_id}",
+        f"/api/v1/fazendas/{fazenda_id}/culturas/",
+    ]
+    rapidas = [client.get(url) for url in urls]
+    monkeypatch.setattr(respostas, "JSON_RAPIDO", False)
+    padrao = [client.get(url) for url in urls]
+    for url, rapida, lenta in zip(urls, rapidas, padrao):
+        assert rapida.status_code == lenta.status_code == 200, url
+        assert rapida.headers["content-type"] == "application/json"
+        assert rapida.json() == lenta.json(), url
+        assert list(rapida.json()[0] if isinstance(rapida.json(), list) else rapida.json()) == \
+            list(lenta.json()[0] if isinstance(lenta.json(), list) else lenta.json())
+        assert rapida.headers["ETag"] == lenta.headers["ETag"]
+    assert rapidas[0].headers["X-Next-Cursor"] == padrao[0].headers["X-Next-Cursor"]
+
+def test_gzip_above_threshold():
+    """Respostas acima de GZIP_MIN_SIZE saem comprimidas quando o cliente aceita gzip"""
+    criar_produtores(10)
+    grande = client.get("/api/v1/produtores/", headers={"Accept-Encoding": "gzip"})
+    assert grande.headers["content-encoding"] == "gzip"
+    assert int(grande.headers["content-length"]) < len(grande.content)
+    assert len(grande.json()) == 10
+
+    pequena = client.get("/api/v1/dashboard/cache/", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in pequena.headers
+    sem_gzip = client.get("/api/v1/produtores/", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in sem_gzip.headers
+
+def test_sparse_fields_and_expand(monkeypatch):
+    """fields= e expand= limitam a resposta e as consultas ao que foi pedido"""
+    from app import respostas
+    criar_produtores(3)
+    completo = client.get("/api/v1/produtores/?limit=2")
+    produtor = completo.json()[0]
+    fazenda = produtor["fazendas"][0]
+
+    plana = client.get("/api/v1/produtores/?limit=2&fields=id,nome,cpf_cnpj")
+    assert plana.status_code == 200
+    assert plana.json() == [{k: p[k] for k in ("cpf_cnpj", "nome", "id")} for p in completo.json()]
+    assert plana.headers["X-Next-Cursor"] == completo.headers["X-Next-Cursor"]
+    # Versão dos dados + uma consulta de projeção, sem fazendas nem culturas
+    assert consultas(plana) == 2
+    # O cursor segue valendo mesmo sem o id na resposta
+    seguinte = client.get("/api/v1/produtores/?limit=2&fields=nome", params={"cursor": plana.headers["X-Next-Cursor"]})
+    assert seguinte.json() == [{"nome": "Produtor 2"}]
+
+    url = f"/api/v1/produtores/{produtor['id']}"
+    sem_culturas = client.get(url, params={"expand": "fazendas", "fields": "nome,fazendas.nome,fazendas.area_total"})
+    assert sem_culturas.json() == {
+        "nome": produtor["nome"],
+        "fazendas": [{"nome": f["nome"], "area_total": f["area_total"]} for f in produtor["fazendas"]],
+    }
+    assert consultas(sem_culturas) == 3
+    com_culturas = client.get(url, params={"expand": "fazendas.culturas", "fields": "fazendas.culturas.nome"})
+    assert com_culturas.json()["cpf_cnpj"] == produtor["cpf_cnpj"]
+    assert com_culturas.json()["fazendas"][0]["id"] == fazenda["id"]
+    assert com_culturas.json()["fazendas"][0]["culturas"] == [{"nome": c["nome"]} for c in fazenda["culturas"]]
+    assert consultas(com_culturas) == 4
+
+    assert client.get(f"/api/v1/fazendas/{fazenda['id']}?fields=nome,estado").json() == \
+        {"nome": fazenda["nome"], "estado": fazenda["estado"]}
+    expandida = client.get(f"/api/v1/produtores/{produtor['id']}/fazendas/?expand=culturas").json()
+    assert expandida == produtor["fazendas"]
+    lista = client.get("/api/v1/fazendas/?fields=id&estado=SP&limit=100").json()
+    assert lista == [{"id": f["id"]} for f in client.get("/api/v1/fazendas/?estado=SP&limit=100").json()]
+
+    # Sem os parâmetros, a resposta continua com o grafo completo
+    assert client.get(url).json() == produtor
+    async_app = FastAPI()
+    async_app.include_router(api_async.router, prefix="/api/v1")
+    async_app.dependency_overrides[get_async_db] = override_get_async_db
+    async_app.dependency_overrides[get_async_read_db] = override_get_async_db
+    with TestClient(async_app) as async_client:
+        assert async_client.get("/api/v1/produtores/?limit=2&fields=id,nome,cpf_cnpj").json() == plana.json()
+
+    monkeypatch.setattr(respostas, "JSON_RAPIDO", False)
+    assert client.get("/api/v1/produtores/?limit=2&fields=id,nome,cpf_cnpj").json() == plana.json()
+
+    for params in ({"fields": "senha"}, {"fields": "fazendas"}, {"fields": "fazendas.nome"},
+                   {"expand": "culturas"}, {"fields": "id,,nome"}):
+        response = client.get("/api/v1/produtores/", params=params)
+        assert response.status_code == 400, params
+
+def test_migrations_match_models(tmp_path):
+    """alembic upgrade head gera o mesmo esquema dos modelos, com os índices de desempenho"""
+    from alembic import command
+    from alembic.autogenerate import compare_metadata
+    from alembic.config import Config
+    from alembic.migration import MigrationContext
+    from sqlalchemy import inspect
+
+    url = f"sqlite:///{tmp_path / 'migracoes.db'}"
+    config = Config("alembic.ini")
+    config.set_main_option("sqlalchemy.url", url)
+    config.attributes["configurar_logging"] = False
+    command.upgrade(config, "head")
+
+    migrado = create_engine(url)
+    try:
+        indices = {
+            tabela: {i["name"] for i in inspect(migrado).get_indexes(tabela)}
+            for tabela in ("fazendas", "culturas")
+        }
+        assert {"ix_fazendas_produtor_id", "ix_fazendas_estado_cidade", "ix_fazendas_area_total"} <= indices["fazendas"]
+        assert {"ix_culturas_fazenda_id", "ix_culturas_nome_safra"} <= indices["culturas"]
+
+        with migrado.connect() as conn:
+            assert compare_metadata(MigrationContext.configure(conn), Base.metadata) == []
+
+        command.downgrade(config, "0001")
+        assert "ix_fazendas_produtor_id" not in {i["name"] for i in inspect(migrado).get_indexes("fazendas")}
+
+        command.upgrade(config, "head")
+    finally:
+        migrado.dispose()
+
+    # Bancos criados por create_all, antes das migrações, são adotados sem erro
+    url = f"sqlite:///{tmp_path / 'create_all.db'}"
+    existente = create_engine(url)
+    Base.metadata.create_all(bind=existente)
+    with sessionmaker(bind=existente)() as db:
+        # estado em minúsculas, gravado antes da normalização no schema
+        db.add(models.Produtor(id=1, cpf_cnpj=gerar_cpf(800000000), nome="Antigo"))
+        for nome, estado in (("Fazenda A", "mg"), ("Fazenda B", "MG")):
+            db.add(models.Fazenda(nome=nome, cidade="Uberaba", estado=estado, produtor_id=1,
+                                  area_total=100.0, area_agricultavel=50.0, area_vegetacao=20.0))
+        db.flush()
+        rollup.rebuild(db)
+    existente.dispose()
+    config.set_main_option("sqlalchemy.url", url)
+    command.upgrade(config, "head")
+    existente = create_engine(url)
+    try:
+        with sessionmaker(bind=existente)() as db:
+            assert {f.estado for f in db.query(models.Fazenda)} == {"MG"}
+            assert rollup.ler(db)["por_estado"] == {"MG": 2}
+            assert rollup.verificar(db) == []
+    finally:
+        existente.dispose()
@@ -5,6 +5,8 @@ export const api = axios.create({
     ? process.env.NEXT_PUBLIC_API_URL
     : (process.env.NEXT_PUBLIC_API_URL ? process.env.NEXT_PUBLIC_API_URL.replace(/\/$/, '') + '/api/v1' : 'http://localhost:8000/api/v1')),
   timeout: 10000,
+  // Envia o cookie com que o backend lê do primário logo após uma escrita
+  withCredentials: true,
   headers: {
     'Content-Type': 'application/json',
   },